@@ -0,0 +1,130 @@
+"""
+Benchmark e verificação da fila de e-mails contra um servidor SMTP local (aiosmtpd).
+
+    python -m benchmarks.bench_email_outbox --messages 200 --workers 2 --latency-ms 5
+
+O servidor recusa de forma temporária (451) a primeira entrega para destinatários
+`retry-*` e de forma permanente (550) os destinatários `refused-*`. Depois do envio,
+`stop(drain=True)` precisa entregar inclusive as mensagens em espera de nova tentativa.
+Uma segunda rodada encerra a fila sem drenar e confere que nenhuma mensagem fica sem
+status final. Reporta a vazão, as conexões SMTP usadas e sai com código 1 se algum
+status não for o esperado.
+"""
+import argparse
+import asyncio
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Set
+
+from aiosmtpd.controller import Controller
+
+from src.tools.email_outbox import EmailOutbox, SmtpSettings
+
+FINAL_STATUSES = {"sent", "failed", "rejected"}
+
+
+class Handler:
+    """Handler do aiosmtpd com latência e recusas configuráveis por destinatário."""
+
+    def __init__(self, latency: float) -> None:
+        self._latency = latency
+        self._lock = threading.Lock()
+        self.delivered: Counter = Counter()
+        self.deferred: Set[str] = set()
+        self.sessions: Set[int] = set()
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if address.startswith("refused-"):
+            return "550 5.1.1 Mailbox unavailable"
+        envelope.rcpt_tos.append(address)
+        return "250 OK"
+
+    async def handle_DATA(self, server, session, envelope):
+        if self._latency:
+            await asyncio.sleep(self._latency)
+        receiver = envelope.rcpt_tos[0]
+        with self._lock:
+            self.sessions.add(id(session))
+            if receiver.startswith("retry-") and receiver not in self.deferred:
+                self.deferred.add(receiver)
+                return "451 4.3.0 Try again later"
+            self.delivered[receiver] += 1
+        return "250 Message accepted for delivery"
+
+
+def receivers(total: int) -> List[str]:
+    # 1 em cada 10 com recusa temporária (inclusive a última, que ainda espera a nova
+    # tentativa quando a fila esvazia) e 1 em cada 25 recusado de vez
+    return [
+        f"refused-{i}@example.com" if i % 25 == 0 else
+        f"retry-{i}@example.com" if i % 10 == 9 or i == total - 1 else
+        f"user-{i}@example.com"
+        for i in range(total)
+    ]
+
+
+def expected_status(receiver: str) -> str:
+    return "failed" if receiver.startswith("refused-") else "sent"
+
+
+async def run(args, port: int, handler: Handler) -> bool:
+    settings = SmtpSettings("127.0.0.1", port, sender="bench@example.com", starttls=False, login=False)
+    outbox = EmailOutbox(settings, workers=args.workers, max_queue=args.max_queue, batch_size=args.batch_size,
+                         retry_backoff=args.backoff_ms / 1000)
+    addresses = receivers(args.messages)
+    started = time.perf_counter()
+    ids: Dict[str, str] = {}
+    for receiver in addresses:
+        ids[receiver] = await outbox.send(receiver, "Benchmark", "<p>Olá</p>")
+    await outbox.stop(drain=True)
+    elapsed = time.perf_counter() - started
+
+    statuses = {receiver: outbox.status(message_id) for receiver, message_id in ids.items()}
+    wrong = [receiver for receiver, status in statuses.items() if status["status"] != expected_status(receiver)]
+    duplicated = [receiver for receiver, count in handler.delivered.items() if count > 1]
+    retried = sum(1 for status in statuses.values() if status["attempts"] > 1)
+    print(f"mensagens: {args.messages}  workers: {args.workers}  duração: {elapsed:.2f}s  "
+          f"vazão: {args.messages / elapsed:.1f} msg/s")
+    print(f"status: {dict(Counter(status['status'] for status in statuses.values()))}  "
+          f"reenviadas: {retried}  conexões SMTP: {len(handler.sessions)}")
+
+    # Encerramento sem drenar: toda mensagem aceita termina com status final
+    outbox = EmailOutbox(settings, workers=1, max_queue=args.max_queue, retry_backoff=10.0)
+    pending = [await outbox.send(f"retry-late-{i}@example.com", "Benchmark", "<p>Olá</p>") for i in range(20)]
+    await asyncio.sleep(0.2)
+    await outbox.stop(drain=False)
+    unfinished = [message_id for message_id in pending if outbox.status(message_id)["status"] not in FINAL_STATUSES]
+    print(f"stop sem drenar: {len(pending) - len(unfinished)}/{len(pending)} com status final")
+
+    for label, problems in (("status inesperado", wrong), ("entregues mais de uma vez", duplicated),
+                            ("sem status final", unfinished)):
+        if problems:
+            print(f"ERRO {label}: {problems[:5]}{' ...' if len(problems) > 5 else ''}")
+    return not (wrong or duplicated or unfinished)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--batch-size", type=int, default=10)
+    parser.add_argument("--max-queue", type=int, default=100)
+    parser.add_argument("--latency-ms", type=float, default=5.0, help="tempo do servidor SMTP para aceitar cada mensagem")
+    parser.add_argument("--backoff-ms", type=float, default=50.0, help="espera antes da primeira nova tentativa")
+    parser.add_argument("--port", type=int, default=8025)
+    args = parser.parse_args()
+
+    handler = Handler(args.latency_ms / 1000)
+    controller = Controller(handler, hostname="127.0.0.1", port=args.port)
+    controller.start()
+    try:
+        ok = asyncio.run(run(args, args.port, handler))
+    finally:
+        controller.stop()
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
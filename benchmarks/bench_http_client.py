@@ -0,0 +1,60 @@
+"""
+Benchmark das ferramentas da API de assinaturas contra o stub local.
+
+    python -m benchmarks.bench_http_client --requests 500 --concurrency 50 --latency-ms 20
+
+Reporta requisições por segundo, latências p50/p95/p99 e quantas conexões TCP o stub recebeu.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+from benchmarks.stub_subscription_api import serve
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+async def run(total: int, concurrency: int) -> None:
+    from src.tools.custom_tools import buscar_assinaturas_ativas_api, cancelar_assinatura_api
+
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(i: int) -> None:
+        async with semaphore:
+            started = time.perf_counter()
+            if i % 5 == 0:
+                await cancelar_assinatura_api(1, 1)
+            else:
+                await buscar_assinaturas_ativas_api("111.222.333-44")
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    elapsed = time.perf_counter() - started
+    print(f"requisições: {total}  concorrência: {concurrency}  duração: {elapsed:.2f}s")
+    print(f"throughput: {total / elapsed:.1f} req/s")
+    print(f"latência ms  p50={percentile(latencies, 50):.1f}  p95={percentile(latencies, 95):.1f}  "
+          f"p99={percentile(latencies, 99):.1f}  média={statistics.mean(latencies):.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--port", type=int, default=3000)
+    args = parser.parse_args()
+
+    os.environ["SUBSCRIPTION_API_URL"] = f"http://127.0.0.1:{args.port}"
+    server, state = serve(port=args.port, latency=args.latency_ms / 1000)
+    try:
+        asyncio.run(run(args.requests, args.concurrency))
+        print(f"conexões TCP abertas no stub: {state.connections} para {state.requests} requisições")
+    finally:
+        server.shutdown()
@@ -0,0 +1,99 @@
+"""
+Compara chamadas diretas ao modelo com o agendador (`src/common/model_scheduler.py`)
+usando o cliente falso, que simula o limite de requisições do Azure com 429 + Retry-After.
+
+    python -m benchmarks.bench_model_scheduler --sessions 40 --turns 3 --limit 20 --window 1
+
+Cada sessão faz `turns` turnos; cada turno é uma chamada e uma segunda chamada "após ferramentas".
+O modo direto repete 429 com espera fixa, como o `retry_async` do AIAgent. Reporta 429 recebidos,
+duração total, latência por turno e a diferença entre a primeira e a última sessão a terminar.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from autogen_core.models import UserMessage
+
+from src.common.fake_model_client import FakeChatCompletionClient
+from src.common.model_scheduler import (
+    PRIORITY_NEW_TURN,
+    PRIORITY_TOOL_LOOP,
+    ModelScheduler,
+    ScheduledChatCompletionClient,
+    is_rate_limit_error,
+    model_call_scope,
+)
+
+MESSAGES = [UserMessage(content="quero contratar internet", source="User")]
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+async def direct_call(client, retries: int = 3, delay: float = 3.0):
+    for attempt in range(retries):
+        try:
+            return await client.create(MESSAGES)
+        except Exception as e:
+            if not is_rate_limit_error(e) or attempt == retries - 1:
+                raise
+            await asyncio.sleep(delay)
+
+
+async def run(mode: str, sessions: int, turns: int, limit: int, window: float, latency: float) -> None:
+    fake = FakeChatCompletionClient(latency=latency, requests_per_window=limit, window=window)
+    scheduled = ScheduledChatCompletionClient(
+        ModelScheduler([fake], requests_per_minute=limit * 60 / window, tokens_per_minute=10 ** 9, max_concurrency=16,
+                       burst_seconds=window)
+    )
+    turn_latencies = []
+    finished = []
+    failures = 0
+
+    async def session(index: int) -> None:
+        nonlocal failures
+        for _ in range(turns):
+            started = time.perf_counter()
+            try:
+                if mode == "direct":
+                    await direct_call(fake)
+                    await direct_call(fake)
+                else:
+                    with model_call_scope(f"s{index}", PRIORITY_NEW_TURN):
+                        await scheduled.create(MESSAGES)
+                    with model_call_scope(f"s{index}", PRIORITY_TOOL_LOOP):
+                        await scheduled.create(MESSAGES)
+                turn_latencies.append(time.perf_counter() - started)
+            except Exception:
+                failures += 1
+        finished.append(time.perf_counter())
+
+    started = time.perf_counter()
+    await asyncio.gather(*(session(i) for i in range(sessions)))
+    elapsed = time.perf_counter() - started
+    print(f"[{mode}] duração: {elapsed:.2f}s  chamadas aceitas: {fake.calls}  429 recebidos: {fake.rate_limited}  "
+          f"turnos com falha: {failures}")
+    if turn_latencies:
+        print(f"[{mode}] latência por turno: média={statistics.mean(turn_latencies):.2f}s  "
+              f"p50={percentile(turn_latencies, 50):.2f}s  p95={percentile(turn_latencies, 95):.2f}s")
+    print(f"[{mode}] término das sessões: primeira={min(finished) - started:.2f}s  última={max(finished) - started:.2f}s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=40)
+    parser.add_argument("--turns", type=int, default=3)
+    parser.add_argument("--limit", type=int, default=20, help="requisições aceitas pelo modelo falso por janela")
+    parser.add_argument("--window", type=float, default=1.0, help="janela do limite, em segundos")
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--mode", choices=["direct", "scheduler", "both"], default="both")
+    args = parser.parse_args()
+    for mode in (["direct", "scheduler"] if args.mode == "both" else [args.mode]):
+        asyncio.run(run(mode, args.sessions, args.turns, args.limit, args.window, args.latency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Avalia o pré-roteador da triagem contra os conjuntos rotulados em `benchmarks/fixtures/`.
+
+    python -m benchmarks.bench_pre_router --confidence 0.75 --min-score 2
+
+`triage_routing.jsonl` foi escrito junto com `TRIAGE_RULES` (mede o ajuste das regras);
+`triage_routing_holdout.jsonl` tem falas escritas sem consultar as regras e é o número a
+citar. Não ajuste as regras olhando os erros do conjunto held-out: acrescente novos exemplos
+ao conjunto de ajuste e meça de novo num held-out novo.
+
+Cada linha tem `text` e `label` (nome da ferramenta de transferência, ou null quando a fala
+deve ir para o LLM). Reporta cobertura (falas decididas sem o LLM), precisão das decisões,
+transferências indevidas em falas que deveriam ir para o LLM e a latência de decisão.
+"""
+import argparse
+import json
+import os
+import time
+from collections import Counter
+
+from src.agents.pre_router import KeywordRouter, TRIAGE_RULES
+
+FIXTURES = {
+    "ajuste": os.path.join(os.path.dirname(__file__), "fixtures", "triage_routing.jsonl"),
+    "held-out": os.path.join(os.path.dirname(__file__), "fixtures", "triage_routing_holdout.jsonl"),
+}
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def run(path: str, confidence: float, min_score: float, repeat: int, verbose: bool) -> None:
+    with open(path, encoding="utf-8") as f:
+        examples = [json.loads(line) for line in f if line.strip()]
+    router = KeywordRouter(TRIAGE_RULES, min_confidence=confidence, min_score=min_score)
+
+    latencies = []
+    outcomes = Counter()
+    per_label = Counter()
+    per_label_hits = Counter()
+    for example in examples:
+        for _ in range(repeat):
+            started = time.perf_counter()
+            route = router.decide(example["text"])
+            latencies.append((time.perf_counter() - started) * 1e6)
+        decided = route.tool_name if route else None
+        label = example["label"]
+        per_label[label] += 1
+        if decided is None:
+            outcomes["fallback_ok" if label is None else "fallback_missed"] += 1
+        elif decided == label:
+            outcomes["correct"] += 1
+            per_label_hits[label] += 1
+        else:
+            outcomes["wrong" if label is not None else "false_route"] += 1
+        if verbose and decided != label:
+            print(f"  {example['text']!r}: esperado={label} decidido={route}")
+
+    routed = outcomes["correct"] + outcomes["wrong"] + outcomes["false_route"]
+    print(f"{os.path.basename(path)}\nexemplos: {len(examples)}  limiar: {confidence}  pontuação mínima: {min_score}")
+    print(f"cobertura (sem LLM): {routed}/{len(examples)} = {routed / len(examples):.1%}")
+    print(f"precisão das decisões: {outcomes['correct']}/{routed} = {outcomes['correct'] / max(routed, 1):.1%}")
+    print(f"transferências indevidas (label null): {outcomes['false_route']}  erradas: {outcomes['wrong']}")
+    print(f"falas que ficaram com o LLM: {outcomes['fallback_ok'] + outcomes['fallback_missed']} "
+          f"(deveriam ter sido roteadas: {outcomes['fallback_missed']})")
+    for label in sorted(label for label in per_label if label is not None):
+        print(f"  recall {label}: {per_label_hits[label]}/{per_label[label]}")
+    print(f"latência de decisão: p50={percentile(latencies, 50):.1f}µs  p99={percentile(latencies, 99):.1f}µs")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--fixture", action="append",
+                        help="arquivo .jsonl a avaliar (repetível; padrão: os conjuntos de ajuste e held-out)")
+    parser.add_argument("--confidence", type=float, default=0.75)
+    parser.add_argument("--min-score", type=float, default=2.0, help="evidência mínima (frase forte = 2, palavra fraca = 1)")
+    parser.add_argument("--repeat", type=int, default=100, help="repetições por exemplo para medir a latência")
+    parser.add_argument("--verbose", action="store_true", help="lista os exemplos decididos de forma diferente do rótulo")
+    args = parser.parse_args()
+    for number, path in enumerate(args.fixture or FIXTURES.values()):
+        if number:
+            print()
+        run(path, args.confidence, args.min_score, args.repeat, args.verbose)
+
+
+if __name__ == "__main__":
+    main()
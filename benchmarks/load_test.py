@@ -0,0 +1,235 @@
+"""
+Teste de carga offline do servidor de agentes: N usuários simulados passam pelo fluxo
+`start()` de `src/main.py` com conversas roteirizadas, sem rede nem credenciais.
+
+    python -m benchmarks.load_test --users 50 --model-latency-ms 200
+
+Backends substituídos:
+- modelo: `FakeChatCompletionClient` determinístico (atrás do agendador, como em produção)
+  que segue o roteiro de `benchmarks/fixtures/load_conversations.json`;
+- banco: SQLite em memória com `src/tools/fixtures/vivo_sqlite.sql`;
+- busca: `FixtureSearchBackend` com `benchmarks/fixtures/search_corpus.json`;
+- API de assinaturas: `benchmarks/stub_subscription_api.py` numa thread local.
+
+No roteiro, cada mensagem do usuário define as ações do modelo em ordem: chamadas de
+ferramenta (inclusive transferências) e, por fim, o texto da resposta. A ação escolhida é
+a de índice igual ao número de rodadas de ferramentas já feitas desde a mensagem.
+
+Com `--replay` o modelo é uma gravação (`src/common/replay_model_client.py`) em vez do roteiro.
+
+Reporta latência por turno (p50/p95/p99), turnos por segundo e memória por sessão
+(tracemalloc com todas as sessões abertas, numa segunda rodada).
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import statistics
+import time
+import tracemalloc
+import uuid
+from typing import Any, Dict, List, Optional, Sequence
+
+from benchmarks.stub_subscription_api import serve
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CONVERSATIONS = os.path.join(ROOT, "benchmarks", "fixtures", "load_conversations.json")
+SEARCH_CORPUS = os.path.join(ROOT, "benchmarks", "fixtures", "search_corpus.json")
+DB_SCRIPT = os.path.join(ROOT, "src", "tools", "fixtures", "vivo_sqlite.sql")
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+class ScriptedReply:
+    """Resposta do modelo falso conforme o roteiro da última mensagem do usuário."""
+
+    def __init__(self, conversations: List[Dict[str, Any]]) -> None:
+        self._actions = {turn["user"]: turn["actions"] for conversation in conversations
+                         for turn in conversation["turns"]}
+
+    def __call__(self, messages: Sequence[Any], tools: Sequence[Any]) -> Any:
+        from autogen_core import FunctionCall
+        from autogen_core.models import AssistantMessage, UserMessage
+
+        last_user = max((i for i, m in enumerate(messages) if isinstance(m, UserMessage)), default=None)
+        if last_user is None:
+            return "Olá! Como posso ajudar?"
+        rounds = sum(1 for m in messages[last_user + 1:] if isinstance(m, AssistantMessage) and isinstance(m.content, list))
+        actions = self._actions.get(messages[last_user].content, ["Pode repetir, por favor?"])
+        action = actions[min(rounds, len(actions) - 1)]
+        if isinstance(action, str):
+            return action
+        tool_names = {tool.name if hasattr(tool, "name") else tool["name"] for tool in tools}
+        if action["tool"] not in tool_names:
+            # Ferramenta fora do agente atual (ex.: transferência já feita pelo pré-roteador)
+            return actions[-1]
+        return [FunctionCall(id=f"call_{uuid.uuid4().hex[:24]}", name=action["tool"],
+                             arguments=json.dumps(action["arguments"]))]
+
+
+class SimulatedUser:
+    """
+    WebSocket falso de um usuário. `recv` entrega a próxima mensagem do roteiro; como o agente
+    do usuário só volta a chamar `recv` depois da resposta final do turno, o intervalo entre
+    duas chamadas é a latência do turno vista pelo cliente.
+    """
+
+    def __init__(self, turns: List[str], think_time: float, latencies: List[float],
+                 hold: Optional["Barrier"] = None) -> None:
+        self._turns = list(turns)
+        self._think_time = think_time
+        self._latencies = latencies
+        self._hold = hold
+        self._sent_at: Optional[float] = None
+        self._closed = asyncio.Event()
+        self.frames = 0
+
+    async def recv(self) -> str:
+        if self._sent_at is not None:
+            self._latencies.append(time.perf_counter() - self._sent_at)
+        if not self._turns:
+            if self._hold is not None:
+                await self._hold.wait()
+            return "exit"
+        if self._think_time:
+            await asyncio.sleep(self._think_time)
+        self._sent_at = time.perf_counter()
+        return self._turns.pop(0)
+
+    async def send(self, data: str) -> None:
+        self.frames += 1
+
+    async def wait_closed(self) -> None:
+        await self._closed.wait()
+
+
+class Barrier:
+    """Segura as sessões abertas até todas terminarem o roteiro (medição de memória)."""
+
+    def __init__(self, parties: int) -> None:
+        self._parties = parties
+        self._arrived = 0
+        self.all_arrived = asyncio.Event()
+        self.release = asyncio.Event()
+
+    async def wait(self) -> None:
+        self._arrived += 1
+        if self._arrived == self._parties:
+            self.all_arrived.set()
+        await self.release.wait()
+
+
+def configure_backends(conversations, args) -> Any:
+    from src.common.fake_model_client import FakeChatCompletionClient
+    from src.common.model_scheduler import ModelScheduler, ScheduledChatCompletionClient
+    from src.common.replay_model_client import RecordingChatCompletionClient, ReplayChatCompletionClient
+    from src.config import set_model_client
+    from src.tools.database import ConnectionPool, SQLiteBackend, set_pool
+    from src.tools.search import FixtureSearchBackend, SearchService, set_search_service
+
+    if args.replay:
+        client = ReplayChatCompletionClient(args.replay, latency_scale=args.latency_scale)
+    else:
+        client = FakeChatCompletionClient(reply=ScriptedReply(conversations), latency=args.model_latency_ms / 1000)
+        if args.record:
+            client = RecordingChatCompletionClient(client, args.record)
+    set_model_client(ScheduledChatCompletionClient(
+        ModelScheduler([client], requests_per_minute=10 ** 7, tokens_per_minute=10 ** 10, max_concurrency=1000)
+    ))
+    with open(DB_SCRIPT, encoding="utf-8") as f:
+        set_pool(ConnectionPool(SQLiteBackend(":memory:", init_script=f.read()), max_size=args.db_pool_size))
+    set_search_service(SearchService(
+        FixtureSearchBackend.from_file(SEARCH_CORPUS, latency=args.search_latency_ms / 1000)
+    ))
+    return client
+
+
+async def drive(users: int, conversations, think_time: float, hold: Optional[Barrier] = None):
+    from src.main import start
+
+    latencies: List[float] = []
+    clients = [
+        SimulatedUser([turn["user"] for turn in conversations[i % len(conversations)]["turns"]],
+                      think_time, latencies, hold)
+        for i in range(users)
+    ]
+    started = time.perf_counter()
+    tasks = [asyncio.ensure_future(start(client)) for client in clients]
+    return tasks, latencies, started
+
+
+async def run(args) -> None:
+    with open(CONVERSATIONS, encoding="utf-8") as f:
+        conversations = json.load(f)
+    model_client = configure_backends(conversations, args)
+    output = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+
+    from src.main import get_runtime
+
+    with output:
+        await get_runtime()
+        # Rodada de latência e vazão
+        tasks, latencies, started = await drive(args.users, conversations, args.think_ms / 1000)
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - started
+
+    expected = sum(len(conversations[i % len(conversations)]["turns"]) for i in range(args.users))
+    model = f"replay de {args.replay} (x{args.latency_scale:g})" if args.replay else f"{args.model_latency_ms:.0f}ms"
+    print(f"usuários: {args.users}  turnos: {len(latencies)}/{expected}  duração: {elapsed:.2f}s  modelo: {model}")
+    print(f"vazão: {len(latencies) / elapsed:.1f} turnos/s")
+    if latencies:
+        print(f"latência por turno ms  p50={percentile(latencies, 50) * 1000:.1f}  "
+              f"p95={percentile(latencies, 95) * 1000:.1f}  p99={percentile(latencies, 99) * 1000:.1f}  "
+              f"média={statistics.mean(latencies) * 1000:.1f}")
+    if args.replay:
+        print("replay: " + "  ".join(f"{key}={value}" for key, value in model_client.stats().items()))
+
+    if args.skip_memory:
+        return
+    # Rodada de memória: todas as sessões ficam abertas ao fim do roteiro até a medição
+    with output:
+        tracemalloc.start()
+        baseline = tracemalloc.get_traced_memory()[0]
+        hold = Barrier(args.users)
+        tasks, _, _ = await drive(args.users, conversations, 0.0, hold)
+        await hold.all_arrived.wait()
+        current = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        hold.release.set()
+        await asyncio.gather(*tasks)
+    print(f"memória por sessão aberta: {(current - baseline) / args.users / 1024:.1f} KiB "
+          f"({(current - baseline) / 1024 / 1024:.1f} MiB para {args.users} sessões)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=50, help="usuários simultâneos")
+    parser.add_argument("--model-latency-ms", type=float, default=200.0)
+    parser.add_argument("--search-latency-ms", type=float, default=50.0)
+    parser.add_argument("--think-ms", type=float, default=0.0, help="pausa do usuário antes de cada mensagem")
+    parser.add_argument("--db-pool-size", type=int, default=5)
+    parser.add_argument("--api-port", type=int, default=3000)
+    parser.add_argument("--api-latency-ms", type=float, default=20.0)
+    parser.add_argument("--record", help="grava as chamadas ao modelo roteirizado neste arquivo (.jsonl ou .jsonl.gz)")
+    parser.add_argument("--replay", help="reproduz uma gravação (ex.: capturada com MODEL_RECORD_PATH) no lugar do roteiro")
+    parser.add_argument("--latency-scale", type=float, default=1.0, help="multiplicador das latências gravadas")
+    parser.add_argument("--skip-memory", action="store_true")
+    parser.add_argument("--verbose", action="store_true", help="mantém os logs dos agentes no stdout")
+    args = parser.parse_args()
+
+    # Lido na importação de `src.tools.custom_tools`
+    os.environ["SUBSCRIPTION_API_URL"] = f"http://127.0.0.1:{args.api_port}"
+    server, _ = serve(port=args.api_port, latency=args.api_latency_ms / 1000)
+    try:
+        asyncio.run(run(args))
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Servidor stub da API de assinaturas (porta 3000) para testes e benchmarks locais.
+
+    python -m benchmarks.stub_subscription_api --port 3000 --latency-ms 20
+
+Implementa `GET /assinaturas?cpf=...` e `POST /assinaturas/cancelar` com keep-alive (HTTP/1.1)
+e conta quantas conexões TCP foram abertas, para medir o reuso de conexões do cliente.
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+SUBSCRIPTIONS = {
+    "111.222.333-44": [
+        {"clientId": 1, "planId": 1, "nome_plano": "Vivo Fibra 500 Mega", "status": "Ativo"},
+        {"clientId": 1, "planId": 3, "nome_plano": "Vivo Pós 50GB", "status": "Ativo"},
+    ],
+    "222.333.444-55": [
+        {"clientId": 2, "planId": 2, "nome_plano": "Vivo Controle 25GB", "status": "Ativo"},
+    ],
+}
+
+
+class StubState:
+    def __init__(self, latency: float = 0.0) -> None:
+        self.latency = latency
+        self.connections = 0
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def count(self, connection: bool = False) -> None:
+        with self._lock:
+            if connection:
+                self.connections += 1
+            else:
+                self.requests += 1
+
+
+def make_handler(state: StubState):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # Mantém a conexão aberta entre requisições
+
+        def setup(self) -> None:
+            super().setup()
+            state.count(connection=True)
+
+        def log_message(self, format, *args) -> None:
+            pass
+
+        def _reply(self, status: int, payload) -> None:
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self) -> None:
+            state.count()
+            time.sleep(state.latency)
+            parts = urlsplit(self.path)
+            if parts.path == "/stats":
+                self._reply(200, {"connections": state.connections, "requests": state.requests})
+            elif parts.path == "/assinaturas":
+                cpf = parse_qs(parts.query).get("cpf", [""])[0]
+                self._reply(200, SUBSCRIPTIONS.get(cpf, []))
+            else:
+                self._reply(404, {"error": "not found"})
+
+        def do_POST(self) -> None:
+            state.count()
+            time.sleep(state.latency)
+            length = int(self.headers.get("Content-Length", "0"))
+            data = json.loads(self.rfile.read(length) or b"{}")
+            if self.path == "/assinaturas/cancelar":
+                self._reply(200, {"clientId": data.get("clientId"), "planId": data.get("planId"),
+                                  "status": "Cancelado"})
+            else:
+                self._reply(404, {"error": "not found"})
+
+    return Handler
+
+
+def serve(host: str = "127.0.0.1", port: int = 3000, latency: float = 0.0):
+    """Inicia o stub em uma thread daemon e retorna (servidor, estado)."""
+    state = StubState(latency)
+    server = ThreadingHTTPServer((host, port), make_handler(state))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, state
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=3000)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    args = parser.parse_args()
+    server, _ = serve(args.host, args.port, args.latency_ms / 1000)
+    print(f"Stub da API de assinaturas em http://{args.host}:{args.port}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -1,6 +1,9 @@
 import asyncio
 import json
-from typing import List, Tuple, Any
+import os
+import time
+import uuid
+from typing import Any, Dict, List, Tuple, Optional
 
 from autogen_core import (
     FunctionCall,
@@ -11,16 +14,52 @@ from autogen_core import (
 )
 from autogen_core.models import (
     AssistantMessage,
+    ChatCompletionClient,
+    CreateResult,
     FunctionExecutionResult,
     FunctionExecutionResultMessage,
+    LLMMessage,
     SystemMessage,
 )
 from autogen_core.tools import Tool
-from autogen_ext.models.openai import AzureOpenAIChatCompletionClient
-from flask_socketio import emit
 
-from src.agents.responses import AgentResponse, UserTask
-from src.common.websockt_manager import WebSocketManager
+from src.agents.context_window import ContextWindow
+from src.agents.conversation_store import ConversationStore, conversation_store, history_entries, merge_delta
+from src.agents.pre_router import PreRouter, Route
+from src.agents.response_cache import ResponseCache
+from src.agents.responses import AgentResponse, HistoryEntries, HistoryRequest, UserTask
+from src.common.metrics import (
+    agent_messages,
+    delegations,
+    model_errors,
+    model_latency,
+    tool_latency,
+    tool_results,
+    turn_fallbacks,
+)
+from src.common.model_scheduler import (
+    PRIORITY_NEW_TURN,
+    PRIORITY_TOOL_LOOP,
+    ScheduledChatCompletionClient,
+    model_call_scope,
+)
+from src.common.prompt_cache import capture_usage, prompt_cache_metrics
+from src.common.session_registry import SessionRegistry, session_agents
+from src.common.tracing import span
+from src.utils.retry_helpers import Deadline, RetryPolicy, is_retryable, is_retryable_except_rate_limit
+
+# Limite de cada tentativa de chamada ao modelo, em segundos
+MODEL_ATTEMPT_TIMEOUT = 60.0
+
+# Resposta enviada quando o turno desiste (modelo indisponível, prazo esgotado, erro inesperado)
+FALLBACK_REPLY = (
+    "Desculpe, não consegui concluir o seu pedido agora. Por favor, tente novamente em instantes."
+)
+
+
+def is_error_result(result: Any) -> bool:
+    """Falha devolvida pela ferramenta sem exceção: `{"error": ...}` preenchido ou None (APIs HTTP)."""
+    return result is None or (isinstance(result, dict) and bool(result.get("error")))
 
 
 class AIAgent(RoutedAgent):
@@ -28,16 +67,24 @@ class AIAgent(RoutedAgent):
             self,
             description: str,
             system_message: SystemMessage,
-            model_client: AzureOpenAIChatCompletionClient,
+            model_client: ChatCompletionClient,
             tools: List[Tool],
             delegate_tools: List[Tool],
             agent_topic_type: str,
             user_topic_type: str,
-            websocket: Any,
+            sessions: Optional[SessionRegistry],
             nome: str,
-            avatar: str
+            avatar: str,
+            max_concurrent_tools: int = 4,
+            context_token_budget: int = 8000,
+            store: Optional[ConversationStore] = None,
+            stream: Optional[bool] = None,
+            response_cache: Optional[ResponseCache] = None,
+            pre_router: Optional[PreRouter] = None,
+            turn_timeout: Optional[float] = 90.0
     ) -> None:
         super().__init__(description)
+        session_agents.add(self.id)
         self._system_message = system_message
         self._model_client = model_client
         self._tools = dict([(tool.name, tool) for tool in tools])
@@ -45,11 +92,39 @@ class AIAgent(RoutedAgent):
         self._tool_schema = [tool.schema for tool in tools]
         self._delegate_tools = dict([(tool.name, tool) for tool in delegate_tools])
         self._delegate_tool_schema = [tool.schema for tool in delegate_tools]
+        # Ferramentas em ordem fixa (por nome), montadas uma única vez: o início da requisição
+        # (system prompt + ferramentas) fica idêntico entre turnos e sessões e aproveita o cache de prompt
+        self._model_tools = sorted(self._tool_schema + self._delegate_tool_schema, key=lambda schema: schema["name"])
         self._agent_topic_type = agent_topic_type
         self._user_topic_type = user_topic_type
-        self.websocket = websocket
+        self._sessions = sessions
         self.nome = nome
         self.avatar = avatar
+        self._max_concurrent_tools = max_concurrent_tools
+        # Histórico enviado ao modelo limitado por orçamento de tokens (o agente é instanciado por sessão)
+        self._context_window = ContextWindow(context_token_budget)
+        self._store = store if store is not None else conversation_store
+        # Streaming opcional da resposta para o WebSocket (STREAM_RESPONSES=1); sem sessões não há para onde enviar
+        if stream is None:
+            stream = os.getenv("STREAM_RESPONSES", "0") == "1"
+        self._stream = stream and sessions is not None
+        # Cache opcional de respostas, compartilhado pelas instâncias do mesmo tipo de agente
+        self._response_cache = response_cache
+        # Pré-roteador opcional: transferências óbvias são feitas sem chamar o modelo
+        self._pre_router = pre_router
+        # Prazo total do turno e políticas de repetição (só falhas temporárias são repetidas)
+        self._turn_timeout = turn_timeout
+        # Com o agendador, ele repete os 429 e aplica o limite por tentativa a partir do despacho
+        # (`model_call_scope`), sem contar a espera na fila; a política cuida das demais falhas
+        scheduled = isinstance(model_client, ScheduledChatCompletionClient)
+        self._model_attempt_timeout = MODEL_ATTEMPT_TIMEOUT if scheduled else None
+        self._model_policy = RetryPolicy(
+            max_attempts=3, base_delay=1.0, max_delay=8.0,
+            attempt_timeout=None if scheduled else MODEL_ATTEMPT_TIMEOUT,
+            retry_on=is_retryable_except_rate_limit if scheduled else is_retryable,
+        )
+        self._tool_policy = RetryPolicy(max_attempts=3, base_delay=0.5, max_delay=4.0, attempt_timeout=30.0)
+        self._publish_policy = RetryPolicy(max_attempts=3, base_delay=0.2, max_delay=1.0)
 
     @message_handler
     async def handle_task(self, message: UserTask, ctx: MessageContext) -> None:
@@ -57,145 +132,354 @@ class AIAgent(RoutedAgent):
         Processa tarefas enviadas para este agente. Inclui o mecanismo de retry
         para chamadas ao modelo e delegação a outros agentes.
         """
+        agent_messages.inc(self.id.type)
+        # O histórico fica no store da sessão; a mensagem traz só as entradas novas
+        await merge_delta(self, self._store, self.id.key, message.offset, message.entries, ctx.sender)
+        # Início das entradas produzidas neste turno, repassadas adiante como delta
+        turn_start = len(self._store.snapshot(self.id.key))
+        # Ao fim do prazo o token do contexto é cancelado, interrompendo as chamadas em andamento
+        with span("agent.turn", self.id.key, agent=self.id.type) as turn_span, \
+                Deadline(self._turn_timeout, ctx.cancellation_token) as deadline:
+            try:
+                answered = await self.run_turn(turn_start, ctx, deadline)
+            except asyncio.CancelledError:
+                # Só o cancelamento pelo prazo do turno (token do contexto) vira resposta de contingência
+                if not ctx.cancellation_token.is_cancelled():
+                    raise
+                answered, reason = False, "deadline"
+            except Exception as e:
+                print(f"Erro inesperado no turno de {self.id.type}: {e}")
+                answered, reason = False, "error"
+            else:
+                reason = "gave_up"
+            if not answered:
+                if deadline.expired():
+                    reason = "deadline"
+                turn_span.set_attribute("fallback", reason)
+                await self.reply_fallback(turn_start, reason)
 
-        # Função de retry assíncrona utilitária
-        async def retry_async(operation, max_retries=2, delay=2):
-            for attempt in range(max_retries):
-                try:
-                    return await operation()
-                except Exception as e:
-                    print(f"Tentativa {attempt + 1}/{max_retries} falhou: {e}")
-                    if attempt < max_retries - 1:
-                        await asyncio.sleep(delay)
-                    else:
-                        print("Todas as tentativas falharam.")
-                        raise
+    @message_handler
+    async def handle_history_request(self, message: HistoryRequest, ctx: MessageContext) -> HistoryEntries:
+        # Agente de outro processo que recebeu deste um delta com lacuna
+        return history_entries(self._store, message)
 
+    async def run_turn(self, turn_start: int, ctx: MessageContext, deadline: Deadline) -> bool:
+        """
+        Executa o turno. Retorna True se ele terminou com uma resposta publicada ou uma
+        transferência, e False se desistiu (modelo ou delegação indisponíveis, prazo esgotado).
+        """
+        session_id = self.id.key
+        # Identificadores dos streams enviados ao cliente; o último corresponde à resposta final
+        stream_ids: List[str] = []
+
+        if self._pre_router is not None:
+            route = self._pre_router.route(self._store.snapshot(session_id))
+            if route is not None and route.tool_name in self._delegate_tools:
+                if await self.route_directly(route, turn_start, ctx):
+                    return True
+
+        # Executa uma chamada de ferramenta com retry, respeitando o limite de concorrência
+        async def run_tool_call(call: FunctionCall, arguments: dict,
+                                semaphore: asyncio.Semaphore) -> FunctionExecutionResult:
+            tool = self._tools[call.name]
+            async with semaphore:
+                with span("tool.run", session_id, agent=self.id.type, tool=call.name) as tool_span:
+                    started = time.perf_counter()
+                    try:
+                        result = await self._tool_policy.run(
+                            lambda: tool.run_json(arguments, ctx.cancellation_token), name=f"tool:{call.name}",
+                            deadline=deadline,
+                        )
+                        tool_latency.observe(time.perf_counter() - started, call.name)
+                        # As ferramentas de banco e de API tratam as próprias falhas e as devolvem no resultado
+                        failed = is_error_result(result)
+                        tool_results.inc(call.name, "error" if failed else "ok")
+                        if failed:
+                            tool_span.set_attribute("error", True)
+                        return FunctionExecutionResult(call_id=call.id, content=tool.return_value_as_string(result))
+                    except Exception as e:
+                        tool_latency.observe(time.perf_counter() - started, call.name)
+                        tool_results.inc(call.name, "error")
+                        tool_span.set_attribute("error", True)
+                        print(f"Erro ao executar a ferramenta {call.name}: {e}")
+                        return FunctionExecutionResult(
+                            call_id=call.id, content=f"Erro ao executar a ferramenta {call.name}: {e}"
+                        )
 
         # Chamada do modelo com retry
         async def model_call():
-            return await self._model_client.create(
-                messages=[self._system_message] + message.context,
-                tools=self._tool_schema + self._delegate_tool_schema,
-                cancellation_token=ctx.cancellation_token,
+            context = self._context_window.fit(self._store.snapshot(session_id))
+            if self._response_cache is not None:
+                cached = self._response_cache.lookup(self.id.type, context)
+                if cached is not None:
+                    return cached
+            messages = [self._system_message] + context
+            usage = capture_usage()
+            # Turno já em andamento (após ferramentas ou transferência) tem prioridade no agendador
+            in_progress = bool(context) and isinstance(context[-1], FunctionExecutionResultMessage)
+            with span("model.call", session_id, agent=self.id.type, stream=self._stream, messages=len(messages)) \
+                    as model_span, \
+                    model_call_scope(session_id, PRIORITY_TOOL_LOOP if in_progress else PRIORITY_NEW_TURN,
+                                     self._model_attempt_timeout):
+                started = time.perf_counter()
+                try:
+                    if self._stream:
+                        stream_id, result = await self.stream_model_call(messages, self._model_tools, ctx)
+                        stream_ids.append(stream_id)
+                    else:
+                        result = await self._model_client.create(
+                            messages=messages,
+                            tools=self._model_tools,
+                            cancellation_token=ctx.cancellation_token,
+                        )
+                except Exception:
+                    model_errors.inc(self.id.type)
+                    raise
+                finally:
+                    model_latency.observe(time.perf_counter() - started, self.id.type)
+                model_span.set_attribute("tokens.prompt", result.usage.prompt_tokens)
+                model_span.set_attribute("tokens.cached", usage.get("cached_tokens", 0))
+                model_span.set_attribute("tokens.completion", result.usage.completion_tokens)
+                model_span.set_attribute("finish_reason", result.finish_reason)
+            prompt_cache_metrics.record(
+                self.id.type, result.usage.prompt_tokens, usage.get("cached_tokens", 0), result.usage.completion_tokens
             )
+            if self._response_cache is not None:
+                self._response_cache.store(self.id.type, context, result, self._delegate_tools)
+            return result
 
         try:
-            llm_result = await retry_async(model_call, max_retries=2, delay=3)
+            llm_result = await self._model_policy.run(model_call, name=f"model:{self.id.type}", deadline=deadline)
         except Exception as e:
             print(f"Erro ao chamar o modelo após múltiplas tentativas: {e}")
-            return "refaça a chamada com novos argumentos" # Interrompe se o modelo falhar definitivamente.
-
-        print(f"{'-' * 80}")
-        print("Detalhes dos tokens utilizados:")
-        print(f"Prompt tokens: {llm_result.usage.prompt_tokens}", flush=True)
-        print(f"Completion tokens: {llm_result.usage.completion_tokens}", flush=True)
-        print(f"Total tokens: {llm_result.usage.prompt_tokens + llm_result.usage.completion_tokens}", flush=True)
-        print(f"{'-' * 80}")
+            return False
+
         print(f"{'-' * 80}\n{self.id.type}:\n{llm_result.content}", flush=True)
-        # response = {
-        #     "sender": {
-        #         "type": "server",
-        #         "name": self.nome,
-        #         "image": self.avatar
-        #     },
-        #     "content": llm_result.content
-        # }
-        # try:
-        #     await self.websocket.send(json.dumps(response))
-        #     print("Mensagem enviada ao WebSocket")
-        # except Exception as e:
-        #     if isinstance(e, self.websocket.ConnectionClosed):
-        #         print("Conexão WebSocket fechada pelo cliente")
-        #     else:
-        #         print(f"Erro ao enviar mensagem via WebSocket: {e}")
 
         # Processa o resultado do modelo
         while isinstance(llm_result.content, list) and all(isinstance(m, FunctionCall) for m in llm_result.content):
-            tool_call_results: List[FunctionExecutionResult] = []
-            delegate_targets: List[Tuple[str, UserTask]] = []
+            tool_calls: List[Tuple[FunctionCall, dict]] = []
+            delegate_calls: List[Tuple[FunctionCall, dict]] = []
 
-            # Processa cada chamada de ferramenta do modelo
+            # Separa as chamadas de ferramenta das transferências
             for call in llm_result.content:
                 arguments = json.loads(call.arguments)
                 print(f"ARGUMENT TOOL: {arguments}")
                 if call.name in self._tools:
-                    # Executa a ferramenta diretamente com retry
-                    async def tool_operation():
-                        return await self._tools[call.name].run_json(arguments, ctx.cancellation_token)
-
-                    try:
-                        result = await retry_async(tool_operation, max_retries=3, delay=2)
-                        result_as_str = self._tools[call.name].return_value_as_string(result)
-                        tool_call_results.append(FunctionExecutionResult(call_id=call.id, content=result_as_str))
-                    except Exception as e:
-                        print(f"Erro ao executar a ferramenta {call.name}: {e}")
-                        continue  # Ignora este call se falhar
-
+                    tool_calls.append((call, arguments))
                 elif call.name in self._delegate_tools:
-                    # Obtém o tipo de tópico do agente delegado
-                    async def delegate_tool_operation():
-                        return await self._delegate_tools[call.name].run_json(arguments, ctx.cancellation_token)
-
-                    try:
-                        result = await retry_async(delegate_tool_operation, max_retries=3, delay=2)
-                        topic_type = self._delegate_tools[call.name].return_value_as_string(result)
-
-                        # Cria o contexto para o agente delegado
-                        delegate_messages = list(message.context) + [
-                            AssistantMessage(content=[call], source=self.id.type),
-                            FunctionExecutionResultMessage(
-                                content=[
-                                    FunctionExecutionResult(
-                                        call_id=call.id,
-                                        content=f"Transferred to {topic_type}. Adopt persona immediately."
-                                    )
-                                ]
-                            ),
-                        ]
-                        delegate_targets.append((topic_type, UserTask(context=delegate_messages)))
-                    except Exception as e:
-                        print(f"Erro ao delegar para ferramenta {call.name}: {e}")
-                        continue
-
+                    delegate_calls.append((call, arguments))
                 else:
                     raise ValueError(f"Ferramenta desconhecida: {call.name}")
 
-            # Publica tarefas delegadas a outros agentes
-            for topic_type, task in delegate_targets:
-                async def delegate_operation():
-                    await self.publish_message(task, topic_id=TopicId(topic_type, source=self.id.key))
-
-                try:
-                    await retry_async(lambda: delegate_operation(), max_retries=3, delay=2)
-                    print(f"Delegando para {topic_type}")
-                except Exception as e:
-                    print(f"Erro ao delegar para {topic_type}: {e}")
-                    continue
-
-            # Integra resultados de ferramentas e faz nova chamada ao modelo
-            if len(tool_call_results) > 0:
+            # Executa as ferramentas do turno em paralelo, limitadas por `max_concurrent_tools`.
+            # O gather preserva a ordem das chamadas (call_id) e falhas viram resultados de erro
+            # sem cancelar as demais chamadas. Os resultados entram no histórico antes de uma
+            # eventual transferência, para o agente de destino recebê-los no delta.
+            if tool_calls:
+                semaphore = asyncio.Semaphore(self._max_concurrent_tools)
+                tool_call_results = list(await asyncio.gather(
+                    *(run_tool_call(call, arguments, semaphore) for call, arguments in tool_calls)
+                ))
                 print(f"{'-' * 80}\n{self.id.type}:\n{tool_call_results}", flush=True)
-                message.context.extend(
+                self._store.append(
+                    session_id,
                     [
-                        AssistantMessage(content=llm_result.content, source=self.id.type),
+                        AssistantMessage(content=[call for call, _ in tool_calls], source=self.id.type),
                         FunctionExecutionResultMessage(content=tool_call_results),
                     ]
                 )
-                try:
-                    llm_result = await retry_async(model_call, max_retries=3, delay=2)
-                    print(f"{'-' * 80}\n{self.id.type}:\n{llm_result.content}", flush=True)
-                except Exception as e:
-                    print(f"Erro ao chamar o modelo após executar ferramentas: {e}")
-                    return
-            else:
-                # A tarefa foi delegada e estamos finalizados
-                return
+
+            # Transfere a sessão para o primeiro agente delegado disponível e encerra o turno: a partir
+            # daqui só o agente de destino escreve no histórico da sessão
+            for call, arguments in delegate_calls:
+                if await self.delegate(call, arguments, turn_start, ctx, deadline):
+                    return True
+
+            if not tool_calls:
+                # Nenhuma transferência saiu e não há resultados de ferramentas: o turno desistiu
+                return False
+
+            # Integra resultados de ferramentas e faz nova chamada ao modelo
+            try:
+                llm_result = await self._model_policy.run(
+                    model_call, name=f"model:{self.id.type}", deadline=deadline
+                )
+                print(f"{'-' * 80}\n{self.id.type}:\n{llm_result.content}", flush=True)
+            except Exception as e:
+                print(f"Erro ao chamar o modelo após executar ferramentas: {e}")
+                return False
 
         # Conclui a tarefa e publica o resultado final
         assert isinstance(llm_result.content, str)
-        message.context.append(AssistantMessage(content=llm_result.content, source=self.id.type))
+        await self.publish_reply(llm_result.content, turn_start, stream_id=stream_ids[-1] if stream_ids else None)
+        return True
+
+    async def publish_reply(self, content: str, turn_start: int, stream_id: Optional[str] = None) -> None:
+        """Registra a resposta no histórico, envia ao cliente e devolve o turno ao agente do usuário."""
+        session_id = self.id.key
+        self._store.append(session_id, [AssistantMessage(content=content, source=self.id.type)])
+        await self.send_to_session(content, stream_id=stream_id)
+        offset, entries = self._store.delta(session_id, turn_start)
         await self.publish_message(
-            AgentResponse(context=message.context, reply_to_topic_type=self._agent_topic_type),
+            AgentResponse(
+                session_id=session_id,
+                offset=offset,
+                entries=entries,
+                reply_to_topic_type=self._agent_topic_type,
+                # Sem registro de sessões (agente em outro processo) quem entrega a resposta é o gateway
+                sender=None if self._sessions is not None else self.sender(),
+            ),
             topic_id=TopicId(self._user_topic_type, source=self.id.key),
-        )
\ No newline at end of file
+        )
+
+    async def reply_fallback(self, turn_start: int, reason: str) -> None:
+        """
+        Encerra com um pedido de desculpas o turno que não pôde ser concluído. Sem uma
+        AgentResponse o agente do usuário ficaria esperando e o cliente sem resposta.
+        """
+        turn_fallbacks.inc(self.id.type, reason)
+        try:
+            await self.publish_reply(FALLBACK_REPLY, turn_start)
+        except Exception as e:
+            print(f"Erro ao publicar a resposta de contingência ({self.id.key}): {e}")
+
+    async def delegate(self, call: FunctionCall, arguments: dict, turn_start: int, ctx: MessageContext,
+                       deadline: Deadline) -> bool:
+        """
+        Executa a ferramenta de delegação, registra a transferência no histórico e publica ao
+        agente de destino o delta do turno. Retorna False se a transferência não saiu.
+        """
+        session_id = self.id.key
+        tool = self._delegate_tools[call.name]
+        try:
+            result = await self._tool_policy.run(
+                lambda: tool.run_json(arguments, ctx.cancellation_token), name=f"delegate:{call.name}",
+                deadline=deadline,
+            )
+            topic_type = tool.return_value_as_string(result)
+        except Exception as e:
+            print(f"Erro ao delegar para ferramenta {call.name}: {e}")
+            return False
+
+        self._store.append(session_id, self.transfer_entries(call, topic_type))
+        offset, entries = self._store.delta(session_id, turn_start)
+        task = UserTask(session_id=session_id, offset=offset, entries=entries)
+        try:
+            with span("agent.delegate", session_id, agent=self.id.type, target=topic_type):
+                await self._publish_policy.run(
+                    lambda: self.publish_message(task, topic_id=TopicId(topic_type, source=session_id)),
+                    name=f"publish:{topic_type}", deadline=deadline,
+                )
+        except Exception as e:
+            print(f"Erro ao delegar para {topic_type}: {e}")
+            return False
+        delegations.inc(self.id.type, topic_type)
+        print(f"Delegando para {topic_type}")
+        return True
+
+    def transfer_entries(self, call: FunctionCall, topic_type: str) -> List[LLMMessage]:
+        """Mensagens que registram no histórico a transferência para outro agente."""
+        return [
+            AssistantMessage(content=[call], source=self.id.type),
+            FunctionExecutionResultMessage(
+                content=[
+                    FunctionExecutionResult(
+                        call_id=call.id,
+                        content=f"Transferred to {topic_type}. Adopt persona immediately."
+                    )
+                ]
+            ),
+        ]
+
+    async def route_directly(self, route: Route, turn_start: int, ctx: MessageContext) -> bool:
+        """
+        Faz a transferência decidida pelo pré-roteador sem chamar o modelo: registra a chamada
+        da ferramenta de delegação no histórico (como se o modelo a tivesse feito) e publica a
+        tarefa para o agente de destino. Retorna False se falhar, para o turno seguir pelo LLM.
+        """
+        session_id = self.id.key
+        tool = self._delegate_tools[route.tool_name]
+        call = FunctionCall(id=f"call_{uuid.uuid4().hex[:24]}", name=route.tool_name, arguments="{}")
+        try:
+            topic_type = tool.return_value_as_string(await tool.run_json({}, ctx.cancellation_token))
+        except Exception as e:
+            print(f"Erro no pré-roteamento para {route.tool_name}: {e}")
+            return False
+        self._store.append(session_id, self.transfer_entries(call, topic_type))
+        offset, entries = self._store.delta(session_id, turn_start)
+        with span("agent.delegate", session_id, agent=self.id.type, target=topic_type, pre_routed=True):
+            await self.publish_message(
+                UserTask(session_id=session_id, offset=offset, entries=entries),
+                topic_id=TopicId(topic_type, source=session_id),
+            )
+        delegations.inc(self.id.type, topic_type)
+        print(f"{'-' * 80}\n{self.id.type}: pré-roteado para {topic_type} ({route})", flush=True)
+        return True
+
+    async def stream_model_call(self, messages: List[LLMMessage], tools: list,
+                                ctx: MessageContext) -> Tuple[str, CreateResult]:
+        """
+        Chama o modelo com `create_stream`, enviando cada trecho de texto ao WebSocket como um
+        frame `delta` do stream. Retorna o id do stream e o resultado completo. Se a chamada
+        falhar ou terminar em chamadas de ferramenta depois de já ter enviado texto, envia um
+        frame `discard` para o cliente descartar o texto parcial.
+        """
+        stream_id = uuid.uuid4().hex
+        kwargs = {}
+        # Clientes da OpenAI/Azure (com `_client`) ou o agendador, que repassa o argumento só a eles.
+        # O teste evita importar o autogen_ext.models.openai (e o SDK da OpenAI) neste módulo.
+        if hasattr(self._model_client, "_client") or isinstance(self._model_client, ScheduledChatCompletionClient):
+            # O Azure envia chunks vazios no início do stream
+            kwargs["max_consecutive_empty_chunk_tolerance"] = 10
+        result: Optional[CreateResult] = None
+        streamed = False
+        try:
+            async for chunk in self._model_client.create_stream(
+                    messages=messages,
+                    tools=tools,
+                    extra_create_args={"stream_options": {"include_usage": True}},
+                    cancellation_token=ctx.cancellation_token,
+                    **kwargs,
+            ):
+                if isinstance(chunk, CreateResult):
+                    result = chunk
+                elif chunk:
+                    streamed = True
+                    await self.send_to_session(chunk, stream_id=stream_id, event="delta")
+            if result is None:
+                raise RuntimeError("O stream do modelo terminou sem resultado final")
+        except BaseException:
+            if streamed:
+                await self.send_to_session(None, stream_id=stream_id, event="discard")
+            raise
+        if streamed and not isinstance(result.content, str):
+            await self.send_to_session(None, stream_id=stream_id, event="discard")
+        return stream_id, result
+
+    def sender(self) -> Dict[str, str]:
+        """Identificação do agente nos frames enviados ao cliente."""
+        return {"type": "server", "name": self.nome, "image": self.avatar}
+
+    async def send_to_session(self, content: Optional[str], stream_id: Optional[str] = None,
+                              event: Optional[str] = None) -> None:
+        """
+        Envia a resposta do agente ao WebSocket da sessão atual (chave do agente).
+        No modo console não há registro de sessões e nada é enviado.
+
+        Com streaming, os frames levam `stream_id` e `event` (`delta` com um trecho do texto,
+        `discard` para descartar o texto parcial); a resposta completa chega no frame final,
+        sem `event` e com o mesmo `stream_id`, que substitui os trechos recebidos.
+        """
+        if self._sessions is None:
+            return
+        response = {
+            "sender": self.sender(),
+            "content": content
+        }
+        if stream_id is not None:
+            response["stream_id"] = stream_id
+        if event is not None:
+            response["event"] = event
+        if not await self._sessions.send(self.id.key, response):
+            print(f"Não foi possível enviar a resposta para a sessão {self.id.key}")
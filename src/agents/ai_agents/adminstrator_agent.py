@@ -6,7 +6,7 @@ from src.tools.custom_tools import buscar_assinaturas_ativas_tool, buscar_fatura
 from src.utils.topics import user_topic_type
 
 
-async def register_admin_agent(runtime, model_client, websocket):
+async def register_admin_agent(runtime, model_client, sessions):
     admin_agent_type = await AIAgent.register(
         runtime,
         type="admin_agent_type",  # Você pode criar esse novo tipo em `topics` ou substituir por outro preexistente.
@@ -34,7 +34,7 @@ async def register_admin_agent(runtime, model_client, websocket):
             delegate_tools=[],
             agent_topic_type="admin_agent_type",  # Substituir aqui, se necessário.
             user_topic_type=user_topic_type,
-            websocket=websocket,
+            sessions=sessions,
             nome="Carlos - Setor Administrativo",
             avatar="https://img.freepik.com/fotos-premium/avatar-masculino-desenho-animado-de-pessoa-em-3d-suporte-ao-cliente_839035-194109.jpg?w=200"
         ),
@@ -6,7 +6,7 @@ from src.tools.custom_tools import cadastrar_cliente_tool, cadastrar_assinatura_
 from src.utils.topics import user_topic_type
 
 
-async def register_cadastro_agent(runtime, model_client, websocket):
+async def register_cadastro_agent(runtime, model_client, sessions):
     cadastro_agent_type = await AIAgent.register(
         runtime,
         type="cadastro_agent_type",  # Você pode criar esse novo tipo em `topics` ou substituir conforme necessário.
@@ -35,7 +35,7 @@ async def register_cadastro_agent(runtime, model_client, websocket):
             delegate_tools=[],
             agent_topic_type="cadastro_agent_type",  # Substituir aqui, se necessário.
             user_topic_type=user_topic_type,
-            websocket=websocket,
+            sessions=sessions,
             nome="Mariana - Setor de Cadastro",
             avatar="https://img.freepik.com/fotos-premium/avatar-feminino-desenho-animado-de-pessoa-em-3d-servico-ao-cliente_839035-194111.jpg?w=200"
         ),
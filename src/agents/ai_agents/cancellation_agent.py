@@ -7,7 +7,7 @@ from src.tools.delegate_tools import transfer_back_to_triage_tool
 from src.utils.topics import cancellation_agent_topic_type, user_topic_type
 
 
-async def register_cancellation_agent(runtime, model_client, websocket):
+async def register_cancellation_agent(runtime, model_client, sessions):
     cancellation_agent_type = await AIAgent.register(
         runtime,
         type=cancellation_agent_topic_type,  # Topic type como agent type.
@@ -51,7 +51,7 @@ async def register_cancellation_agent(runtime, model_client, websocket):
             delegate_tools=[transfer_back_to_triage_tool],
             agent_topic_type=cancellation_agent_topic_type,
             user_topic_type=user_topic_type,
-            websocket = websocket,
+            sessions = sessions,
             nome = "Vick - Setor de cancelamento VIVO",
             avatar = "https://img.freepik.com/fotos-gratis/retrato-de-mulher-de-negocios-sorridente-com-oculos-e-fones-de-ouvido-em-fundo-cinzento_1142-54747.jpg"
         ),
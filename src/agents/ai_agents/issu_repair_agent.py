@@ -2,12 +2,12 @@ from autogen_core import TypeSubscription
 from autogen_core.models import SystemMessage
 
 from src.agents.ai_agent import AIAgent
-from src.tools.custom_tools import search_tool, protocolo_tool, create_template, send_email_tool
+from src.tools.custom_tools import search_tool, protocolo_tool, create_template, send_email_tool, status_email_tool
 from src.tools.delegate_tools import transfer_back_to_triage_tool
 from src.utils.topics import issues_and_repairs_agent_topic_type, user_topic_type
 
 
-async def register_issues_and_repairs_agent(runtime, model_client, websocket):
+async def register_issues_and_repairs_agent(runtime, model_client, sessions):
     # Register the issues and repairs agent.
     issues_and_repairs_agent_type = await AIAgent.register(
         runtime,
@@ -31,12 +31,12 @@ async def register_issues_and_repairs_agent(runtime, model_client, websocket):
             ),
             model_client=model_client,
             tools=[
-                search_tool, protocolo_tool, create_template, send_email_tool
+                search_tool, protocolo_tool, create_template, send_email_tool, status_email_tool
             ],
             delegate_tools=[transfer_back_to_triage_tool],
             agent_topic_type=issues_and_repairs_agent_topic_type,
             user_topic_type=user_topic_type,
-            websocket = websocket,
+            sessions = sessions,
             nome = "Andre - Suporte tecnico VIVO",
             avatar = "https://png.pngtree.com/png-vector/20231014/ourlarge/pngtree-3d-customer-service-operator-png-illustration-png-image_10160272.png"
         ),
@@ -13,7 +13,7 @@ from src.tools.custom_tools import (
 from src.tools.delegate_tools import transfer_back_to_triage_tool
 from src.utils.topics import sales_agent_topic_type, user_topic_type
 
-async def register_sales_agent(runtime, model_client, websocket):
+async def register_sales_agent(runtime, model_client, sessions):
     sales_agent_type = await AIAgent.register(
         runtime,
         type=sales_agent_topic_type,  # Topic type como agent type.
@@ -74,7 +74,7 @@ async def register_sales_agent(runtime, model_client, websocket):
             delegate_tools=[transfer_back_to_triage_tool],
             agent_topic_type=sales_agent_topic_type,
             user_topic_type=user_topic_type,
-            websocket = websocket,
+            sessions = sessions,
             nome = "Cinthia - Setor de vendas VIVO",
             avatar = "https://img.freepik.com/fotos-premium/servico-ao-cliente-feminino-retrato-de-avatar-de-desenho-animado-em-3d_839035-194103.jpg?w=360"
         ),
@@ -2,6 +2,8 @@ from autogen_core import TypeSubscription
 from autogen_core.models import SystemMessage
 
 from src.agents.ai_agent import AIAgent
+from src.agents.pre_router import create_triage_router_from_env
+from src.agents.response_cache import create_response_cache_from_env
 from src.utils.topics import triage_agent_topic_type, user_topic_type
 from src.tools.delegate_tools import (
     transfer_to_cancellation_agent_tool,
@@ -11,7 +13,11 @@ from src.tools.delegate_tools import (
 )
 
 
-async def register_triage_agent(runtime, model_client, websocket):
+async def register_triage_agent(runtime, model_client, sessions):
+    # Cache opcional (TRIAGE_RESPONSE_CACHE=1) para saudações e transferências repetidas
+    response_cache = create_response_cache_from_env("TRIAGE")
+    # Pré-roteador opcional (TRIAGE_PRE_ROUTER=keyword) para transferências óbvias, sem chamar o modelo
+    pre_router = create_triage_router_from_env()
     triage_agent_type = await AIAgent.register(
         runtime,
         type=triage_agent_topic_type,  # Topic type como agent type.
@@ -39,7 +45,10 @@ async def register_triage_agent(runtime, model_client, websocket):
             ],
             agent_topic_type=triage_agent_topic_type,
             user_topic_type=user_topic_type,
-            websocket = websocket,
+            sessions = sessions,
+            context_token_budget=2000,  # A triagem só precisa do início da conversa
+            response_cache=response_cache,
+            pre_router=pre_router,
             nome = "VIVO",
             avatar= "https://encrypted-tbn0.gstatic.com/images?q=tbn:ANd9GcQa9LTRwY9js7KvxKd-lHD-LtWBKMD06O3BAziiHu7MkkE11eLTJZ2LZzXx4Fff2Khs1es&usqp=CAU"
         ),
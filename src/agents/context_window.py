@@ -0,0 +1,148 @@
+from collections import OrderedDict
+from typing import Any, Hashable, List, Optional, Sequence
+
+from autogen_core.models import (
+    AssistantMessage,
+    FunctionExecutionResultMessage,
+    LLMMessage,
+    SystemMessage,
+    UserMessage,
+)
+
+# Tokens extras por mensagem (papel, separadores) no formato de chat da OpenAI
+MESSAGE_OVERHEAD = 4
+
+
+class TokenCounter:
+    """
+    Conta tokens por mensagem com cache LRU. Usa o tiktoken quando instalado e,
+    na falta dele, a estimativa de ~4 caracteres por token.
+    """
+
+    def __init__(self, encoding: str = "o200k_base", max_entries: int = 8192) -> None:
+        self._encoding_name = encoding
+        self._encoding: Any = None
+        self._max_entries = max_entries
+        self._cache: "OrderedDict[Hashable, int]" = OrderedDict()
+
+    def _count_text(self, text: str) -> int:
+        if self._encoding is None:
+            try:
+                import tiktoken
+
+                self._encoding = tiktoken.get_encoding(self._encoding_name)
+            except Exception:
+                self._encoding = False
+        if self._encoding:
+            return len(self._encoding.encode(text))
+        return len(text) // 4 + 1
+
+    @staticmethod
+    def _key(message: LLMMessage) -> Hashable:
+        # O hash de uma str é calculado uma única vez e fica guardado no objeto,
+        # então montar a chave de mensagens já vistas é barato.
+        content = message.content
+        if isinstance(message, FunctionExecutionResultMessage):
+            content = tuple((result.call_id, result.content) for result in message.content)
+        elif isinstance(content, list):
+            content = tuple(
+                (item.id, item.name, item.arguments) if hasattr(item, "arguments") else repr(item) for item in content
+            )
+        return type(message).__name__, getattr(message, "source", None), content
+
+    def count(self, message: LLMMessage) -> int:
+        key = self._key(message)
+        tokens = self._cache.get(key)
+        if tokens is not None:
+            self._cache.move_to_end(key)
+            return tokens
+        text = "".join(str(part) for part in (key[2] if isinstance(key[2], tuple) else (key[2],)))
+        tokens = self._count_text(text) + MESSAGE_OVERHEAD
+        self._cache[key] = tokens
+        while len(self._cache) > self._max_entries:
+            self._cache.popitem(last=False)
+        return tokens
+
+
+# Contador compartilhado por todos os agentes do processo
+token_counter = TokenCounter()
+
+
+def _group_turns(messages: Sequence[LLMMessage]) -> List[List[int]]:
+    """
+    Agrupa os índices das mensagens em unidades que só podem ser removidas juntas:
+    uma AssistantMessage com chamadas de ferramenta e os FunctionExecutionResultMessage seguintes.
+    """
+    units: List[List[int]] = []
+    for index, message in enumerate(messages):
+        if isinstance(message, FunctionExecutionResultMessage) and units:
+            units[-1].append(index)
+        else:
+            units.append([index])
+    return units
+
+
+class ContextWindow:
+    """
+    Mantém o histórico enviado ao modelo dentro de um orçamento de tokens (sem contar o
+    system prompt e as ferramentas).
+
+    Quando o histórico excede `token_budget`, as unidades mais antigas são removidas até
+    sobrar `trim_to` do orçamento, e um resumo extrativo das falas removidas do usuário
+    entra no lugar. O ponto de corte só avança, e em saltos, para o início do prompt não
+    mudar a cada turno. A última mensagem do usuário e o que vem depois dela são sempre mantidos.
+    """
+
+    def __init__(self, token_budget: int, trim_to: float = 0.75, summary_chars: int = 600,
+                 counter: Optional[TokenCounter] = None) -> None:
+        self._token_budget = token_budget
+        self._trim_to = trim_to
+        self._summary_chars = summary_chars
+        self._counter = counter or token_counter
+        self._cut = 0
+        self._summary: Optional[SystemMessage] = None
+
+    def fit(self, messages: Sequence[LLMMessage]) -> List[LLMMessage]:
+        if self._cut > len(messages):
+            # Outro histórico (nova conversa): recomeça sem corte
+            self._cut, self._summary = 0, None
+
+        counts = [self._counter.count(message) for message in messages]
+        summary_tokens = self._counter.count(self._summary) if self._summary is not None else 0
+        if sum(counts[self._cut:]) + summary_tokens > self._token_budget:
+            self._advance_cut(messages, counts)
+
+        # Snapshots e listas já devolvem uma lista nova ao fatiar
+        kept = messages[self._cut:]
+        if not isinstance(kept, list):
+            kept = list(kept)
+        return [self._summary] + kept if self._summary is not None else kept
+
+    def _advance_cut(self, messages: Sequence[LLMMessage], counts: List[int]) -> None:
+        last_user = max(
+            (i for i, message in enumerate(messages) if isinstance(message, UserMessage)), default=len(messages)
+        )
+        # Reserva espaço para o resumo que substitui as mensagens removidas
+        target = int(self._token_budget * self._trim_to) - self._summary_chars // 4
+        total = sum(counts[self._cut:])
+        cut = self._cut
+        for unit in _group_turns(messages):
+            if unit[0] < self._cut:
+                continue
+            if total <= target or unit[-1] >= last_user:
+                break
+            total -= sum(counts[i] for i in unit)
+            cut = unit[-1] + 1
+        if cut != self._cut:
+            self._cut = cut
+            self._summary = self._summarize(messages[:cut])
+
+    def _summarize(self, dropped: Sequence[LLMMessage]) -> SystemMessage:
+        user_lines = [m.content for m in dropped if isinstance(m, UserMessage) and isinstance(m.content, str)]
+        assistant_lines = [m.content for m in dropped if isinstance(m, AssistantMessage) and isinstance(m.content, str)]
+        summary = " | ".join(line.strip().replace("\n", " ")[:120] for line in user_lines)
+        summary = summary[-self._summary_chars:]
+        return SystemMessage(
+            content=f"Resumo da conversa anterior ({len(dropped)} mensagens omitidas, "
+                    f"{len(assistant_lines)} respostas do atendimento). Falas do cliente: {summary}"
+        )
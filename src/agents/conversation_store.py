@@ -0,0 +1,117 @@
+from collections.abc import Sequence
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+from autogen_core import AgentId, BaseAgent
+from autogen_core.models import LLMMessage
+
+from src.agents.responses import HistoryEntries, HistoryRequest
+
+
+class ConversationGap(Exception):
+    """O delta recebido começa depois do fim do log local (faltam entradas intermediárias)."""
+
+
+class ConversationSnapshot(Sequence):
+    """
+    Visão somente leitura das primeiras `length` entradas de um log. Como o log só recebe
+    novas entradas no final, a visão continua válida sem copiar a lista.
+    """
+
+    __slots__ = ("_entries", "_length")
+
+    def __init__(self, entries: List[LLMMessage], length: int) -> None:
+        self._entries = entries
+        self._length = length
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[LLMMessage, List[LLMMessage]]:
+        if isinstance(index, slice):
+            # Copia só o trecho pedido, sem materializar o prefixo do log
+            positions = range(*index.indices(self._length))
+            if positions.step == 1:
+                return self._entries[positions.start:positions.stop]
+            return [self._entries[position] for position in positions]
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("índice fora do snapshot")
+        return self._entries[index]
+
+    def __iter__(self) -> Iterator[LLMMessage]:
+        for index in range(self._length):
+            yield self._entries[index]
+
+
+class ConversationStore:
+    """
+    Histórico das conversas, um log append-only por sessão (o `TopicId.source`).
+
+    As mensagens trocadas entre os agentes levam apenas o id da sessão, o offset e as
+    entradas novas. Quem recebe chama `merge`: com o store compartilhado no processo as
+    entradas já estão no log e nada é copiado; com um store próprio (outro processo)
+    elas são acrescentadas. Se o log local não tiver as entradas anteriores ao delta (agente
+    em outro processo), `merge_delta` pede ao remetente só o trecho que falta.
+    """
+
+    def __init__(self) -> None:
+        self._logs: Dict[str, List[LLMMessage]] = {}
+
+    def append(self, session_id: str, entries: List[LLMMessage]) -> int:
+        """Acrescenta entradas ao log da sessão e retorna o offset da primeira delas."""
+        log = self._logs.setdefault(session_id, [])
+        offset = len(log)
+        log.extend(entries)
+        return offset
+
+    def merge(self, session_id: str, offset: int, entries: List[LLMMessage]) -> None:
+        """Aplica um delta recebido; entradas que o log já contém são ignoradas."""
+        log = self._logs.setdefault(session_id, [])
+        if offset > len(log):
+            raise ConversationGap(
+                f"Sessão {session_id}: delta começa em {offset}, mas o log tem {len(log)} entradas"
+            )
+        log.extend(entries[len(log) - offset:])
+
+    def delta(self, session_id: str, offset: int) -> Tuple[int, List[LLMMessage]]:
+        """Offset e entradas a enviar ao próximo agente: as entradas a partir de `offset`."""
+        log = self._logs.setdefault(session_id, [])
+        return offset, log[offset:]
+
+    def snapshot(self, session_id: str) -> ConversationSnapshot:
+        log = self._logs.setdefault(session_id, [])
+        return ConversationSnapshot(log, len(log))
+
+    def drop(self, session_id: str) -> None:
+        """Descarta o histórico de uma sessão encerrada."""
+        self._logs.pop(session_id, None)
+
+
+async def merge_delta(agent: BaseAgent, store: ConversationStore, session_id: str, offset: int,
+                      entries: List[LLMMessage], sender: Optional[AgentId]) -> None:
+    """
+    Aplica um delta recebido por `agent`. Com lacuna, pede ao remetente (que tem o log
+    contínuo até o delta) as entradas que faltam e aplica as duas partes; sem remetente
+    conhecido, a ConversationGap é propagada.
+    """
+    try:
+        store.merge(session_id, offset, entries)
+    except ConversationGap:
+        if sender is None:
+            raise
+        missing = await agent.send_message(
+            HistoryRequest(session_id=session_id, offset=len(store.snapshot(session_id))), sender
+        )
+        store.merge(session_id, missing.offset, missing.entries)
+        store.merge(session_id, offset, entries)
+
+
+def history_entries(store: ConversationStore, message: HistoryRequest) -> HistoryEntries:
+    """Resposta a um HistoryRequest: as entradas do log da sessão a partir do offset pedido."""
+    offset, entries = store.delta(message.session_id, message.offset)
+    return HistoryEntries(offset=offset, entries=entries)
+
+
+# Store compartilhado pelos agentes do processo
+conversation_store = ConversationStore()
@@ -4,7 +4,7 @@ from src.agents.human_agent import HumanAgent
 from src.utils.topics import human_agent_topic_type, user_topic_type
 
 
-async def register_human_agent(runtime):
+async def register_human_agent(runtime, operator_queue=None):
     human_agent_type = await HumanAgent.register(
         runtime,
         type=human_agent_topic_type,  # Topic type como agent type.
@@ -12,6 +12,7 @@ async def register_human_agent(runtime):
             description="A human agent.",
             agent_topic_type=human_agent_topic_type,
             user_topic_type=user_topic_type,
+            operator_queue=operator_queue,
         ),
     )
     await runtime.add_subscription(
@@ -1,21 +1,59 @@
+import asyncio
+from typing import Dict, Optional
+
 from autogen_core import RoutedAgent, message_handler, MessageContext, TopicId
 from autogen_core.models import AssistantMessage
 
-from src.agents.responses import UserTask, AgentResponse
+from src.agents.conversation_store import ConversationStore, conversation_store, history_entries, merge_delta
+from src.agents.operator_queue import OperatorQueue
+from src.agents.responses import UserTask, AgentResponse, HistoryEntries, HistoryRequest, OperatorAnswer
+from src.common.session_registry import session_agents
+
+# Avatar dos operadores nos frames enviados ao cliente
+OPERATOR_AVATAR = "https://png.pngtree.com/png-vector/20231014/ourlarge/pngtree-3d-customer-service-operator-png-illustration-png-image_10160272.png"
 
 
 class HumanAgent(RoutedAgent):
-    def __init__(self, description: str, agent_topic_type: str, user_topic_type: str) -> None:
+    def __init__(self, description: str, agent_topic_type: str, user_topic_type: str,
+                 operator_queue: Optional[OperatorQueue] = None, store: Optional[ConversationStore] = None) -> None:
         super().__init__(description)
+        session_agents.add(self.id)
         self._agent_topic_type = agent_topic_type
         self._user_topic_type = user_topic_type
+        self._operator_queue = operator_queue
+        self._store = store if store is not None else conversation_store
 
     @message_handler
     async def handle_user_task(self, message: UserTask, ctx: MessageContext) -> None:
-        human_input = input("Human agent input: ")
+        await merge_delta(self, self._store, self.id.key, message.offset, message.entries, ctx.sender)
+        if self._operator_queue is None:
+            # Modo console: lê a resposta do terminal sem bloquear o event loop
+            human_input = await asyncio.to_thread(input, "Human agent input: ")
+            await self._reply(human_input)
+            return
+
+        # Enfileira para um operador e retorna; a resposta chega depois como OperatorAnswer
+        self._operator_queue.submit(self.id.key, self._store.snapshot(self.id.key))
+        print(f"{'-'*80}\n{self.id.type}: sessão {self.id.key} aguardando operador", flush=True)
+
+    @message_handler
+    async def handle_operator_answer(self, message: OperatorAnswer, ctx: MessageContext) -> None:
+        # O HumanAgent não tem o WebSocket: o agente do usuário entrega a resposta em nome do operador
+        await self._reply(message.content, sender={"type": "server", "name": message.operator, "image": OPERATOR_AVATAR})
+
+    @message_handler
+    async def handle_history_request(self, message: HistoryRequest, ctx: MessageContext) -> HistoryEntries:
+        # Agente de outro processo que recebeu deste um delta com lacuna
+        return history_entries(self._store, message)
+
+    async def _reply(self, human_input: str, sender: Optional[Dict[str, str]] = None) -> None:
         print(f"{'-'*80}\n{self.id.type}:\n{human_input}", flush=True)
-        message.context.append(AssistantMessage(content=human_input, source=self.id.type))
+        offset = self._store.append(self.id.key, [AssistantMessage(content=human_input, source=self.id.type)])
+        offset, entries = self._store.delta(self.id.key, offset)
         await self.publish_message(
-            AgentResponse(context=message.context, reply_to_topic_type=self._agent_topic_type),
+            AgentResponse(
+                session_id=self.id.key, offset=offset, entries=entries, reply_to_topic_type=self._agent_topic_type,
+                sender=sender,
+            ),
             topic_id=TopicId(self._user_topic_type, source=self.id.key),
-        )
\ No newline at end of file
+        )
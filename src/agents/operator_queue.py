@@ -0,0 +1,89 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from autogen_core import TopicId
+from autogen_core.models import UserMessage
+
+from src.agents.responses import OperatorAnswer
+from src.utils.topics import human_agent_topic_type
+
+
+class Escalation:
+    def __init__(self, session_id: str, preview: str) -> None:
+        self.session_id = session_id
+        self.preview = preview
+        self.created_at = time.time()
+        self.claimed_by: Optional[str] = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "session_id": self.session_id,
+            "preview": self.preview,
+            "waiting_seconds": round(time.time() - self.created_at, 1),
+            "claimed_by": self.claimed_by,
+        }
+
+
+class OperatorQueue:
+    """
+    Fila de atendimentos escalados para operadores humanos.
+
+    O HumanAgent apenas registra a escalação e retorna, sem bloquear o runtime. Um operador
+    reivindica a sessão (`claim`) e responde (`answer`); a resposta é publicada como
+    `OperatorAnswer` no tópico do HumanAgent da sessão, que a devolve à conversa.
+    """
+
+    def __init__(self) -> None:
+        self._pending: "OrderedDict[str, Escalation]" = OrderedDict()
+        self._runtime: Any = None
+        self._listeners: List[Callable[[Dict[str, Any]], Any]] = []
+
+    def bind(self, runtime: Any) -> None:
+        self._runtime = runtime
+
+    def subscribe(self, listener: Callable[[Dict[str, Any]], Any]) -> None:
+        """Registra um callback (ex.: o WebSocket de um operador) notificado a cada nova escalação."""
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener: Callable[[Dict[str, Any]], Any]) -> None:
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def submit(self, session_id: str, context: Sequence[Any]) -> Escalation:
+        last_user_message = next(
+            (m.content for m in reversed(context) if isinstance(m, UserMessage) and isinstance(m.content, str)), ""
+        )
+        escalation = Escalation(session_id, last_user_message[:200])
+        self._pending[session_id] = escalation
+        event = {"type": "escalation", **escalation.as_dict()}
+        for listener in list(self._listeners):
+            result = listener(event)
+            if asyncio.iscoroutine(result):
+                asyncio.ensure_future(result)
+        return escalation
+
+    def pending(self) -> List[Dict[str, Any]]:
+        return [escalation.as_dict() for escalation in self._pending.values()]
+
+    def claim(self, session_id: str, operator: str) -> Escalation:
+        escalation = self._pending.get(session_id)
+        if escalation is None:
+            raise KeyError(f"Nenhuma escalação pendente para a sessão {session_id}")
+        if escalation.claimed_by not in (None, operator):
+            raise ValueError(f"Sessão {session_id} já está com o operador {escalation.claimed_by}")
+        escalation.claimed_by = operator
+        return escalation
+
+    async def answer(self, session_id: str, operator: str, content: str) -> None:
+        self.claim(session_id, operator)
+        del self._pending[session_id]
+        await self._runtime.publish_message(
+            OperatorAnswer(operator=operator, content=content),
+            topic_id=TopicId(human_agent_topic_type, source=session_id),
+        )
+
+    def cancel(self, session_id: str) -> None:
+        """Remove a escalação de uma sessão encerrada antes de ser atendida."""
+        self._pending.pop(session_id, None)
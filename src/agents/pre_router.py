@@ -0,0 +1,211 @@
+import os
+import re
+import time
+import unicodedata
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Sequence
+
+from autogen_core.models import LLMMessage, UserMessage
+
+from src.common.metrics import registry
+
+# Palavras que, logo antes de um termo, invertem a intenção ("não quero cancelar")
+NEGATION = re.compile(r"\b(nao|nem|nunca|sem)\s+(\w+\s+){0,2}$")
+
+
+def normalize_text(text: str) -> str:
+    """Remove acentos, pontuação e caixa, mantendo a ordem e todas as palavras."""
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(char for char in text if not unicodedata.combining(char)).lower()
+    return " ".join(re.split(r"[^a-z0-9]+", text)).strip()
+
+
+class Route:
+    def __init__(self, tool_name: str, confidence: float, matched: List[str]) -> None:
+        self.tool_name = tool_name
+        self.confidence = confidence
+        self.matched = matched
+
+    def __repr__(self) -> str:
+        return f"Route({self.tool_name!r}, confidence={self.confidence:.2f}, matched={self.matched!r})"
+
+
+class Rule:
+    """
+    Padrões (regex sobre o texto normalizado) que indicam uma ferramenta de transferência.
+    Com `negatable`, uma ocorrência precedida de negação ("não", "nem", "sem") é ignorada.
+    """
+
+    def __init__(self, tool_name: str, patterns: Sequence[str], weight: float = 1.0, negatable: bool = True) -> None:
+        self.tool_name = tool_name
+        self.patterns = [re.compile(pattern) for pattern in patterns]
+        self.weight = weight
+        self.negatable = negatable
+
+    def matches(self, text: str) -> List[re.Match]:
+        """Primeira ocorrência não negada de cada padrão."""
+        found = []
+        for pattern in self.patterns:
+            for match in pattern.finditer(text):
+                if self.negatable and NEGATION.search(text[:match.start()]):
+                    continue
+                found.append(match)
+                break
+        return found
+
+
+class PreRouter(ABC):
+    """
+    Etapa anterior ao modelo no AIAgent: decide a transferência a partir da última fala do
+    usuário. Retorna None quando não tem confiança suficiente, e o agente segue para o LLM.
+    Subclasses implementam `decide`.
+    """
+
+    def __init__(self) -> None:
+        self.routed: Dict[str, int] = {}
+        self.fallbacks = 0
+        self.decision_seconds = 0.0
+
+    @abstractmethod
+    def decide(self, text: str) -> Optional[Route]:
+        ...
+
+    def route(self, messages: Sequence[LLMMessage]) -> Optional[Route]:
+        if not messages or not isinstance(messages[-1], UserMessage) or not isinstance(messages[-1].content, str):
+            return None
+        started = time.perf_counter()
+        route = self.decide(messages[-1].content)
+        self.decision_seconds += time.perf_counter() - started
+        if route is None:
+            self.fallbacks += 1
+        else:
+            self.routed[route.tool_name] = self.routed.get(route.tool_name, 0) + 1
+        return route
+
+    def stats(self) -> Dict[str, object]:
+        decisions = self.fallbacks + sum(self.routed.values())
+        return {
+            "decisions": decisions,
+            "routed": dict(self.routed),
+            "fallbacks": self.fallbacks,
+            "avg_decision_us": round(self.decision_seconds / decisions * 1e6, 1) if decisions else 0.0,
+        }
+
+
+class KeywordRouter(PreRouter):
+    """
+    Roteador por palavras-chave: soma o peso das regras encontradas por ferramenta e só decide
+    quando a melhor ferramenta tem evidência suficiente e domina a fala:
+
+    - a pontuação dela atinge `min_score` (uma frase forte, como "cancelar meu plano", ou
+      duas palavras fracas; uma palavra solta como "problema" ou "atendente" vai para o LLM);
+    - ela concentra pelo menos `min_confidence` da pontuação (uma fala com duas intenções,
+      como "cancelar a TV e contratar internet", vai para o LLM).
+
+    Falas longas também vão para o LLM.
+    """
+
+    def __init__(self, rules: Sequence[Rule], min_confidence: float = 0.75, min_score: float = 2.0,
+                 max_chars: int = 240) -> None:
+        super().__init__()
+        self._rules = list(rules)
+        self._min_confidence = min_confidence
+        self._min_score = min_score
+        self._max_chars = max_chars
+
+    def decide(self, text: str) -> Optional[Route]:
+        if len(text) > self._max_chars:
+            return None
+        normalized = normalize_text(text)
+        scores: Dict[str, float] = {}
+        matched: Dict[str, List[re.Match]] = {}
+        for rule in self._rules:
+            previous = matched.setdefault(rule.tool_name, [])
+            # Um trecho já contado para a ferramenta (ex.: "caiu" dentro de "internet caiu") não soma de novo
+            found = [match for match in rule.matches(normalized)
+                     if not any(match.start() >= other.start() and match.end() <= other.end() for other in previous)]
+            if found:
+                scores[rule.tool_name] = scores.get(rule.tool_name, 0.0) + rule.weight * len(found)
+                previous.extend(found)
+        if not scores:
+            return None
+        tool_name = max(scores, key=scores.get)
+        confidence = scores[tool_name] / sum(scores.values())
+        if scores[tool_name] < self._min_score or confidence < self._min_confidence:
+            return None
+        return Route(tool_name, confidence, [match.group(0) for match in matched[tool_name]])
+
+
+# Peso das frases que sozinhas bastam para decidir (`min_score` padrão) e das palavras fracas,
+# que só decidem em conjunto
+STRONG = 2.0
+WEAK = 1.0
+
+# Regras da triagem; os nomes são os das ferramentas em `src/tools/delegate_tools.py`
+TRIAGE_RULES = [
+    Rule("transfer_cancellation_agent", [
+        r"\bcancel(ar|o|amento|a)( (o|a|da|do|meu|minha))? (plano|linha|contrato|assinatura|servico|conta|internet|fibra|tv)\b",
+        r"\b(encerrar|desativar|rescindir)\b.*\b(plano|linha|contrato|assinatura|servico|conta)\b",
+        r"\bportabilidade\b",
+        r"\bdesistir d[oa] (plano|linha|contrato|assinatura|servico)\b",
+    ], weight=STRONG),
+    Rule("transfer_cancellation_agent", [
+        r"\bcancel(ar|o|amento|e|a)\b",
+        r"\bdesistir\b",
+    ], weight=WEAK),
+    Rule("transfer_to_issues_and_repairs", [
+        r"\bsem (internet|sinal|conexao|linha|servico)\b",
+        r"\bnao (esta |ta )?(funciona|funcionando|conecta|conectando|liga|ligando|pega|carrega)\b",
+        r"\b(internet|sinal|conexao|wi ?fi|rede|linha|tv) ((esta|ta) )?(muito )?(caiu|caindo|lent[ao]|oscilando|travando|instavel)\b",
+        r"\b(com defeito|(preciso de|chamar) (um )?(tecnico|reparo|conserto))\b",
+        r"\b(cobranca indevida|cobrado (a mais|errado|indevidamente))\b",
+    ], weight=STRONG),
+    Rule("transfer_to_issues_and_repairs", [
+        r"\b(caiu|caindo|lent[ao]|oscilando|travando|instavel)\b",
+        r"\b(defeito|problema|reparo|conserto|consertar|tecnico|quebrad[oa])\b",
+        r"\b(reembolso|estorno)\b",
+    ], weight=WEAK),
+    Rule("transfer_to_sales_agent", [
+        r"\b(contratar|comprar|assinar|adquirir)( (o|a|um|uma))? (plano|internet|fibra|linha|pacote|tv|chip)\b",
+        r"\b(novo|outro|melhor) plano\b|\bplano (novo|melhor|maior)\b",
+        r"\b(quais|que) (sao os )?planos\b",
+        r"\bplanos? (disponive(l|is)|de internet|de fibra|pos pago|controle)\b",
+        r"\b(fazer (um )?upgrade|(ver|tem|quais) (as |alguma |algumas )?(ofertas?|promocao|promocoes))\b",
+    ], weight=STRONG),
+    Rule("transfer_to_sales_agent", [
+        r"\b(contratar|comprar|assinar|adquirir)\b",
+        r"\b(upgrade|ofertas?|promocao|promocoes)\b",
+    ], weight=WEAK),
+    # O pedido explícito de atendimento humano pesa mais que as palavras fracas de outras intenções
+    Rule("escalate_to_human", [
+        r"\bfalar com (um |uma |o |a )?(atendente|humano|operador|pessoa|alguem)\b",
+        r"\b(quero|preciso de|chama|chamar) (um |uma |o |a )?(atendente|humano|operador)\b",
+        r"\bpessoa de verdade\b",
+        r"\b(me )?passa(r)? para (um |uma |o |a )?(atendente|humano|operador)\b",
+    ], weight=2 * STRONG),
+    Rule("escalate_to_human", [
+        r"\b(atendente|humano|operador)\b",
+    ], weight=WEAK),
+]
+
+
+def create_triage_router_from_env() -> Optional[PreRouter]:
+    """
+    Cria o pré-roteador da triagem se `TRIAGE_PRE_ROUTER=keyword` (limiares em
+    `TRIAGE_PRE_ROUTER_CONFIDENCE` e `TRIAGE_PRE_ROUTER_MIN_SCORE`).
+    """
+    if os.getenv("TRIAGE_PRE_ROUTER", "").lower() != "keyword":
+        return None
+    router = KeywordRouter(
+        TRIAGE_RULES,
+        min_confidence=float(os.getenv("TRIAGE_PRE_ROUTER_CONFIDENCE", "0.75")),
+        min_score=float(os.getenv("TRIAGE_PRE_ROUTER_MIN_SCORE", "2.0")),
+    )
+
+    def collect():
+        yield ("agent_pre_router_decisions", "counter", "Decisões do pré-roteador da triagem (fallback = LLM)",
+               [({"route": name}, count) for name, count in sorted(router.routed.items())]
+               + [({"route": "fallback"}, router.fallbacks)])
+
+    registry.register_collector("pre_router:triage", collect)
+    return router
@@ -0,0 +1,177 @@
+import math
+import os
+import time
+import uuid
+from collections import Counter, OrderedDict
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from autogen_core import FunctionCall
+from autogen_core.models import (
+    AssistantMessage,
+    CreateResult,
+    LLMMessage,
+    RequestUsage,
+    UserMessage,
+)
+
+from src.common.metrics import registry
+from src.tools.search import normalize_query
+
+
+# Negações (já normalizadas): uma fala só reaproveita a transferência de outra com as mesmas
+# negações, senão "não quero cancelar" herdaria a resposta de "quero cancelar"
+NEGATIONS = frozenset({"nao", "nem", "nunca", "jamais", "nada", "nenhum", "nenhuma", "ninguem", "sem"})
+
+
+def _negations(text: str) -> frozenset:
+    return NEGATIONS.intersection(text.split())
+
+
+def _trigrams(text: str) -> Counter:
+    padded = f"  {text} "
+    return Counter(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def _cosine(a: Counter, b: Counter) -> float:
+    if not a or not b:
+        return 0.0
+    dot = sum(count * b[gram] for gram, count in a.items() if gram in b)
+    return dot / (math.sqrt(sum(v * v for v in a.values())) * math.sqrt(sum(v * v for v in b.values())))
+
+
+class _Entry:
+    __slots__ = ("expires_at", "vector", "negations", "content", "similar_ok")
+
+    def __init__(self, expires_at: float, vector: Counter, negations: frozenset, content, similar_ok: bool) -> None:
+        self.expires_at = expires_at
+        self.vector = vector
+        self.negations = negations
+        self.content = content
+        self.similar_ok = similar_ok
+
+
+class ResponseCache:
+    """
+    Cache local de respostas do modelo para turnos curtos e repetitivos (ex.: abertura da triagem).
+
+    Só entram conversas com até `max_context_messages` mensagens de usuário/assistente em texto
+    (sem resultados de ferramentas). A chave é o tipo do agente, as mensagens anteriores
+    normalizadas e a última fala do usuário normalizada (sem acentos, caixa, stopwords e ordem).
+
+    - Respostas em texto só são reutilizadas com chave idêntica.
+    - Transferências (chamadas apenas a `delegate_tools`) também são reutilizadas quando a
+      última fala é parecida: mesmas negações e similaridade de cosseno entre trigramas
+      >= `threshold`.
+      As chamadas reutilizadas recebem novos ids.
+    - Chamadas a outras ferramentas nunca são cacheadas.
+    """
+
+    def __init__(self, max_entries: int = 512, ttl: float = 3600.0, threshold: float = 0.85,
+                 max_context_messages: int = 3) -> None:
+        self._max_entries = max_entries
+        self._ttl = ttl
+        self._threshold = threshold
+        self._max_context_messages = max_context_messages
+        self._entries: "OrderedDict[Tuple[str, str, str], _Entry]" = OrderedDict()
+        self.hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+
+    def _key(self, agent_type: str, messages: Sequence[LLMMessage]) -> Optional[Tuple[str, str, str]]:
+        if not messages or len(messages) > self._max_context_messages or not isinstance(messages[-1], UserMessage):
+            return None
+        parts: List[str] = []
+        for message in messages:
+            if not isinstance(message, (UserMessage, AssistantMessage)) or not isinstance(message.content, str):
+                return None
+            parts.append(normalize_query(message.content) or message.content.strip().lower())
+        return agent_type, " | ".join(parts[:-1]), parts[-1]
+
+    def lookup(self, agent_type: str, messages: Sequence[LLMMessage]) -> Optional[CreateResult]:
+        key = self._key(agent_type, messages)
+        if key is None:
+            return None
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry is not None and now < entry.expires_at:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._result(entry.content)
+
+        vector = _trigrams(key[2])
+        negations = _negations(key[2])
+        best: Optional[_Entry] = None
+        best_score = self._threshold
+        for (entry_agent, entry_prefix, _), candidate in self._entries.items():
+            if entry_agent != key[0] or entry_prefix != key[1] or not candidate.similar_ok or now >= candidate.expires_at:
+                continue
+            if candidate.negations != negations:
+                continue
+            score = _cosine(vector, candidate.vector)
+            if score >= best_score:
+                best, best_score = candidate, score
+        if best is not None:
+            self.similar_hits += 1
+            return self._result(best.content)
+        self.misses += 1
+        return None
+
+    def store(self, agent_type: str, messages: Sequence[LLMMessage], result: CreateResult,
+              delegate_tools: Iterable[str]) -> None:
+        key = self._key(agent_type, messages)
+        if key is None or not result.content:
+            return
+        if isinstance(result.content, str):
+            similar_ok = False
+        elif all(isinstance(call, FunctionCall) and call.name in set(delegate_tools) for call in result.content):
+            similar_ok = True
+        else:
+            return
+        self._entries[key] = _Entry(
+            time.monotonic() + self._ttl, _trigrams(key[2]), _negations(key[2]), result.content, similar_ok
+        )
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    @staticmethod
+    def _result(content) -> CreateResult:
+        if not isinstance(content, str):
+            content = [FunctionCall(id=f"call_{uuid.uuid4().hex[:24]}", name=call.name, arguments=call.arguments)
+                       for call in content]
+        return CreateResult(
+            finish_reason="stop" if isinstance(content, str) else "function_calls",
+            content=content,
+            usage=RequestUsage(prompt_tokens=0, completion_tokens=0),
+            cached=True,
+        )
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "similar_hits": self.similar_hits, "misses": self.misses, "size": len(self._entries)}
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+def create_response_cache_from_env(prefix: str) -> Optional[ResponseCache]:
+    """
+    Cria o cache de respostas de um agente se `<prefix>_RESPONSE_CACHE=1`. Tamanho, TTL e limiar
+    de similaridade vêm de `<prefix>_RESPONSE_CACHE_SIZE`, `_TTL` e `_THRESHOLD`.
+    """
+    if os.getenv(f"{prefix}_RESPONSE_CACHE", "0") != "1":
+        return None
+    cache = ResponseCache(
+        max_entries=int(os.getenv(f"{prefix}_RESPONSE_CACHE_SIZE", "512")),
+        ttl=float(os.getenv(f"{prefix}_RESPONSE_CACHE_TTL", "3600")),
+        threshold=float(os.getenv(f"{prefix}_RESPONSE_CACHE_THRESHOLD", "0.85")),
+    )
+
+    def collect():
+        stats = cache.stats()
+        yield ("agent_response_cache_lookups", "counter", "Consultas ao cache de respostas por resultado",
+               [({"cache": prefix, "outcome": outcome}, stats[outcome]) for outcome in ("hits", "similar_hits", "misses")])
+        yield ("agent_response_cache_entries", "gauge", "Entradas no cache de respostas",
+               [({"cache": prefix}, stats["size"])])
+
+    registry.register_collector(f"response_cache:{prefix}", collect)
+    return cache
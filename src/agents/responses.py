@@ -1,4 +1,4 @@
-from typing import List
+from typing import Dict, List, Optional
 
 from autogen_core.models import (
     LLMMessage,
@@ -10,9 +10,33 @@ class UserLogin(BaseModel):
 
 
 class UserTask(BaseModel):
-    context: List[LLMMessage]
+    # Apenas as entradas novas do histórico; o restante fica no ConversationStore da sessão
+    session_id: str
+    offset: int
+    entries: List[LLMMessage]
 
 
 class AgentResponse(BaseModel):
     reply_to_topic_type: str
-    context: List[LLMMessage]
\ No newline at end of file
+    session_id: str
+    offset: int
+    entries: List[LLMMessage]
+    # Preenchido quando o agente não tem acesso ao WebSocket (outro processo): o agente do
+    # usuário envia ao cliente a última entrada como resposta deste remetente
+    sender: Optional[Dict[str, str]] = None
+
+
+class OperatorAnswer(BaseModel):
+    operator: str
+    content: str
+
+
+class HistoryRequest(BaseModel):
+    # Pedido, ao remetente de um delta, das entradas do log a partir de `offset`
+    session_id: str
+    offset: int
+
+
+class HistoryEntries(BaseModel):
+    offset: int
+    entries: List[LLMMessage]
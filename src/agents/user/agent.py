@@ -1,21 +1,33 @@
 from autogen_core import TypeSubscription
 
 from src.agents.user_agent import UserAgent
+from src.agents.user_agent_socket import UserAgent as SocketUserAgent
 from src.utils.topics import user_topic_type, triage_agent_topic_type
 
 
-async def register_user_agent(runtime, websocket=None):
-    user_agent_type = await UserAgent.register(
-        runtime,
-        type=user_topic_type,
-        factory=lambda: UserAgent(
+async def register_user_agent(runtime, sessions=None):
+    if sessions is not None:
+        # Modo servidor: a entrada e a saída de cada sessão passam pelo registro de WebSockets.
+        agent_cls = SocketUserAgent
+        factory = lambda: SocketUserAgent(
             description="A user agent.",
             user_topic_type=user_topic_type,
             agent_topic_type=triage_agent_topic_type,  # Start with the triage agent.
-            websocket = websocket
-        ),
+            sessions=sessions,
+        )
+    else:
+        agent_cls = UserAgent
+        factory = lambda: UserAgent(
+            description="A user agent.",
+            user_topic_type=user_topic_type,
+            agent_topic_type=triage_agent_topic_type,  # Start with the triage agent.
+        )
+    user_agent_type = await agent_cls.register(
+        runtime,
+        type=user_topic_type,
+        factory=factory,
     )
     await runtime.add_subscription(
         TypeSubscription(topic_type=user_topic_type, agent_type=user_agent_type.type)
     )
-    return user_agent_type
\ No newline at end of file
+    return user_agent_type
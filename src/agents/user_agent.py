@@ -1,12 +1,15 @@
 from autogen_core import RoutedAgent, message_handler, MessageContext,  TopicId
 from autogen_core.models import UserMessage
 
+from src.agents.conversation_store import conversation_store
 from src.agents.responses import UserTask, UserLogin, AgentResponse
+from src.common.session_registry import session_agents
 
 
 class UserAgent(RoutedAgent):
     def __init__(self, description: str, user_topic_type: str, agent_topic_type: str, websocket=None) -> None:
         super().__init__(description)
+        session_agents.add(self.id)
         self._user_topic_type = user_topic_type
         self._agent_topic_type = agent_topic_type
         self.websocket = websocket
@@ -17,20 +20,25 @@ class UserAgent(RoutedAgent):
         # Get the user's initial input after login.
         user_input = input("User: ")
         print(f"{'-'*80}\n{self.id.type}:\n{user_input}")
+        entries = [UserMessage(content=user_input, source="User")]
+        offset = conversation_store.append(self.id.key, entries)
         await self.publish_message(
-            UserTask(context=[UserMessage(content=user_input, source="User")]),
+            UserTask(session_id=self.id.key, offset=offset, entries=entries),
             topic_id=TopicId(self._agent_topic_type, source=self.id.key),
         )
 
     @message_handler
     async def handle_task_result(self, message: AgentResponse, ctx: MessageContext) -> None:
+        conversation_store.merge(self.id.key, message.offset, message.entries)
         # Get the user's input after receiving a response from an agent.
         user_input = input("User (type 'exit' to close the session): ")
         print(f"{'-'*80}\n{self.id.type}:\n{user_input}", flush=True)
         if user_input.strip().lower() == "exit":
             print(f"{'-'*80}\nUser session ended, session ID: {self.id.key}.")
             return
-        message.context.append(UserMessage(content=user_input, source="User"))
+        entries = [UserMessage(content=user_input, source="User")]
+        offset = conversation_store.append(self.id.key, entries)
         await self.publish_message(
-            UserTask(context=message.context), topic_id=TopicId(message.reply_to_topic_type, source=self.id.key)
+            UserTask(session_id=self.id.key, offset=offset, entries=entries),
+            topic_id=TopicId(message.reply_to_topic_type, source=self.id.key),
         )
\ No newline at end of file
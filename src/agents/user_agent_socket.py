@@ -1,62 +1,66 @@
-import json
+import time
+from typing import Optional
 
 from autogen_core import RoutedAgent, message_handler, MessageContext, TopicId
 from autogen_core.models import UserMessage
 
-from src.agents.responses import UserTask, UserLogin, AgentResponse
-from flask_socketio import emit
+from src.agents.conversation_store import ConversationStore, conversation_store, history_entries, merge_delta
+from src.agents.responses import UserTask, UserLogin, AgentResponse, HistoryEntries, HistoryRequest
+from src.common.session_registry import SessionRegistry, session_agents
+from src.common.metrics import agent_messages
+from src.common.tracing import record_span
 
 
 class UserAgent(RoutedAgent):
-    def __init__(self, description: str, user_topic_type: str, agent_topic_type: str, websocket=None) -> None:
+    def __init__(self, description: str, user_topic_type: str, agent_topic_type: str,
+                 sessions: SessionRegistry, store: Optional[ConversationStore] = None) -> None:
         """
         Inicializa o UserAgent.
         :param description: Descrição do agente
         :param user_topic_type: Tipo de tópico para mensagens do usuário
         :param agent_topic_type: Tipo de tópico para mensagens do agente
-        :param websocket: Instância opcional para eventos WebSocket em tempo real
+        :param sessions: Registro de sessões que resolve o WebSocket a partir da chave do agente (session ID)
+        :param store: Histórico das conversas por sessão (padrão: o store compartilhado do processo)
         """
         super().__init__(description)
+        session_agents.add(self.id)
         self._user_topic_type = user_topic_type
         self._agent_topic_type = agent_topic_type
-        self.websocket = websocket  # WebSocket opcional para comunicação em tempo real
+        self._sessions = sessions
+        self._store = store if store is not None else conversation_store
+        # Início (time.time_ns) do turno em andamento: da mensagem do usuário até a resposta do agente
+        self._turn_started_ns: Optional[int] = None
 
     @message_handler
     async def handle_user_login(self, message: UserLogin, ctx: MessageContext) -> None:
         """
-        Lida com o evento de login do usuário, simulando a primeira mensagem inicial
-        ou recebendo-a quando enviada por um WebSocket.
+        Lida com o evento de login do usuário, recebendo a primeira mensagem
+        enviada pelo WebSocket da sessão.
         """
         try:
             # Log de início de sessão
             print(f"{'-' * 80}\nUser login - session ID: {self.id.key}.", flush=True)
 
-            if self.websocket:
-                try:
-                    # Recebe mensagem via WebSocket, caso disponível
-                    user_input = await self.websocket.recv()
-                    print(f"{'-' * 80}\n{self.id.type} recebeu uma mensagem:\n{user_input}")
-                except Exception as ws_error:
-                    print(f"Erro ao receber mensagem via WebSocket: {ws_error}")
-                    user_input = "Mensagem inicial do usuário (fallback)"  # Define fallback em caso de erro no WebSocket
-
+            user_input = await self._sessions.recv(self.id.key)
+            if user_input is None:
+                print(f"{'-' * 80}\nConexão encerrada antes da primeira mensagem, session ID: {self.id.key}.")
+                return
+            print(f"{'-' * 80}\n{self.id.type} recebeu uma mensagem:\n{user_input}")
 
             # Publica a mensagem inicial no tópico apropriado
+            offset = self._store.append(self.id.key, [UserMessage(content=user_input, source="User")])
+            offset, entries = self._store.delta(self.id.key, offset)
             await self.publish_message(
-                UserTask(context=[UserMessage(content=user_input, source="User")]),
+                UserTask(session_id=self.id.key, offset=offset, entries=entries),
                 topic_id=TopicId(self._agent_topic_type, source=self.id.key),
             )
+            self._turn_started_ns = time.time_ns()
             await self.sendMessage(user_input)
 
         except Exception as e:
             # Tratamento e notificação de erros
             print(f"❌ Ocorreu um erro: {e}")
-            if self.websocket:
-                try:
-                    await self.websocket.send("Erro ao processar sua entrada. Tente novamente mais tarde.")
-                except Exception as send_error:
-                    print(f"Erro ao enviar mensagem de erro via WebSocket: {send_error}")
-            # Fallback de notificação usando o Flask-SocketIO
+            await self._sessions.send(self.id.key, "Erro ao processar sua entrada. Tente novamente mais tarde.")
 
     async def sendMessage(self, user_input):
         response = {
@@ -67,42 +71,48 @@ class UserAgent(RoutedAgent):
             },
             "content": user_input
         }
-        try:
-            await self.websocket.send(json.dumps(response))
-        except self.websocket.ConnectionClosed:
-            print("Conexão Websocket fechada")
+        await self._sessions.send(self.id.key, response)
 
     @message_handler
     async def handle_task_result(self, message: AgentResponse, ctx: MessageContext) -> None:
         """
         Processa a resposta retornada por outro agente e solicita uma nova entrada do usuário
-        em looping, até que a palavra-chave 'exit' seja recebida.
+        em looping, até que a palavra-chave 'exit' seja recebida ou a conexão seja fechada.
         """
+        agent_messages.inc(self.id.type)
         try:
-            if self.websocket:
-                try:
-                    # Recebe mensagem via WebSocket, caso disponível
-                    user_input = await self.websocket.recv()
-                    print(f"{'-' * 80}\n{self.id.type} recebeu uma mensagem:\n{user_input}")
-                except Exception as ws_error:
-                    print(f"Erro ao receber mensagem via WebSocket: {ws_error}")
-                    user_input = "Mensagem inicial do usuário (fallback)"  # Define fallback em caso de erro no WebSocket
+            await merge_delta(self, self._store, self.id.key, message.offset, message.entries, ctx.sender)
+            if message.sender is not None:
+                # Resposta de um agente em outro processo, sem acesso ao WebSocket da sessão
+                await self._sessions.send(self.id.key, {"sender": message.sender, "content": message.entries[-1].content})
+            if self._turn_started_ns is not None:
+                record_span("user.turn", self._turn_started_ns, self.id.key, agent=message.reply_to_topic_type)
+                self._turn_started_ns = None
+            user_input = await self._sessions.recv(self.id.key)
 
             # Verifica a condição para encerrar a sessão
-            if user_input.strip().lower() == "exit":
+            if user_input is None or user_input.strip().lower() == "exit":
                 print(f"{'-' * 80}\nUser session ended, session ID: {self.id.key}.")
+                self._sessions.close(self.id.key)
                 return
+            print(f"{'-' * 80}\n{self.id.type} recebeu uma mensagem:\n{user_input}")
 
-            # Adiciona a entrada do usuário ao contexto da mensagem
-            message.context.append(UserMessage(content=user_input, source="User"))
+            # Adiciona a entrada do usuário ao histórico da sessão
+            offset = self._store.append(self.id.key, [UserMessage(content=user_input, source="User")])
+            offset, entries = self._store.delta(self.id.key, offset)
 
-            # Publica a mensagem atualizada no tópico relevante
+            # Publica apenas o delta do histórico no tópico relevante
             await self.publish_message(
-                UserTask(context=message.context),
+                UserTask(session_id=self.id.key, offset=offset, entries=entries),
                 topic_id=TopicId(message.reply_to_topic_type, source=self.id.key),
             )
+            self._turn_started_ns = time.time_ns()
             await self.sendMessage(user_input)
         except Exception as e:
             print(f"❌ Erro durante o processamento da tarefa: {e}")
-            if self.websocket:
-                await self.websocket.send("Erro interno ao processar sua mensagem. Tente novamente.")
\ No newline at end of file
+            await self._sessions.send(self.id.key, "Erro interno ao processar sua mensagem. Tente novamente.")
+
+    @message_handler
+    async def handle_history_request(self, message: HistoryRequest, ctx: MessageContext) -> HistoryEntries:
+        # Agente de outro processo que recebeu deste um delta com lacuna
+        return history_entries(self._store, message)
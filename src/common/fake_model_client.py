@@ -0,0 +1,125 @@
+import asyncio
+import time
+from collections import deque
+from typing import Any, AsyncGenerator, Callable, Deque, Mapping, Optional, Sequence, Union
+
+import httpx
+from autogen_core import CancellationToken
+from autogen_core.models import ChatCompletionClient, CreateResult, LLMMessage, ModelCapabilities, RequestUsage
+from autogen_core.tools import Tool, ToolSchema
+
+
+class FakeChatCompletionClient(ChatCompletionClient):
+    """
+    Cliente de modelo falso para testes e benchmarks, sem rede.
+
+    Responde com `reply` (texto fixo ou função das mensagens e ferramentas) após `latency`
+    segundos e simula o limite de requisições do Azure: acima de `requests_per_window`
+    requisições em `window` segundos, levanta `openai.RateLimitError` com `Retry-After`.
+    """
+
+    def __init__(
+            self,
+            reply: Union[str, Callable[[Sequence[LLMMessage], Sequence[Any]], Any]] = "ok",
+            latency: float = 0.05,
+            requests_per_window: Optional[int] = None,
+            window: float = 1.0,
+            prompt_tokens: int = 100,
+            completion_tokens: int = 20,
+    ) -> None:
+        self._reply = reply
+        self._latency = latency
+        self._requests_per_window = requests_per_window
+        self._window = window
+        self._prompt_tokens = prompt_tokens
+        self._completion_tokens = completion_tokens
+        self._accepted: Deque[float] = deque()
+        self._total = RequestUsage(prompt_tokens=0, completion_tokens=0)
+        self.calls = 0
+        self.rate_limited = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def _check_rate_limit(self) -> None:
+        if self._requests_per_window is None:
+            return
+        now = time.monotonic()
+        while self._accepted and now - self._accepted[0] >= self._window:
+            self._accepted.popleft()
+        if len(self._accepted) >= self._requests_per_window:
+            import openai
+
+            self.rate_limited += 1
+            retry_after = self._window - (now - self._accepted[0])
+            response = httpx.Response(
+                429,
+                headers={"retry-after-ms": str(int(retry_after * 1000) + 1)},
+                request=httpx.Request("POST", "https://fake.openai.azure.com/chat/completions"),
+            )
+            raise openai.RateLimitError("Rate limit exceeded", response=response, body=None)
+        self._accepted.append(now)
+
+    async def create(
+            self,
+            messages: Sequence[LLMMessage],
+            *,
+            tools: Sequence[Union[Tool, ToolSchema]] = [],
+            json_output: Optional[bool] = None,
+            extra_create_args: Mapping[str, Any] = {},
+            cancellation_token: Optional[CancellationToken] = None,
+    ) -> CreateResult:
+        self._check_rate_limit()
+        self.calls += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self._latency)
+        finally:
+            self.in_flight -= 1
+        content = self._reply(messages, tools) if callable(self._reply) else self._reply
+        usage = RequestUsage(prompt_tokens=self._prompt_tokens, completion_tokens=self._completion_tokens)
+        self._total = RequestUsage(
+            prompt_tokens=self._total.prompt_tokens + usage.prompt_tokens,
+            completion_tokens=self._total.completion_tokens + usage.completion_tokens,
+        )
+        return CreateResult(
+            finish_reason="stop" if isinstance(content, str) else "function_calls",
+            content=content,
+            usage=usage,
+            cached=False,
+        )
+
+    async def create_stream(
+            self,
+            messages: Sequence[LLMMessage],
+            *,
+            tools: Sequence[Union[Tool, ToolSchema]] = [],
+            json_output: Optional[bool] = None,
+            extra_create_args: Mapping[str, Any] = {},
+            cancellation_token: Optional[CancellationToken] = None,
+    ) -> AsyncGenerator[Union[str, CreateResult], None]:
+        result = await self.create(messages, tools=tools, cancellation_token=cancellation_token)
+        if isinstance(result.content, str):
+            for word in result.content.split(" "):
+                yield word + " "
+        yield result
+
+    def actual_usage(self) -> RequestUsage:
+        return self._total
+
+    def total_usage(self) -> RequestUsage:
+        return self._total
+
+    def count_tokens(self, messages: Sequence[LLMMessage], **kwargs: Any) -> int:
+        return self._prompt_tokens
+
+    def remaining_tokens(self, messages: Sequence[LLMMessage], **kwargs: Any) -> int:
+        return 128000 - self._prompt_tokens
+
+    @property
+    def capabilities(self) -> ModelCapabilities:  # type: ignore
+        return ModelCapabilities(vision=False, function_calling=True, json_output=False)
+
+    @property
+    def model_info(self):  # type: ignore
+        return {"vision": False, "function_calling": True, "json_output": False, "family": "gpt-4o"}
@@ -0,0 +1,89 @@
+import threading
+from typing import Any, AsyncGenerator, Callable, Mapping, Optional, Sequence, Union
+
+from autogen_core import CancellationToken
+from autogen_core.models import ChatCompletionClient, CreateResult, LLMMessage, RequestUsage
+from autogen_core.tools import Tool, ToolSchema
+
+
+class LazyChatCompletionClient(ChatCompletionClient):
+    """
+    Adia a criação do cliente de modelo (e o import do SDK da OpenAI, o mais lento do servidor)
+    até o primeiro uso ou até `warm_up`, que pode rodar em segundo plano depois de o servidor
+    já estar aceitando conexões.
+    """
+
+    def __init__(self, factory: Callable[[], ChatCompletionClient]) -> None:
+        self._factory = factory
+        self._inner: Optional[ChatCompletionClient] = None
+        self._lock = threading.Lock()
+
+    @property
+    def inner(self) -> ChatCompletionClient:
+        if self._inner is None:
+            # `warm_up` roda numa thread: o lock evita criar o cliente duas vezes
+            with self._lock:
+                if self._inner is None:
+                    self._inner = self._factory()
+        return self._inner
+
+    def warm_up(self) -> None:
+        self.inner
+
+    @property
+    def _client(self) -> Any:
+        # O agendador só repassa argumentos específicos da OpenAI a clientes com `_client`
+        return self.inner._client  # type: ignore[attr-defined]
+
+    async def create(
+            self,
+            messages: Sequence[LLMMessage],
+            *,
+            tools: Sequence[Union[Tool, ToolSchema]] = [],
+            json_output: Optional[bool] = None,
+            extra_create_args: Mapping[str, Any] = {},
+            cancellation_token: Optional[CancellationToken] = None,
+    ) -> CreateResult:
+        return await self.inner.create(
+            messages, tools=tools, json_output=json_output,
+            extra_create_args=extra_create_args, cancellation_token=cancellation_token,
+        )
+
+    def create_stream(
+            self,
+            messages: Sequence[LLMMessage],
+            *,
+            tools: Sequence[Union[Tool, ToolSchema]] = [],
+            json_output: Optional[bool] = None,
+            extra_create_args: Mapping[str, Any] = {},
+            cancellation_token: Optional[CancellationToken] = None,
+            **kwargs: Any,
+    ) -> AsyncGenerator[Union[str, CreateResult], None]:
+        return self.inner.create_stream(
+            messages, tools=tools, json_output=json_output,
+            extra_create_args=extra_create_args, cancellation_token=cancellation_token, **kwargs,
+        )
+
+    def actual_usage(self) -> RequestUsage:
+        if self._inner is None:
+            return RequestUsage(prompt_tokens=0, completion_tokens=0)
+        return self._inner.actual_usage()
+
+    def total_usage(self) -> RequestUsage:
+        if self._inner is None:
+            return RequestUsage(prompt_tokens=0, completion_tokens=0)
+        return self._inner.total_usage()
+
+    def count_tokens(self, messages: Sequence[LLMMessage], **kwargs: Any) -> int:
+        return self.inner.count_tokens(messages, **kwargs)
+
+    def remaining_tokens(self, messages: Sequence[LLMMessage], **kwargs: Any) -> int:
+        return self.inner.remaining_tokens(messages, **kwargs)
+
+    @property
+    def capabilities(self):  # type: ignore
+        return self.inner.capabilities
+
+    @property
+    def model_info(self):  # type: ignore
+        return self.inner.model_info
@@ -0,0 +1,269 @@
+import asyncio
+import math
+import os
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Métricas do servidor no formato texto do Prometheus, servidas em `/metrics`.
+# Tudo roda no event loop do processo, então os contadores são dicionários simples, sem locks:
+# atualizar uma métrica no caminho quente é uma busca em dicionário e uma soma.
+
+Labels = Tuple[str, ...]
+# (nome, tipo, ajuda, amostras) produzidos por um coletor no momento da coleta
+Family = Tuple[str, str, str, List[Tuple[Dict[str, str], float]]]
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(str(value))}"' for key, value in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels: Labels) -> Labels:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} espera os rótulos {self.labelnames}, recebeu {labels}")
+        return labels
+
+    def _labels(self, key: Labels) -> Dict[str, str]:
+        return dict(zip(self.labelnames, key))
+
+    def samples(self) -> List[Tuple[str, Dict[str, str], float]]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Contador monotônico. Os valores dos rótulos são posicionais: `inc("triage_agent")`."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0)
+
+    def samples(self) -> List[Tuple[str, Dict[str, str], float]]:
+        return [(f"{self.name}_total", self._labels(key), value) for key, value in sorted(self._values.items())]
+
+
+class Gauge(_Metric):
+    """Valor instantâneo, atribuído diretamente ou lido de uma função no momento da coleta."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Labels, float] = {}
+        self._function: Optional[Callable[[], float]] = None
+
+    def set(self, value: float, *labels: str) -> None:
+        self._values[self._key(labels)] = value
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, *labels: str, amount: float = 1) -> None:
+        self.inc(*labels, amount=-amount)
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        self._function = function
+
+    def samples(self) -> List[Tuple[str, Dict[str, str], float]]:
+        if self._function is not None:
+            return [(self.name, {}, self._function())]
+        return [(self.name, self._labels(key), value) for key, value in sorted(self._values.items())]
+
+
+class Histogram(_Metric):
+    """Histograma com buckets fixos; `observe` incrementa só o bucket do valor (acumulados na coleta)."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Por conjunto de rótulos: [contagens por bucket (+Inf no fim), soma]
+        self._values: Dict[Labels, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        key = self._key(labels)
+        entry = self._values.get(key)
+        if entry is None:
+            entry = self._values[key] = ([0] * (len(self.buckets) + 1), [0.0])
+        entry[0][bisect_left(self.buckets, value)] += 1
+        entry[1][0] += value
+
+    def count(self, *labels: str) -> int:
+        entry = self._values.get(labels)
+        return sum(entry[0]) if entry is not None else 0
+
+    def samples(self) -> List[Tuple[str, Dict[str, str], float]]:
+        samples = []
+        for key, (counts, total) in sorted(self._values.items()):
+            labels = self._labels(key)
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                samples.append((f"{self.name}_bucket", {**labels, "le": _format_value(bound)}, cumulative))
+            samples.append((f"{self.name}_sum", labels, total[0]))
+            samples.append((f"{self.name}_count", labels, cumulative))
+        return samples
+
+
+class MetricsRegistry:
+    """
+    Registro das métricas do processo. Além das métricas atualizadas no caminho quente,
+    aceita coletores: funções chamadas a cada coleta que convertem estatísticas já mantidas
+    por outros componentes (cache de prompt, retries, agendador) em famílias de métricas.
+    """
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: Dict[str, Callable[[], Iterable[Family]]] = {}
+
+    def _register(self, metric: _Metric) -> _Metric:
+        existing = self._metrics.get(metric.name)
+        if existing is not None:
+            if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                raise ValueError(f"Métrica {metric.name} já registrada com outro tipo ou rótulos")
+            return existing
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))  # type: ignore
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))  # type: ignore
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))  # type: ignore
+
+    def register_collector(self, key: str, collector: Callable[[], Iterable[Family]]) -> None:
+        """Registra (ou substitui, pela mesma chave) um coletor chamado a cada coleta."""
+        self._collectors[key] = collector
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        for collector in list(self._collectors.values()):
+            for name, kind, documentation, samples in collector():
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} {kind}")
+                sample_name = f"{name}_total" if kind == "counter" else name
+                for labels, value in samples:
+                    lines.append(f"{sample_name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+active_sessions = registry.gauge("agent_sessions_active", "Sessões WebSocket conectadas")
+agent_messages = registry.counter(
+    "agent_messages", "Mensagens (UserTask/AgentResponse) tratadas por tipo de agente", ["agent"]
+)
+model_latency = registry.histogram(
+    "agent_model_call_duration_seconds", "Duração das chamadas ao modelo por agente", ["agent"]
+)
+model_errors = registry.counter("agent_model_call_errors", "Chamadas ao modelo que falharam", ["agent"])
+tool_latency = registry.histogram("agent_tool_duration_seconds", "Duração das execuções de FunctionTool", ["tool"])
+tool_results = registry.counter("agent_tool_calls", "Execuções de FunctionTool por resultado", ["tool", "outcome"])
+delegations = registry.counter(
+    "agent_delegations", "Transferências entre tipos de tópico", ["source", "target"]
+)
+websocket_send_failures = registry.counter("agent_websocket_send_failures", "Envios WebSocket que falharam")
+turn_fallbacks = registry.counter(
+    "agent_turn_fallbacks", "Turnos encerrados com a resposta de contingência, por motivo", ["agent", "reason"]
+)
+
+
+def _retry_collector() -> Iterable[Family]:
+    from src.utils.retry_helpers import retry_metrics
+
+    stats = retry_metrics.stats()
+    yield ("agent_retry_calls", "counter", "Operações com retry por resultado",
+           [({"operation": name, "outcome": outcome}, s[outcome])
+            for name, s in stats.items() for outcome in ("ok", "failed", "deadline_exceeded")])
+    yield ("agent_retry_attempts", "counter", "Tentativas das operações com retry",
+           [({"operation": name}, s["attempts"]) for name, s in stats.items()])
+
+
+def _prompt_cache_collector() -> Iterable[Family]:
+    from src.common.prompt_cache import prompt_cache_metrics
+
+    stats = prompt_cache_metrics.stats()
+    yield ("agent_model_tokens", "counter", "Tokens por agente e tipo (prompt, cached, completion)",
+           [({"agent": agent, "kind": kind}, s[f"{kind}_tokens"])
+            for agent, s in stats.items() for kind in ("prompt", "cached", "completion")])
+    yield ("agent_prompt_cache_hit_ratio", "gauge", "Fração dos tokens de prompt servidos do cache",
+           [({"agent": agent}, s["cache_hit_ratio"]) for agent, s in stats.items()])
+
+
+registry.register_collector("retry", _retry_collector)
+registry.register_collector("prompt_cache", _prompt_cache_collector)
+
+
+async def _handle_http(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    try:
+        request_line = await asyncio.wait_for(reader.readline(), 5)
+        # Descarta os cabeçalhos da requisição
+        while (await asyncio.wait_for(reader.readline(), 5)) not in (b"\r\n", b"\n", b""):
+            pass
+        parts = request_line.decode("latin-1").split()
+        if len(parts) >= 2 and parts[0] == "GET" and parts[1].split("?")[0] == "/metrics":
+            status, body = "200 OK", registry.render().encode("utf-8")
+        else:
+            status, body = "404 Not Found", b"not found\n"
+        writer.write(
+            f"HTTP/1.1 {status}\r\nContent-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode("latin-1") + body
+        )
+        await writer.drain()
+    except (asyncio.TimeoutError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+async def start_metrics_server(host: Optional[str] = None, port: Optional[int] = None) -> Optional[asyncio.AbstractServer]:
+    """
+    Serve `GET /metrics` no event loop atual, em `METRICS_HOST:METRICS_PORT`
+    (padrão `127.0.0.1:9100`). Com `METRICS_PORT=0` o endpoint fica desativado.
+    """
+    host = host or os.getenv("METRICS_HOST", "127.0.0.1")
+    port = port if port is not None else int(os.getenv("METRICS_PORT", "9100"))
+    if port == 0:
+        return None
+    return await asyncio.start_server(_handle_http, host, port)
@@ -0,0 +1,381 @@
+import asyncio
+import contextlib
+import contextvars
+import json
+import os
+import time
+from collections import OrderedDict, deque
+from typing import Any, AsyncGenerator, Awaitable, Callable, Deque, Dict, Iterator, List, Mapping, Optional, Sequence, Union
+
+from autogen_core import CancellationToken
+from autogen_core.models import ChatCompletionClient, CreateResult, LLMMessage, RequestUsage
+from autogen_core.tools import Tool, ToolSchema
+
+from src.utils.retry_helpers import is_rate_limit_error, retry_after_seconds
+
+# Prioridades: quanto menor, antes é atendida
+PRIORITY_TOOL_LOOP = 0  # Chamada seguinte a resultados de ferramentas: o turno já está em andamento
+PRIORITY_NEW_TURN = 1
+
+# Sessão, prioridade e limite por tentativa da chamada em andamento, definidos pelo agente em `model_call_scope`
+_call_scope: contextvars.ContextVar[tuple] = contextvars.ContextVar(
+    "model_call_scope", default=("", PRIORITY_NEW_TURN, None)
+)
+
+
+@contextlib.contextmanager
+def model_call_scope(session_id: str, priority: int = PRIORITY_NEW_TURN,
+                     attempt_timeout: Optional[float] = None) -> Iterator[None]:
+    """
+    Identifica a sessão e a prioridade das chamadas ao modelo feitas dentro do bloco.
+    `attempt_timeout` limita cada chamada contando a partir do despacho, sem o tempo na fila:
+    uma chamada que esperou a vez sob carga não estoura o limite antes de chegar à API.
+    """
+    token = _call_scope.set((session_id, priority, attempt_timeout))
+    try:
+        yield
+    finally:
+        _call_scope.reset(token)
+
+
+class TokenBucket:
+    """
+    Balde de tokens reabastecido continuamente a `per_minute / 60` por segundo, com capacidade
+    de `burst_seconds` de consumo (o Azure aplica os limites por minuto em janelas curtas).
+    """
+
+    def __init__(self, per_minute: float, burst_seconds: float = 10.0) -> None:
+        self.rate = per_minute / 60.0
+        self.capacity = max(1.0, self.rate * burst_seconds)
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Segundos até haver `amount` tokens (pedidos maiores que a capacidade esperam o balde encher)."""
+        self._refill()
+        amount = min(amount, self.capacity)
+        return 0.0 if self.tokens >= amount else (amount - self.tokens) / self.rate
+
+    def consume(self, amount: float) -> None:
+        self._refill()
+        self.tokens -= amount
+
+    def refund(self, amount: float) -> None:
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+
+class _Request:
+    __slots__ = ("session_id", "priority", "tokens", "future", "enqueued_at")
+
+    def __init__(self, session_id: str, priority: int, tokens: int) -> None:
+        self.session_id = session_id
+        self.priority = priority
+        self.tokens = tokens
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.enqueued_at = time.monotonic()
+
+
+class ModelScheduler:
+    """
+    Agenda as chamadas ao modelo do processo inteiro.
+
+    - Limites de requisições e de tokens por minuto (`TokenBucket`), estimando os tokens do
+      pedido e devolvendo a diferença quando a API informa o uso real;
+    - no máximo `max_concurrency` chamadas em andamento, distribuídas entre os clientes do pool;
+    - fila justa: dentro de cada prioridade, as sessões são atendidas em rodízio, uma chamada por vez;
+    - chamadas de um turno em andamento (após ferramentas) passam à frente de turnos novos;
+    - um 429 suspende todas as chamadas pelo tempo do `Retry-After` (ou espera exponencial) e a
+      chamada volta para a fila, até `max_retries` vezes;
+    - o limite por tentativa de `model_call_scope` só começa a contar no despacho.
+    """
+
+    def __init__(
+            self,
+            clients: Sequence[ChatCompletionClient],
+            requests_per_minute: float = 60,
+            tokens_per_minute: float = 60000,
+            max_concurrency: int = 8,
+            max_retries: int = 4,
+            base_backoff: float = 1.0,
+            completion_tokens_estimate: int = 400,
+            burst_seconds: float = 10.0,
+    ) -> None:
+        if not clients:
+            raise ValueError("O pool de clientes do modelo está vazio")
+        self._clients = list(clients)
+        self._in_use = [0] * len(self._clients)
+        self._requests = TokenBucket(requests_per_minute, burst_seconds)
+        self._tokens = TokenBucket(tokens_per_minute, burst_seconds)
+        self._max_concurrency = max_concurrency
+        self._max_retries = max_retries
+        self._base_backoff = base_backoff
+        self.completion_tokens_estimate = completion_tokens_estimate
+        self._queues: Dict[int, "OrderedDict[str, Deque[_Request]]"] = {}
+        self._running = 0
+        self._paused_until = 0.0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self.stats: Dict[str, float] = {"calls": 0, "rate_limited": 0, "retries": 0, "queue_seconds": 0.0}
+
+    @property
+    def clients(self) -> List[ChatCompletionClient]:
+        return list(self._clients)
+
+    def queued(self) -> int:
+        return sum(len(queue) for sessions in self._queues.values() for queue in sessions.values())
+
+    def _enqueue(self, request: _Request, front: bool = False) -> None:
+        sessions = self._queues.setdefault(request.priority, OrderedDict())
+        queue = sessions.setdefault(request.session_id, deque())
+        if front:
+            queue.appendleft(request)
+        else:
+            queue.append(request)
+
+    def _peek(self) -> Optional[_Request]:
+        for priority in sorted(self._queues):
+            sessions = self._queues[priority]
+            while sessions:
+                session_id, queue = next(iter(sessions.items()))
+                while queue and queue[0].future.done():
+                    queue.popleft()  # Cancelada enquanto esperava
+                if queue:
+                    return queue[0]
+                del sessions[session_id]
+        return None
+
+    def _pop(self, request: _Request) -> None:
+        sessions = self._queues[request.priority]
+        queue = sessions[request.session_id]
+        queue.popleft()
+        # Rodízio: a sessão vai para o fim da fila da sua prioridade
+        if queue:
+            sessions.move_to_end(request.session_id)
+        else:
+            del sessions[request.session_id]
+
+    def _schedule_dispatch(self, delay: float) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = asyncio.get_running_loop().call_later(delay, self._dispatch)
+
+    def _dispatch(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        while self._running < self._max_concurrency:
+            request = self._peek()
+            if request is None:
+                return
+            wait = max(
+                self._paused_until - time.monotonic(),
+                self._requests.wait_time(1),
+                self._tokens.wait_time(request.tokens),
+            )
+            if wait > 0:
+                self._schedule_dispatch(wait)
+                return
+            self._pop(request)
+            self._requests.consume(1)
+            self._tokens.consume(request.tokens)
+            self._running += 1
+            index = min(range(len(self._clients)), key=self._in_use.__getitem__)
+            self._in_use[index] += 1
+            self.stats["queue_seconds"] += time.monotonic() - request.enqueued_at
+            request.future.set_result(index)
+
+    def _release(self, index: int, estimated: int, usage: Optional[RequestUsage]) -> None:
+        self._running -= 1
+        self._in_use[index] -= 1
+        if usage is not None and (usage.prompt_tokens or usage.completion_tokens):
+            self._tokens.refund(estimated - usage.prompt_tokens - usage.completion_tokens)
+        self._dispatch()
+
+    def _pause(self, attempt: int, error: BaseException) -> None:
+        delay = retry_after_seconds(error)
+        if delay is None:
+            delay = self._base_backoff * (2 ** attempt)
+        self._paused_until = max(self._paused_until, time.monotonic() + delay)
+        # O servidor está no limite: esvazia o balde de requisições para não disparar uma rajada na volta
+        self._requests.tokens = min(self._requests.tokens, 0.0)
+        print(f"Limite de taxa do modelo atingido; suspendendo chamadas por {delay:.1f}s", flush=True)
+
+    async def _acquire(self, session_id: str, priority: int, tokens: int, front: bool = False) -> int:
+        request = _Request(session_id, priority, tokens)
+        self._enqueue(request, front=front)
+        self._dispatch()
+        try:
+            return await request.future
+        except asyncio.CancelledError:
+            if request.future.done() and not request.future.cancelled():
+                # A vaga foi concedida no mesmo instante do cancelamento: devolve
+                self._release(request.future.result(), tokens, None)
+            raise
+
+    async def run(self, call: Callable[[ChatCompletionClient], Awaitable[CreateResult]], tokens: int) -> CreateResult:
+        """Executa `call(client)` quando houver vaga e orçamento, repetindo em caso de 429."""
+        session_id, priority, timeout = _call_scope.get()
+        for attempt in range(self._max_retries + 1):
+            # Uma chamada repetida após 429 volta para o início da fila da sessão
+            index = await self._acquire(session_id, priority, tokens, front=attempt > 0)
+            usage = None
+            try:
+                if timeout is None:
+                    result = await call(self._clients[index])
+                else:
+                    result = await asyncio.wait_for(call(self._clients[index]), timeout)
+                usage = result.usage
+                self.stats["calls"] += 1
+                return result
+            except Exception as e:
+                if not is_rate_limit_error(e) or attempt == self._max_retries:
+                    raise
+                self.stats["rate_limited"] += 1
+                self.stats["retries"] += 1
+                self._pause(attempt, e)
+            finally:
+                self._release(index, tokens, usage)
+        raise AssertionError("unreachable")
+
+    async def run_stream(
+            self, call: Callable[[ChatCompletionClient], AsyncGenerator[Union[str, CreateResult], None]], tokens: int
+    ) -> AsyncGenerator[Union[str, CreateResult], None]:
+        """Como `run`, para streams: a vaga fica ocupada até o fim do stream. Só repete 429 antes do primeiro chunk."""
+        session_id, priority, timeout = _call_scope.get()
+        for attempt in range(self._max_retries + 1):
+            index = await self._acquire(session_id, priority, tokens, front=attempt > 0)
+            usage = None
+            started = False
+            try:
+                async for chunk in _with_timeout(call(self._clients[index]), timeout):
+                    started = True
+                    if isinstance(chunk, CreateResult):
+                        usage = chunk.usage
+                    yield chunk
+                self.stats["calls"] += 1
+                return
+            except Exception as e:
+                if started or not is_rate_limit_error(e) or attempt == self._max_retries:
+                    raise
+                self.stats["rate_limited"] += 1
+                self.stats["retries"] += 1
+                self._pause(attempt, e)
+            finally:
+                self._release(index, tokens, usage)
+
+
+async def _with_timeout(stream: AsyncGenerator[Any, None], timeout: Optional[float]) -> AsyncGenerator[Any, None]:
+    """Repassa os chunks de `stream`, levantando TimeoutError se ele não terminar em `timeout` segundos."""
+    if timeout is None:
+        async for chunk in stream:
+            yield chunk
+        return
+    expires_at = time.monotonic() + timeout
+    try:
+        while True:
+            try:
+                chunk = await asyncio.wait_for(stream.__anext__(), max(0.0, expires_at - time.monotonic()))
+            except StopAsyncIteration:
+                return
+            yield chunk
+    finally:
+        await stream.aclose()
+
+
+class ScheduledChatCompletionClient(ChatCompletionClient):
+    """Cliente de modelo que passa todas as chamadas pelo `ModelScheduler`."""
+
+    def __init__(self, scheduler: ModelScheduler) -> None:
+        self.scheduler = scheduler
+
+    @property
+    def _primary(self) -> ChatCompletionClient:
+        return self.scheduler.clients[0]
+
+    def _estimate_tokens(self, messages: Sequence[LLMMessage], tools: Sequence[Union[Tool, ToolSchema]]) -> int:
+        from src.agents.context_window import token_counter
+
+        schemas = [tool.schema if isinstance(tool, Tool) else tool for tool in tools]
+        return (sum(token_counter.count(message) for message in messages)
+                + len(json.dumps(schemas)) // 4 + self.scheduler.completion_tokens_estimate)
+
+    async def create(
+            self,
+            messages: Sequence[LLMMessage],
+            *,
+            tools: Sequence[Union[Tool, ToolSchema]] = [],
+            json_output: Optional[bool] = None,
+            extra_create_args: Mapping[str, Any] = {},
+            cancellation_token: Optional[CancellationToken] = None,
+    ) -> CreateResult:
+        return await self.scheduler.run(
+            lambda client: client.create(
+                messages, tools=tools, json_output=json_output,
+                extra_create_args=extra_create_args, cancellation_token=cancellation_token,
+            ),
+            self._estimate_tokens(messages, tools),
+        )
+
+    def create_stream(
+            self,
+            messages: Sequence[LLMMessage],
+            *,
+            tools: Sequence[Union[Tool, ToolSchema]] = [],
+            json_output: Optional[bool] = None,
+            extra_create_args: Mapping[str, Any] = {},
+            cancellation_token: Optional[CancellationToken] = None,
+            **kwargs: Any,
+    ) -> AsyncGenerator[Union[str, CreateResult], None]:
+        def call(client: ChatCompletionClient) -> AsyncGenerator[Union[str, CreateResult], None]:
+            # Argumentos extras (ex.: max_consecutive_empty_chunk_tolerance) só existem nos clientes da OpenAI
+            extra = kwargs if hasattr(client, "_client") else {}
+            return client.create_stream(
+                messages, tools=tools, json_output=json_output,
+                extra_create_args=extra_create_args, cancellation_token=cancellation_token, **extra,
+            )
+
+        return self.scheduler.run_stream(call, self._estimate_tokens(messages, tools))
+
+    def actual_usage(self) -> RequestUsage:
+        return self._sum_usage(lambda client: client.actual_usage())
+
+    def total_usage(self) -> RequestUsage:
+        return self._sum_usage(lambda client: client.total_usage())
+
+    def _sum_usage(self, get: Callable[[ChatCompletionClient], RequestUsage]) -> RequestUsage:
+        usages = [get(client) for client in self.scheduler.clients]
+        return RequestUsage(
+            prompt_tokens=sum(usage.prompt_tokens for usage in usages),
+            completion_tokens=sum(usage.completion_tokens for usage in usages),
+        )
+
+    def count_tokens(self, messages: Sequence[LLMMessage], **kwargs: Any) -> int:
+        return self._primary.count_tokens(messages, **kwargs)
+
+    def remaining_tokens(self, messages: Sequence[LLMMessage], **kwargs: Any) -> int:
+        return self._primary.remaining_tokens(messages, **kwargs)
+
+    @property
+    def capabilities(self):  # type: ignore
+        return self._primary.capabilities
+
+    @property
+    def model_info(self):  # type: ignore
+        return self._primary.model_info
+
+
+def create_scheduler_from_env(clients: Sequence[ChatCompletionClient]) -> ModelScheduler:
+    """Limites em `MODEL_RPM`, `MODEL_TPM`, `MODEL_MAX_CONCURRENCY` e `MODEL_MAX_RETRIES`."""
+    return ModelScheduler(
+        clients,
+        requests_per_minute=float(os.getenv("MODEL_RPM", "60")),
+        tokens_per_minute=float(os.getenv("MODEL_TPM", "60000")),
+        max_concurrency=int(os.getenv("MODEL_MAX_CONCURRENCY", "8")),
+        max_retries=int(os.getenv("MODEL_MAX_RETRIES", "4")),
+        burst_seconds=float(os.getenv("MODEL_BURST_SECONDS", "10")),
+    )
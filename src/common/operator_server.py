@@ -0,0 +1,47 @@
+import json
+
+from src.agents.operator_queue import OperatorQueue
+
+
+async def handle_operator(websocket, operator_queue: OperatorQueue) -> None:
+    """
+    Endpoint WebSocket dos operadores humanos. Cada mensagem é um JSON com `action`:
+
+        {"action": "list"}
+        {"action": "claim", "session_id": "...", "operator": "ana"}
+        {"action": "answer", "session_id": "...", "operator": "ana", "content": "..."}
+
+    Novas escalações são enviadas aos operadores conectados como {"type": "escalation", ...}.
+    """
+
+    async def notify(event):
+        try:
+            await websocket.send(json.dumps(event))
+        except Exception as e:
+            print(f"Erro ao notificar operador: {e}")
+
+    operator_queue.subscribe(notify)
+    try:
+        await websocket.send(json.dumps({"type": "escalations", "items": operator_queue.pending()}))
+        async for raw in websocket:
+            try:
+                command = json.loads(raw)
+                action = command.get("action")
+                operator = command.get("operator", "operador")
+                if action == "list":
+                    reply = {"type": "escalations", "items": operator_queue.pending()}
+                elif action == "claim":
+                    escalation = operator_queue.claim(command["session_id"], operator)
+                    reply = {"type": "claimed", **escalation.as_dict()}
+                elif action == "answer":
+                    await operator_queue.answer(command["session_id"], operator, command["content"])
+                    reply = {"type": "answered", "session_id": command["session_id"]}
+                else:
+                    reply = {"type": "error", "error": f"Ação desconhecida: {action}"}
+            except (KeyError, ValueError) as e:
+                reply = {"type": "error", "error": str(e)}
+            await websocket.send(json.dumps(reply))
+    except Exception as e:
+        print(f"Conexão do operador encerrada: {e}")
+    finally:
+        operator_queue.unsubscribe(notify)
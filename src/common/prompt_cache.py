@@ -0,0 +1,113 @@
+import contextvars
+import functools
+from typing import Any, Dict, Optional
+
+# Destino do uso reportado pela API na chamada em andamento. O valor é um dicionário mutável:
+# a chamada HTTP roda em outra task (com cópia do contexto) e escreve no mesmo objeto.
+_current_usage: contextvars.ContextVar[Optional[Dict[str, int]]] = contextvars.ContextVar(
+    "prompt_cache_usage", default=None
+)
+
+
+def _record_usage(usage: Any) -> None:
+    holder = _current_usage.get()
+    if holder is None or usage is None:
+        return
+    details = getattr(usage, "prompt_tokens_details", None)
+    holder["prompt_tokens"] = holder.get("prompt_tokens", 0) + (usage.prompt_tokens or 0)
+    holder["cached_tokens"] = holder.get("cached_tokens", 0) + (getattr(details, "cached_tokens", None) or 0)
+
+
+class _UsageObservingStream:
+    """Repassa os chunks de um stream da OpenAI registrando o uso do chunk final."""
+
+    def __init__(self, stream: Any) -> None:
+        self._stream = stream
+
+    def __aiter__(self) -> "_UsageObservingStream":
+        return self
+
+    async def __anext__(self) -> Any:
+        chunk = await self._stream.__anext__()
+        _record_usage(getattr(chunk, "usage", None))
+        return chunk
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._stream, name)
+
+
+def instrument_openai_client(model_client: Any) -> Any:
+    """
+    Intercepta as chamadas do cliente OpenAI/Azure usado pelo autogen para ler
+    `usage.prompt_tokens_details.cached_tokens`, que o `RequestUsage` do autogen descarta.
+    Clientes sem o SDK da OpenAI por baixo (ex.: fakes de teste) são devolvidos sem alteração.
+    """
+    completions = getattr(getattr(getattr(model_client, "_client", None), "chat", None), "completions", None)
+    if completions is None or getattr(completions.create, "_prompt_cache_instrumented", False):
+        return model_client
+    create = completions.create
+
+    @functools.wraps(create)
+    async def create_with_usage(*args: Any, **kwargs: Any) -> Any:
+        response = await create(*args, **kwargs)
+        if kwargs.get("stream"):
+            return _UsageObservingStream(response)
+        _record_usage(getattr(response, "usage", None))
+        return response
+
+    create_with_usage._prompt_cache_instrumented = True
+    completions.create = create_with_usage
+    return model_client
+
+
+def capture_usage() -> Dict[str, int]:
+    """Inicia a captura do uso da próxima chamada ao modelo na task atual e retorna o dicionário preenchido."""
+    holder: Dict[str, int] = {}
+    _current_usage.set(holder)
+    return holder
+
+
+def current_usage() -> Optional[Dict[str, int]]:
+    """Dicionário de uso da chamada em andamento (de `capture_usage`), ou None fora de uma captura."""
+    return _current_usage.get()
+
+
+class PromptCacheStats:
+    def __init__(self) -> None:
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+        self.completion_tokens = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "prompt_tokens": self.prompt_tokens,
+            "cached_tokens": self.cached_tokens,
+            "uncached_tokens": self.prompt_tokens - self.cached_tokens,
+            "completion_tokens": self.completion_tokens,
+            "cache_hit_ratio": round(self.cached_tokens / self.prompt_tokens, 4) if self.prompt_tokens else 0.0,
+        }
+
+
+class PromptCacheMetrics:
+    """Tokens de prompt em cache e fora de cache, acumulados por agente."""
+
+    def __init__(self) -> None:
+        self._agents: Dict[str, PromptCacheStats] = {}
+
+    def record(self, agent: str, prompt_tokens: int, cached_tokens: int, completion_tokens: int) -> None:
+        stats = self._agents.setdefault(agent, PromptCacheStats())
+        stats.calls += 1
+        stats.prompt_tokens += prompt_tokens
+        stats.cached_tokens += cached_tokens
+        stats.completion_tokens += completion_tokens
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {agent: stats.as_dict() for agent, stats in sorted(self._agents.items())}
+
+    def reset(self) -> None:
+        self._agents.clear()
+
+
+prompt_cache_metrics = PromptCacheMetrics()
@@ -0,0 +1,279 @@
+import asyncio
+import gzip
+import hashlib
+import json
+import time
+from collections import deque
+from typing import Any, AsyncGenerator, Deque, Dict, Mapping, Optional, Sequence, Union
+
+from autogen_core import CancellationToken, FunctionCall
+from autogen_core.models import (
+    ChatCompletionClient,
+    CreateResult,
+    FunctionExecutionResultMessage,
+    LLMMessage,
+    ModelCapabilities,
+    RequestUsage,
+)
+from autogen_core.tools import Tool, ToolSchema
+
+from src.common.prompt_cache import current_usage
+
+# Gravação e reprodução de chamadas ao modelo. Cada chamada vira uma linha JSON no arquivo
+# (comprimido com gzip se o nome terminar em `.gz`), indexada pelo hash das mensagens e ferramentas.
+
+
+class ReplayMiss(KeyError):
+    """A requisição não está na gravação."""
+
+
+def _strip_ids(value: Any) -> Any:
+    # Ids de chamadas de ferramenta mudam a cada execução (uuid local ou gerados pela API)
+    if isinstance(value, dict):
+        return {key: _strip_ids(item) for key, item in value.items() if key not in ("id", "call_id")}
+    if isinstance(value, list):
+        return [_strip_ids(item) for item in value]
+    return value
+
+
+def _canonical(message: LLMMessage) -> Dict[str, Any]:
+    if isinstance(message, FunctionExecutionResultMessage):
+        # O resultado de uma ferramenta pode variar (ex.: número de protocolo aleatório); a chamada
+        # que o originou, na mensagem anterior, já identifica a requisição
+        return {"type": "FunctionExecutionResultMessage", "results": len(message.content)}
+    return {"type": type(message).__name__, **_strip_ids(message.model_dump(mode="json"))}
+
+
+def request_key(messages: Sequence[LLMMessage], tools: Sequence[Union[Tool, ToolSchema]] = (),
+                json_output: Optional[bool] = None) -> str:
+    """
+    Hash estável da requisição: mensagens (sem os ids das chamadas nem o conteúdo dos
+    resultados de ferramentas), esquemas das ferramentas e json_output.
+    """
+    payload = {
+        "messages": [_canonical(message) for message in messages],
+        "tools": [tool.schema if isinstance(tool, Tool) else tool for tool in tools],
+        "json_output": json_output,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()[:32]
+
+
+def _open(path: str, mode: str):
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def _encode_result(key: str, result: CreateResult, latency: float) -> Dict[str, Any]:
+    usage = current_usage() or {}
+    content: Any = result.content
+    if isinstance(content, list):
+        content = [{"id": call.id, "name": call.name, "arguments": call.arguments} for call in content]
+    return {
+        "key": key,
+        "latency": round(latency, 4),
+        "finish_reason": result.finish_reason,
+        "content": content,
+        "prompt_tokens": result.usage.prompt_tokens,
+        "completion_tokens": result.usage.completion_tokens,
+        "cached_tokens": usage.get("cached_tokens", 0),
+    }
+
+
+class RecordingChatCompletionClient(ChatCompletionClient):
+    """
+    Repassa as chamadas a `inner` e grava cada par requisição/resposta em `path`, com a
+    latência observada e os tokens (inclusive os de prompt em cache) reportados pela API.
+    """
+
+    def __init__(self, inner: ChatCompletionClient, path: str) -> None:
+        self._inner = inner
+        self._path = path
+        self.recorded = 0
+
+    @property
+    def _client(self) -> Any:
+        # O agendador só repassa argumentos específicos da OpenAI a clientes com `_client`
+        return self._inner._client  # type: ignore[attr-defined]
+
+    def _write(self, entry: Dict[str, Any]) -> None:
+        with _open(self._path, "a") as f:
+            f.write(json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n")
+        self.recorded += 1
+
+    async def create(
+            self,
+            messages: Sequence[LLMMessage],
+            *,
+            tools: Sequence[Union[Tool, ToolSchema]] = [],
+            json_output: Optional[bool] = None,
+            extra_create_args: Mapping[str, Any] = {},
+            cancellation_token: Optional[CancellationToken] = None,
+    ) -> CreateResult:
+        started = time.perf_counter()
+        result = await self._inner.create(
+            messages, tools=tools, json_output=json_output,
+            extra_create_args=extra_create_args, cancellation_token=cancellation_token,
+        )
+        self._write(_encode_result(request_key(messages, tools, json_output), result, time.perf_counter() - started))
+        return result
+
+    async def create_stream(
+            self,
+            messages: Sequence[LLMMessage],
+            *,
+            tools: Sequence[Union[Tool, ToolSchema]] = [],
+            json_output: Optional[bool] = None,
+            extra_create_args: Mapping[str, Any] = {},
+            cancellation_token: Optional[CancellationToken] = None,
+            **kwargs: Any,
+    ) -> AsyncGenerator[Union[str, CreateResult], None]:
+        started = time.perf_counter()
+        async for chunk in self._inner.create_stream(
+                messages, tools=tools, json_output=json_output,
+                extra_create_args=extra_create_args, cancellation_token=cancellation_token, **kwargs,
+        ):
+            if isinstance(chunk, CreateResult):
+                self._write(_encode_result(
+                    request_key(messages, tools, json_output), chunk, time.perf_counter() - started
+                ))
+            yield chunk
+
+    def actual_usage(self) -> RequestUsage:
+        return self._inner.actual_usage()
+
+    def total_usage(self) -> RequestUsage:
+        return self._inner.total_usage()
+
+    def count_tokens(self, messages: Sequence[LLMMessage], **kwargs: Any) -> int:
+        return self._inner.count_tokens(messages, **kwargs)
+
+    def remaining_tokens(self, messages: Sequence[LLMMessage], **kwargs: Any) -> int:
+        return self._inner.remaining_tokens(messages, **kwargs)
+
+    @property
+    def capabilities(self):  # type: ignore
+        return self._inner.capabilities
+
+    @property
+    def model_info(self):  # type: ignore
+        return self._inner.model_info
+
+
+class ReplayChatCompletionClient(ChatCompletionClient):
+    """
+    Reproduz uma gravação do `RecordingChatCompletionClient`, sem rede. Cada requisição é
+    procurada pelo hash; requisições idênticas recebem as respostas na ordem gravada (a
+    última se repete quando acabam). A latência gravada é multiplicada por `latency_scale`.
+    Sem `miss_reply`, uma requisição fora da gravação levanta `ReplayMiss`.
+    """
+
+    def __init__(self, path: str, latency_scale: float = 1.0, miss_reply: Optional[str] = None) -> None:
+        self._entries: Dict[str, Deque[Dict[str, Any]]] = {}
+        with _open(path, "r") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self._entries.setdefault(entry["key"], deque()).append(entry)
+        self._latency_scale = latency_scale
+        self._miss_reply = miss_reply
+        self._total = RequestUsage(prompt_tokens=0, completion_tokens=0)
+        self.calls = 0
+        self.misses = 0
+        self.cached_tokens = 0
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self._entries.values())
+
+    def _next(self, key: str) -> Optional[Dict[str, Any]]:
+        entries = self._entries.get(key)
+        if not entries:
+            return None
+        return entries.popleft() if len(entries) > 1 else entries[0]
+
+    async def _replay(self, messages: Sequence[LLMMessage], tools: Sequence[Union[Tool, ToolSchema]],
+                      json_output: Optional[bool]) -> CreateResult:
+        key = request_key(messages, tools, json_output)
+        entry = self._next(key)
+        self.calls += 1
+        if entry is None:
+            self.misses += 1
+            if self._miss_reply is None:
+                raise ReplayMiss(key)
+            entry = {"latency": 0.0, "finish_reason": "stop", "content": self._miss_reply,
+                     "prompt_tokens": 0, "completion_tokens": 0, "cached_tokens": 0}
+        if entry["latency"] and self._latency_scale:
+            await asyncio.sleep(entry["latency"] * self._latency_scale)
+
+        holder = current_usage()
+        if holder is not None:
+            holder["prompt_tokens"] = holder.get("prompt_tokens", 0) + entry["prompt_tokens"]
+            holder["cached_tokens"] = holder.get("cached_tokens", 0) + entry["cached_tokens"]
+        self.cached_tokens += entry["cached_tokens"]
+        usage = RequestUsage(prompt_tokens=entry["prompt_tokens"], completion_tokens=entry["completion_tokens"])
+        self._total = RequestUsage(
+            prompt_tokens=self._total.prompt_tokens + usage.prompt_tokens,
+            completion_tokens=self._total.completion_tokens + usage.completion_tokens,
+        )
+        content = entry["content"]
+        if isinstance(content, list):
+            content = [FunctionCall(id=call["id"], name=call["name"], arguments=call["arguments"]) for call in content]
+        return CreateResult(finish_reason=entry["finish_reason"], content=content, usage=usage, cached=False)
+
+    async def create(
+            self,
+            messages: Sequence[LLMMessage],
+            *,
+            tools: Sequence[Union[Tool, ToolSchema]] = [],
+            json_output: Optional[bool] = None,
+            extra_create_args: Mapping[str, Any] = {},
+            cancellation_token: Optional[CancellationToken] = None,
+    ) -> CreateResult:
+        return await self._replay(messages, tools, json_output)
+
+    async def create_stream(
+            self,
+            messages: Sequence[LLMMessage],
+            *,
+            tools: Sequence[Union[Tool, ToolSchema]] = [],
+            json_output: Optional[bool] = None,
+            extra_create_args: Mapping[str, Any] = {},
+            cancellation_token: Optional[CancellationToken] = None,
+            **kwargs: Any,
+    ) -> AsyncGenerator[Union[str, CreateResult], None]:
+        result = await self._replay(messages, tools, json_output)
+        if isinstance(result.content, str):
+            for word in result.content.split(" "):
+                yield word + " "
+        yield result
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "calls": self.calls,
+            "misses": self.misses,
+            "prompt_tokens": self._total.prompt_tokens,
+            "cached_tokens": self.cached_tokens,
+            "completion_tokens": self._total.completion_tokens,
+        }
+
+    def actual_usage(self) -> RequestUsage:
+        return self._total
+
+    def total_usage(self) -> RequestUsage:
+        return self._total
+
+    def count_tokens(self, messages: Sequence[LLMMessage], **kwargs: Any) -> int:
+        from src.agents.context_window import token_counter
+
+        return sum(token_counter.count(message) for message in messages)
+
+    def remaining_tokens(self, messages: Sequence[LLMMessage], **kwargs: Any) -> int:
+        return 128000 - self.count_tokens(messages)
+
+    @property
+    def capabilities(self) -> ModelCapabilities:  # type: ignore
+        return ModelCapabilities(vision=False, function_calling=True, json_output=True)
+
+    @property
+    def model_info(self):  # type: ignore
+        return {"vision": False, "function_calling": True, "json_output": True, "family": "gpt-4o"}
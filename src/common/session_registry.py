@@ -0,0 +1,128 @@
+import asyncio
+import json
+from typing import Any, Dict, List, Optional, Set
+
+from autogen_core import AgentId
+
+from src.common.metrics import websocket_send_failures
+from src.common.tracing import span
+
+
+class SessionRegistry:
+    """
+    Mapeia cada sessão (o `TopicId.source` usado pelos agentes) para o WebSocket
+    do cliente. Permite que um único runtime compartilhado entregue as respostas
+    ao socket correto sem capturar o websocket na factory de cada agente.
+    """
+
+    def __init__(self) -> None:
+        self._sockets: Dict[str, Any] = {}
+        self._closed: Dict[str, asyncio.Event] = {}
+
+    def __len__(self) -> int:
+        return len(self._sockets)
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._sockets
+
+    def register(self, session_id: str, websocket: Any) -> None:
+        self._sockets[session_id] = websocket
+        self._closed[session_id] = asyncio.Event()
+
+    def unregister(self, session_id: str) -> None:
+        self._sockets.pop(session_id, None)
+        closed = self._closed.pop(session_id, None)
+        if closed is not None:
+            closed.set()
+
+    def get(self, session_id: str) -> Optional[Any]:
+        return self._sockets.get(session_id)
+
+    def close(self, session_id: str) -> None:
+        """Sinaliza o fim da sessão (ex.: o usuário digitou 'exit')."""
+        closed = self._closed.get(session_id)
+        if closed is not None:
+            closed.set()
+
+    def close_all(self) -> None:
+        """Sinaliza o fim de todas as sessões (desligamento do servidor)."""
+        for session_id in list(self._closed):
+            self.close(session_id)
+
+    async def wait_closed(self, session_id: str) -> None:
+        """Aguarda até a sessão ser encerrada pelo agente ou o socket ser fechado pelo cliente."""
+        closed = self._closed.get(session_id)
+        if closed is None:
+            return
+        waiters = [asyncio.ensure_future(closed.wait())]
+        websocket = self._sockets.get(session_id)
+        if hasattr(websocket, "wait_closed"):
+            waiters.append(asyncio.ensure_future(websocket.wait_closed()))
+        _, pending = await asyncio.wait(waiters, return_when=asyncio.FIRST_COMPLETED)
+        for waiter in pending:
+            waiter.cancel()
+
+    async def recv(self, session_id: str) -> Optional[str]:
+        """
+        Recebe a próxima mensagem do cliente da sessão.
+
+        Returns:
+            O texto recebido ou None se a sessão não existir ou a conexão tiver sido fechada.
+        """
+        websocket = self._sockets.get(session_id)
+        if websocket is None:
+            return None
+        try:
+            return await websocket.recv()
+        except Exception as e:
+            print(f"Erro ao receber mensagem via WebSocket ({session_id}): {e}")
+            self.close(session_id)
+            return None
+
+    async def send(self, session_id: str, payload: Any) -> bool:
+        """
+        Envia um payload (dict serializado como JSON ou texto) para o socket da sessão.
+
+        Returns:
+            True se a mensagem foi enviada, False caso contrário.
+        """
+        websocket = self._sockets.get(session_id)
+        if websocket is None:
+            return False
+        data = payload if isinstance(payload, str) else json.dumps(payload)
+        with span("websocket.send", session_id, bytes=len(data)) as send_span:
+            try:
+                await websocket.send(data)
+                return True
+            except Exception as e:
+                send_span.set_attribute("error", True)
+                websocket_send_failures.inc()
+                print(f"Erro ao enviar mensagem via WebSocket ({session_id}): {e}")
+                return False
+
+
+class SessionAgents:
+    """
+    Registra os `AgentId` instanciados para cada sessão (a chave do agente). O runtime não expõe
+    as instâncias que criou, então é este registro que diz o que descartar quando a sessão termina.
+    """
+
+    def __init__(self) -> None:
+        self._agents: Dict[str, Set[AgentId]] = {}
+
+    def __len__(self) -> int:
+        return len(self._agents)
+
+    def add(self, agent_id: AgentId) -> None:
+        self._agents.setdefault(agent_id.key, set()).add(agent_id)
+
+    def sessions(self) -> List[str]:
+        return list(self._agents)
+
+    def pop(self, session_id: str) -> List[AgentId]:
+        """Remove e retorna os agentes registrados para a sessão."""
+        return list(self._agents.pop(session_id, ()))
+
+
+# Registro compartilhado pelos agentes do processo (preenchido no construtor de cada agente)
+session_agents = SessionAgents()
@@ -0,0 +1,72 @@
+import os
+from typing import Any, Optional
+
+from opentelemetry import trace
+
+# Spans dos agentes, ferramentas e WebSocket. Sem `configure_tracing` o provider global é o
+# no-op da API do OpenTelemetry e os spans não custam praticamente nada.
+tracer = trace.get_tracer("vivo.agents")
+
+
+def span(name: str, session_id: Optional[str] = None, **attributes: Any):
+    """Abre um span filho do span atual, com o id da sessão e os atributos não nulos."""
+    if session_id is not None:
+        attributes["session.id"] = session_id
+    return tracer.start_as_current_span(
+        name, attributes={key: value for key, value in attributes.items() if value is not None}
+    )
+
+
+def record_span(name: str, start_time_ns: int, session_id: Optional[str] = None, **attributes: Any) -> None:
+    """Registra um span já concluído que começou em `start_time_ns` (time.time_ns) e termina agora."""
+    if session_id is not None:
+        attributes["session.id"] = session_id
+    tracer.start_span(
+        name, start_time=start_time_ns, attributes={key: value for key, value in attributes.items() if value is not None}
+    ).end()
+
+
+def configure_tracing(service_name: str = "vivo-agents") -> Optional[Any]:
+    """
+    Configura a exportação dos spans conforme `TRACING_EXPORTER`:
+
+    - `otlp`: coletor OpenTelemetry local (endpoint nas variáveis padrão `OTEL_EXPORTER_OTLP_*`);
+    - `file`: um span JSON por linha em `TRACING_FILE` (padrão `traces.jsonl`);
+    - `console`: spans no stdout;
+    - `langtrace`: SDK do Langtrace (`LANGTRACE_API_KEY`), importado só quando escolhido.
+
+    Requer o `opentelemetry-sdk` (e o exporter OTLP para `otlp`). Retorna o TracerProvider,
+    que também é passado ao runtime do autogen, ou None com o tracing desativado.
+    """
+    exporter_name = os.getenv("TRACING_EXPORTER", "none").lower()
+    if exporter_name in ("", "none"):
+        return None
+    if exporter_name == "langtrace":
+        from langtrace_python_sdk import langtrace
+
+        langtrace.init(api_key=os.getenv("LANGTRACE_API_KEY"))
+        return trace.get_tracer_provider()
+    try:
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+    except ImportError:
+        print("opentelemetry-sdk não está instalado; tracing desativado.")
+        return None
+
+    if exporter_name == "otlp":
+        from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
+
+        exporter = OTLPSpanExporter()
+    elif exporter_name == "file":
+        out = open(os.getenv("TRACING_FILE", "traces.jsonl"), "a", encoding="utf-8")
+        exporter = ConsoleSpanExporter(out=out, formatter=lambda s: s.to_json(indent=None) + os.linesep)
+    elif exporter_name == "console":
+        exporter = ConsoleSpanExporter()
+    else:
+        raise ValueError(f"TRACING_EXPORTER desconhecido: {exporter_name}")
+
+    provider = TracerProvider(resource=Resource.create({"service.name": service_name}))
+    provider.add_span_processor(BatchSpanProcessor(exporter))
+    trace.set_tracer_provider(provider)
+    return provider
@@ -4,10 +4,20 @@ from dotenv import load_dotenv
 
 # Carregar variáveis do arquivo `.env`
 load_dotenv()
-from autogen_ext.models.openai import AzureOpenAIChatCompletionClient
 
+from src.common.lazy_model_client import LazyChatCompletionClient
+from src.common.metrics import registry
+from src.common.model_scheduler import ScheduledChatCompletionClient, create_scheduler_from_env
+from src.common.prompt_cache import instrument_openai_client
+
+# Cliente compartilhado por todos os agentes e sessões do processo
+_model_client = None
+
+
+def create_azure_client():
+    # Importado só aqui: o SDK da OpenAI é a maior parte do tempo de import do servidor
+    from autogen_ext.models.openai import AzureOpenAIChatCompletionClient
 
-def get_model_client():
     azure_deployment = os.getenv("AZURE_OPENAI_API_VERSION")
     key = os.getenv("AZURE_OPENAI_API_KEY")
     api_version = os.getenv("AZURE_OPENAI_API_VERSION")
@@ -21,13 +31,78 @@ def get_model_client():
             "Credenciais do Azure OpenAI estão faltando. Por favor, defina as variáveis de ambiente apropriadas."
         )
 
-    # Configura o cliente AzureOpenAI
-    return AzureOpenAIChatCompletionClient(
+    # Configura o cliente AzureOpenAI, registrando os tokens de prompt servidos do cache.
+    # As repetições por 429 ficam com o agendador (Retry-After), não com o SDK.
+    return instrument_openai_client(AzureOpenAIChatCompletionClient(
         model="gpt-4o",
         api_key=key,
         api_version=api_version,
-        azure_endpoint=azure_endpoint
-    )
+        azure_endpoint=azure_endpoint,
+        max_retries=0,
+    ))
+
+
+def get_model_client():
+    """
+    Retorna o cliente de modelo do processo: o cliente do Azure (ou o falso, com
+    `MODEL_BACKEND=fake`) atrás do agendador de chamadas, que aplica os limites de taxa.
+
+    Com `MODEL_BACKEND=replay` as respostas vêm da gravação em `MODEL_REPLAY_PATH`
+    (latências multiplicadas por `MODEL_REPLAY_LATENCY_SCALE`); com `MODEL_RECORD_PATH`
+    as chamadas ao backend escolhido são gravadas nesse arquivo.
+
+    O cliente do Azure só é criado no primeiro uso (ou em `warm_up_model_client`).
+    """
+    global _model_client
+    if _model_client is None:
+        backend = os.getenv("MODEL_BACKEND", "azure").lower()
+        if backend == "fake":
+            from src.common.fake_model_client import FakeChatCompletionClient
+
+            client = FakeChatCompletionClient(latency=float(os.getenv("FAKE_MODEL_LATENCY", "0.05")))
+        elif backend == "replay":
+            from src.common.replay_model_client import ReplayChatCompletionClient
+
+            client = ReplayChatCompletionClient(
+                os.environ["MODEL_REPLAY_PATH"],
+                latency_scale=float(os.getenv("MODEL_REPLAY_LATENCY_SCALE", "1.0")),
+            )
+        else:
+            client = LazyChatCompletionClient(create_azure_client)
+        if os.getenv("MODEL_RECORD_PATH"):
+            from src.common.replay_model_client import RecordingChatCompletionClient
+
+            client = RecordingChatCompletionClient(client, os.environ["MODEL_RECORD_PATH"])
+        scheduler = create_scheduler_from_env([client])
+        _model_client = ScheduledChatCompletionClient(scheduler)
+
+        def collect():
+            stats = scheduler.stats
+            yield ("agent_scheduler_requests", "counter", "Requisições enviadas ao modelo pelo agendador",
+                   [({}, stats["calls"])])
+            yield ("agent_scheduler_rate_limited", "counter", "Respostas 429 recebidas pelo agendador",
+                   [({}, stats["rate_limited"])])
+            yield ("agent_scheduler_queue_seconds", "counter", "Tempo total de espera na fila do agendador",
+                   [({}, stats["queue_seconds"])])
+            yield ("agent_scheduler_queued", "gauge", "Chamadas aguardando na fila do agendador",
+                   [({}, scheduler.queued())])
+
+        registry.register_collector("model_scheduler", collect)
+    return _model_client
+
 
+def warm_up_model_client() -> None:
+    """Cria os clientes adiados (bloqueante: chamar numa thread depois de o servidor estar no ar)."""
+    scheduler = getattr(get_model_client(), "scheduler", None)
+    for client in scheduler.clients if scheduler is not None else []:
+        # Desce pelos wrappers (ex.: gravação) até o cliente adiado, se houver
+        while client is not None and not hasattr(client, "warm_up"):
+            client = getattr(client, "_inner", None)
+        if client is not None:
+            client.warm_up()
 
 
+def set_model_client(client) -> None:
+    """Substitui o cliente de modelo do processo (testes, benchmarks e replays); None recria na próxima chamada."""
+    global _model_client
+    _model_client = client
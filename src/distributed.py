@@ -0,0 +1,350 @@
+"""
+Modo distribuído: os agentes especialistas (triagem, vendas, reparos e cancelamento) rodam
+em processos ou máquinas separados, ligados pelo runtime gRPC do autogen
+(`pip install "autogen-ext[grpc]"`). O gateway WebSocket continua num único processo.
+
+    # Tudo nesta máquina: host gRPC, um processo por grupo de agentes e o gateway
+    python -m src.distributed all --agents triage --agents sales,issues,cancellation
+
+    # Papéis separados (cada um pode rodar em outra máquina)
+    python -m src.distributed host --address 0.0.0.0:50051
+    python -m src.distributed agents --host-address 10.0.0.1:50051 --agents sales
+    python -m src.distributed gateway --host-address 10.0.0.1:50051 --port 5000
+
+O host entrega cada mensagem ao processo que registrou o tipo do agente de destino. Cada
+tipo é registrado por um único processo (o host do autogen 0.4 não divide um tipo entre
+workers): a capacidade cresce movendo os especialistas mais usados para processos ou
+máquinas próprios, cada um com seu event loop e seu agendador de chamadas ao modelo.
+
+O gateway hospeda os agentes do usuário e humano (fila de operadores) e os especialistas
+passados em `--agents`. Os especialistas remotos não têm o WebSocket da sessão: a resposta
+final segue na `AgentResponse` e o gateway a entrega ao cliente (sem streaming). O
+histórico de cada processo é local e as mensagens levam só o delta do turno: o processo
+que ainda não viu a sessão (ou a descartou por ociosidade) pede ao remetente, uma única
+vez, as entradas que faltam (`merge_delta`).
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import signal
+import socket
+import sys
+import time
+from multiprocessing.connection import wait
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+# Nomes aceitos em `--agents`
+SPECIALIST_AGENTS = ("triage", "sales", "issues", "cancellation")
+
+# Prazo para o host e os processos de agentes ficarem prontos no modo `all`
+STARTUP_TIMEOUT = 60.0
+
+
+def grpc_runtime() -> Any:
+    """Importa o runtime gRPC do autogen (dependência opcional, usada só neste modo)."""
+    try:
+        from autogen_ext.runtimes import grpc
+    except ImportError as e:
+        raise RuntimeError('O modo distribuído requer o runtime gRPC do autogen: pip install "autogen-ext[grpc]"') from e
+    return grpc
+
+
+def specialist_registrations() -> Dict[str, Callable]:
+    from src.agents.ai_agents.cancellation_agent import register_cancellation_agent
+    from src.agents.ai_agents.issu_repair_agent import register_issues_and_repairs_agent
+    from src.agents.ai_agents.sales_agent import register_sales_agent
+    from src.agents.ai_agents.triage_agent import register_triage_agent
+
+    return {
+        "triage": register_triage_agent,
+        "sales": register_sales_agent,
+        "issues": register_issues_and_repairs_agent,
+        "cancellation": register_cancellation_agent,
+    }
+
+
+def connect(host_address: str) -> Any:
+    """Cria e conecta ao host o runtime gRPC deste processo."""
+    from autogen_core import try_get_known_serializers_for_type
+
+    from src.agents.responses import (
+        AgentResponse,
+        HistoryEntries,
+        HistoryRequest,
+        OperatorAnswer,
+        UserLogin,
+        UserTask,
+    )
+    from src.common.tracing import configure_tracing
+
+    grpc = grpc_runtime()
+    runtime = grpc.GrpcWorkerAgentRuntime(host_address=host_address, tracer_provider=configure_tracing())
+    # O registro de um agente só adiciona os serializadores das mensagens que ele trata;
+    # os especialistas também publicam AgentResponse, tratada no gateway, e recebem HistoryEntries
+    for message_type in (UserLogin, UserTask, AgentResponse, OperatorAnswer, HistoryRequest, HistoryEntries):
+        runtime.add_message_serializer(try_get_known_serializers_for_type(message_type))
+    runtime.start()
+    return runtime
+
+
+async def register_specialists(runtime: Any, names: Sequence[str], sessions: Any) -> None:
+    if not names:
+        return
+    from src.config import get_model_client
+
+    registrations = specialist_registrations()
+    model_client = get_model_client()
+    for name in names:
+        await registrations[name](runtime, model_client, sessions)
+
+
+async def evict_idle_sessions(runtime: Any, idle: float, shutdown: asyncio.Event) -> None:
+    """
+    Descarta as instâncias e o histórico das sessões sem mensagens novas há `idle` segundos.
+    O fim da sessão só é visto pelo gateway; uma sessão descartada que voltar a receber
+    mensagens pede ao remetente o histórico que falta e é recriada sem perda.
+    """
+    from src.agents.conversation_store import conversation_store
+    from src.common.session_registry import session_agents
+    from src.main import release_session
+
+    seen: Dict[str, Tuple[int, float]] = {}
+    while not shutdown.is_set():
+        try:
+            await asyncio.wait_for(shutdown.wait(), timeout=idle / 2)
+        except asyncio.TimeoutError:
+            pass
+        now = time.monotonic()
+        active = set(session_agents.sessions())
+        for session_id in active:
+            length = len(conversation_store.snapshot(session_id))
+            previous = seen.get(session_id)
+            if previous is None or previous[0] != length:
+                seen[session_id] = (length, now)
+            elif now - previous[1] >= idle:
+                release_session(runtime, session_id)
+                del seen[session_id]
+        for session_id in set(seen) - active:
+            del seen[session_id]
+
+
+async def run_host(address: str, shutdown: asyncio.Event) -> None:
+    host = grpc_runtime().GrpcWorkerAgentRuntimeHost(address=address)
+    host.start()
+    print(f"Host gRPC dos agentes em {address}", flush=True)
+    await shutdown.wait()
+    await host.stop()
+
+
+async def run_agents(host_address: str, names: Sequence[str], idle: float, shutdown: asyncio.Event,
+                     ready: Optional[Any] = None) -> None:
+    from src.common.metrics import start_metrics_server
+    from src.config import warm_up_model_client
+
+    runtime = connect(host_address)
+    # Sem registro de sessões: as respostas seguem para o gateway na AgentResponse
+    await register_specialists(runtime, names, None)
+    metrics_server = await start_metrics_server()
+    try:
+        # Sem conexões de clientes neste processo: o cliente do modelo é preparado antes de ficar pronto
+        await asyncio.to_thread(warm_up_model_client)
+    except Exception as e:
+        print(f"Falha ao preparar o cliente do modelo: {e}")
+    evictor = asyncio.create_task(evict_idle_sessions(runtime, idle, shutdown))
+    print(f"Agentes {', '.join(names)} conectados ao host {host_address}", flush=True)
+    if ready is not None:
+        ready.set()
+    try:
+        await shutdown.wait()
+    finally:
+        evictor.cancel()
+        if metrics_server is not None:
+            metrics_server.close()
+        # Espera os turnos em andamento terminarem antes de desconectar
+        await runtime.stop()
+
+
+async def run_gateway(host_address: str, names: Sequence[str], host: str, port: int, operator_port: int,
+                      grace: float, shutdown: asyncio.Event) -> None:
+    from src import main as server
+    from src.agents.human.agent import register_human_agent
+    from src.agents.user.agent import register_user_agent
+
+    runtime = connect(host_address)
+    # Especialistas hospedados no gateway têm acesso aos WebSockets (e ao streaming)
+    await register_specialists(runtime, names, server.sessions)
+    await register_human_agent(runtime, server.operator_queue)
+    await register_user_agent(runtime, server.sessions)
+    server.operator_queue.bind(runtime)
+    server.set_runtime(runtime)
+    await server.serve(host=host, port=port, operator_port=operator_port, shutdown=shutdown, grace=grace)
+
+
+def run_role(role: Callable, *args: Any, signals: Sequence[signal.Signals] = (signal.SIGINT, signal.SIGTERM),
+             env: Optional[Dict[str, str]] = None, **kwargs: Any) -> None:
+    """Roda um papel no event loop do processo até um dos `signals`."""
+    os.environ.update(env or {})
+
+    async def role_main() -> None:
+        shutdown = asyncio.Event()
+        for signum in signals:
+            asyncio.get_running_loop().add_signal_handler(signum, shutdown.set)
+        await role(*args, shutdown=shutdown, **kwargs)
+
+    asyncio.run(role_main())
+
+
+def run_child(role: Callable, *args: Any, **kwargs: Any) -> None:
+    """Ponto de entrada dos processos do modo `all`."""
+    # Ctrl+C chega a todo o grupo de processos; quem coordena o desligamento é o processo principal
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    run_role(role, *args, signals=(signal.SIGTERM,), **kwargs)
+
+
+def wait_for_port(address: str, timeout: float) -> None:
+    host, port = address.rsplit(":", 1)
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            with socket.create_connection((host, int(port)), timeout=1.0):
+                return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"O host gRPC não respondeu em {address}")
+            time.sleep(0.1)
+
+
+class Launcher:
+    """Modo `all`: host, processos de agentes e gateway numa única máquina."""
+
+    def __init__(self, args: argparse.Namespace) -> None:
+        self._args = args
+        self._context = multiprocessing.get_context("fork")
+        self._processes: List[Tuple[str, multiprocessing.Process]] = []
+        self._stopping = False
+
+    def _spawn(self, name: str, role: Callable, *args: Any, **kwargs: Any) -> multiprocessing.Process:
+        process = self._context.Process(target=run_child, args=(role, *args), kwargs=kwargs, name=name)
+        process.start()
+        self._processes.append((name, process))
+        print(f"{name} iniciado (pid {process.pid})", flush=True)
+        return process
+
+    def _request_stop(self, signum, frame) -> None:
+        self._stopping = True
+
+    def _wait_ready(self, ready: Any, process: multiprocessing.Process) -> None:
+        deadline = time.monotonic() + STARTUP_TIMEOUT
+        while not ready.wait(0.2):
+            if not process.is_alive() or time.monotonic() > deadline:
+                raise RuntimeError(f"{process.name} não ficou pronto (código {process.exitcode})")
+
+    def start(self) -> None:
+        args = self._args
+        groups = args.agents or [[name] for name in SPECIALIST_AGENTS]
+        # Especialistas fora de `--agents` ficam no gateway
+        local = [name for name in SPECIALIST_AGENTS if all(name not in group for group in groups)]
+        self._spawn("host", run_host, args.address)
+        wait_for_port(args.address, STARTUP_TIMEOUT)
+
+        # Cada processo com especialistas tem o próprio agendador: a cota da API é dividida entre eles
+        quotas = {name: str(float(os.getenv(name, default)) / (len(groups) + bool(local)))
+                  for name, default in (("MODEL_RPM", "60"), ("MODEL_TPM", "60000"))}
+        metrics_port = int(os.getenv("METRICS_PORT", "9100"))
+        for index, names in enumerate(groups):
+            env = dict(quotas, WORKER_INDEX=str(index))
+            if metrics_port:
+                env["METRICS_PORT"] = str(metrics_port + 1 + index)
+            ready = self._context.Event()
+            process = self._spawn(f"agents-{'+'.join(names)}", run_agents, args.address, names, args.session_idle,
+                                  ready=ready, env=env)
+            # O gateway só abre a porta com todos os tipos registrados no host
+            self._wait_ready(ready, process)
+        self._spawn("gateway", run_gateway, args.address, local, args.host, args.port, args.operator_port,
+                    args.grace, env=quotas if local else None)
+
+    def run(self) -> int:
+        signal.signal(signal.SIGINT, self._request_stop)
+        signal.signal(signal.SIGTERM, self._request_stop)
+        try:
+            self.start()
+        except Exception as e:
+            print(f"Falha ao iniciar o modo distribuído: {e}", flush=True)
+            self.shutdown()
+            return 1
+        failed = None
+        while not self._stopping and failed is None:
+            wait([process.sentinel for _, process in self._processes], timeout=0.5)
+            failed = next((name for name, process in self._processes if not process.is_alive()), None)
+        if failed is not None:
+            print(f"{failed} saiu inesperadamente; encerrando os demais processos", flush=True)
+        self.shutdown()
+        return 0 if failed is None else 1
+
+    def shutdown(self) -> None:
+        # Ordem inversa: o gateway drena as sessões enquanto os agentes ainda respondem,
+        # e o host é o último a sair
+        for name, process in reversed(self._processes):
+            if process.is_alive():
+                os.kill(process.pid, signal.SIGTERM)
+            process.join(self._args.grace + 5)
+            if process.is_alive():
+                print(f"{name} não terminou no prazo; finalizando", flush=True)
+                process.kill()
+                process.join()
+
+
+def parse_agents(value: str) -> List[str]:
+    names = [name.strip() for name in value.split(",") if name.strip()]
+    unknown = [name for name in names if name not in SPECIALIST_AGENTS]
+    if unknown:
+        raise argparse.ArgumentTypeError(
+            f"agentes desconhecidos: {', '.join(unknown)} (opções: {', '.join(SPECIALIST_AGENTS)})"
+        )
+    return names
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("role", choices=["all", "host", "agents", "gateway"])
+    parser.add_argument("--address", "--host-address", dest="address",
+                        default=os.getenv("AGENT_HOST_ADDRESS", "localhost:50051"),
+                        help="endereço do host gRPC (em `host`, o endereço em que ele escuta)")
+    parser.add_argument("--agents", type=parse_agents, action="append",
+                        help="especialistas deste processo, separados por vírgula; em `all`, cada "
+                             "ocorrência é um processo e os demais ficam no gateway "
+                             "(padrão: um processo por especialista)")
+    parser.add_argument("--host", default=os.getenv("HOST", "localhost"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "5000")))
+    parser.add_argument("--operator-port", type=int, default=int(os.getenv("OPERATOR_PORT", "5001")))
+    parser.add_argument("--grace", type=float, default=float(os.getenv("SHUTDOWN_GRACE", "30")),
+                        help="segundos para as sessões abertas terminarem no desligamento")
+    parser.add_argument("--session-idle", type=float, default=float(os.getenv("SESSION_IDLE_TIMEOUT", "600")),
+                        help="segundos sem mensagens até um processo de agentes descartar a sessão; "
+                             "se ela voltar, o histórico é pedido de novo ao remetente")
+    args = parser.parse_args()
+    names = [name for group in args.agents or [] for name in group]
+    if len(names) != len(set(names)):
+        parser.error("cada tipo de agente pode ser registrado por um único processo")
+
+    try:
+        grpc_runtime()
+    except RuntimeError as e:
+        parser.error(str(e))
+    if args.role == "all":
+        if sys.platform == "win32":
+            parser.error("o modo `all` requer fork (Linux/macOS); inicie cada papel separadamente")
+        sys.exit(Launcher(args).run())
+    if args.role == "host":
+        run_role(run_host, args.address)
+    elif args.role == "agents":
+        if not names:
+            parser.error("informe os especialistas deste processo com --agents")
+        run_role(run_agents, args.address, names, args.session_idle)
+    else:
+        run_role(run_gateway, args.address, names, args.host, args.port, args.operator_port, args.grace)
+
+
+if __name__ == "__main__":
+    main()
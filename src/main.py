@@ -1,56 +1,190 @@
 import asyncio
+import os
+import signal
+import time
 import uuid
+from typing import Optional
 
 from autogen_core import (
     SingleThreadedAgentRuntime,
     TopicId,
 )
 import websockets
-from langtrace_python_sdk import langtrace
 
 from src.agents.ai_agents.cancellation_agent import register_cancellation_agent
 from src.agents.ai_agents.issu_repair_agent import register_issues_and_repairs_agent
 from src.agents.ai_agents.sales_agent import register_sales_agent
 from src.agents.ai_agents.triage_agent import register_triage_agent
+from src.agents.conversation_store import conversation_store
 from src.agents.human.agent import register_human_agent
+from src.agents.operator_queue import OperatorQueue
 from src.agents.responses import UserLogin
 from src.agents.user.agent import register_user_agent
-from src.common.websockt_manager import WebSocketManager
-from src.config import get_model_client
+from src.common.metrics import active_sessions, start_metrics_server
+from src.common.operator_server import handle_operator
+from src.common.session_registry import SessionRegistry, session_agents
+from src.common.tracing import configure_tracing
+from src.config import get_model_client, warm_up_model_client
 from src.utils.topics import user_topic_type
 
 
-async def start(websocket):
-    runtime = SingleThreadedAgentRuntime()
+# Um único runtime e um único conjunto de tipos de agentes atendem todas as conexões.
+# Cada conexão vira uma sessão (o `TopicId.source`) no registro de sessões.
+sessions = SessionRegistry()
+active_sessions.set_function(lambda: len(sessions))
+operator_queue = OperatorQueue()
+_runtime: Optional[SingleThreadedAgentRuntime] = None
+_runtime_lock = asyncio.Lock()
+
+
+async def create_runtime(sessions: SessionRegistry) -> SingleThreadedAgentRuntime:
+    # Os spans do runtime (publicação e entrega de mensagens) usam o mesmo provider dos spans dos agentes
+    runtime = SingleThreadedAgentRuntime(tracer_provider=configure_tracing())
 
     model_client = get_model_client()
 
-    await register_triage_agent(runtime, model_client, websocket)
-    await register_sales_agent(runtime, model_client, websocket)
-    await register_issues_and_repairs_agent(runtime, model_client, websocket)
-    await register_cancellation_agent(runtime, model_client, websocket)
+    await register_triage_agent(runtime, model_client, sessions)
+    await register_sales_agent(runtime, model_client, sessions)
+    await register_issues_and_repairs_agent(runtime, model_client, sessions)
+    await register_cancellation_agent(runtime, model_client, sessions)
 
     # Register the human agent.
-    await register_human_agent(runtime)
+    await register_human_agent(runtime, operator_queue)
 
     # Register the user agent.
-    await register_user_agent(runtime, websocket)
+    await register_user_agent(runtime, sessions)
 
     # Start the runtime.
     runtime.start()
+    operator_queue.bind(runtime)
+    return runtime
+
+
+async def get_runtime() -> SingleThreadedAgentRuntime:
+    """Retorna o runtime compartilhado, criando-o na primeira chamada."""
+    global _runtime
+    async with _runtime_lock:
+        if _runtime is None:
+            _runtime = await create_runtime(sessions)
+    return _runtime
+
+
+def set_runtime(runtime) -> None:
+    """
+    Usa um runtime já criado e com os agentes registrados no lugar do runtime local
+    (ex.: o runtime gRPC do gateway no modo distribuído, `src/distributed.py`).
+    """
+    global _runtime
+    _runtime = runtime
+
+
+def release_session(runtime: SingleThreadedAgentRuntime, session_id: str) -> None:
+    """
+    Descarta as instâncias de agentes e o histórico criados para uma sessão encerrada, evitando
+    que o runtime de longa duração acumule estado para cada conexão antiga.
+    """
+    # O runtime não tem API pública para descartar instâncias: os ids vêm do nosso registro e a
+    # remoção usa o dicionário interno, falhando alto se uma versão do autogen deixar de tê-lo.
+    instantiated = getattr(runtime, "_instantiated_agents", None)
+    if instantiated is None:
+        raise RuntimeError(f"{type(runtime).__name__} não expõe as instâncias de agentes para descarte")
+    for agent_id in session_agents.pop(session_id):
+        instantiated.pop(agent_id, None)
+    conversation_store.drop(session_id)
+
+
+async def start(websocket):
+    runtime = await get_runtime()
 
     # Create a new session for the user.
     session_id = str(uuid.uuid4())
-    await runtime.publish_message(UserLogin(), topic_id=TopicId(user_topic_type, source=session_id))
+    sessions.register(session_id, websocket)
+    try:
+        await runtime.publish_message(UserLogin(), topic_id=TopicId(user_topic_type, source=session_id))
+
+        # Mantém a conexão aberta até o usuário encerrar a sessão ou o cliente desconectar.
+        await sessions.wait_closed(session_id)
+    finally:
+        sessions.unregister(session_id)
+        operator_queue.cancel(session_id)
+        release_session(runtime, session_id)
+
+
+async def start_operator(websocket):
+    await get_runtime()
+    await handle_operator(websocket, operator_queue)
+
+
+async def warm_up_model():
+    try:
+        await asyncio.to_thread(warm_up_model_client)
+    except Exception as e:
+        print(f"Falha ao preparar o cliente do modelo: {e}")
+
+
+async def drain_sessions(grace: float) -> None:
+    """Espera as sessões em andamento terminarem por até `grace` segundos e encerra as restantes."""
+    deadline = time.monotonic() + grace
+    while len(sessions) and time.monotonic() < deadline:
+        await asyncio.sleep(0.1)
+    if len(sessions):
+        print(f"Encerrando {len(sessions)} sessões ainda abertas após {grace:.0f}s")
+        sessions.close_all()
+        # Dá tempo para os handlers `start` liberarem as sessões
+        await asyncio.sleep(0.1)
+
 
-    # Run until completion.
-    await runtime.stop_when_idle()
+async def serve(
+        host: str = "localhost",
+        port: int = 5000,
+        operator_port: int = 5001,
+        reuse_port: bool = False,
+        sock=None,
+        shutdown: Optional[asyncio.Event] = None,
+        grace: float = 30.0,
+) -> None:
+    """
+    Serve os clientes em `host:port` (ou no socket `sock` já aberto) e os operadores em
+    `operator_port` até `shutdown`. No desligamento para de aceitar conexões, espera as
+    sessões em andamento terminarem (até `grace` segundos) e então para o runtime.
+    """
+    runtime = await get_runtime()
+    metrics_server = await start_metrics_server()
+    if metrics_server is not None:
+        print(f"Métricas em http://{metrics_server.sockets[0].getsockname()[0]}:"
+              f"{metrics_server.sockets[0].getsockname()[1]}/metrics")
+    if sock is not None:
+        client_server = await websockets.serve(start, sock=sock)
+    else:
+        client_server = await websockets.serve(start, host, port, reuse_port=reuse_port)
+    operator_server = await websockets.serve(start_operator, host, operator_port)
+    print(f"WebSocket server running on ws://{host}:{port}")
+    print(f"Operator WebSocket running on ws://{host}:{operator_port}")
+    # O SDK do modelo é carregado depois que o servidor já aceita conexões
+    warm_up = asyncio.create_task(warm_up_model())
+    try:
+        await (shutdown.wait() if shutdown is not None else asyncio.Future())
+    finally:
+        warm_up.cancel()
+        client_server.close(close_connections=False)
+        await drain_sessions(grace)
+        client_server.close()
+        operator_server.close()
+        await client_server.wait_closed()
+        await operator_server.wait_closed()
+        if metrics_server is not None:
+            metrics_server.close()
+        await runtime.stop()
 
 
 async def main():
-    async with websockets.serve(start, "localhost", 5000):
-        print("WebSocket server running on ws://localhost:5000")
-        await asyncio.Future()
+    shutdown = asyncio.Event()
+    try:
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, shutdown.set)
+    except NotImplementedError:
+        # Windows: só o Ctrl+C (KeyboardInterrupt) encerra o servidor
+        pass
+    await serve(shutdown=shutdown, grace=float(os.getenv("SHUTDOWN_GRACE", "30")))
 
 
 if __name__ == "__main__":
@@ -1,33 +1,28 @@
 import os
-import smtplib
-from email.mime.multipart import MIMEMultipart
-from email.mime.text import MIMEText
 from typing import Annotated, List, Dict, Any
 
-import mysql
-import mysql.connector
 from autogen_core.tools import FunctionTool
 from dotenv import load_dotenv
-from mysql.connector import Error
-from tavily import TavilyClient
+
+from src.tools.database import get_pool
+from src.tools.email_outbox import OutboxFull, get_outbox
+from src.tools.schema import DDL_PREFIXES, invalidate_schema_cache, schema_cache
+from src.tools.search import get_search_service
+from src.tools.tool_cache import tool_cache
 
 # Carregar variáveis do arquivo `.env`
 load_dotenv()
 
-tavily = TavilyClient(api_key="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")
-
-
-def search(query: Annotated[str, "The search query"]) -> Annotated[str, "The search results"]:
-    result = tavily.get_search_context(query=query, search_depth="advanced")
-    print(f"Tavily response: {result}")
-    return result
+async def search(query: Annotated[str, "The search query"]) -> Annotated[str, "The search results"]:
+    # Buscas repetidas ou quase idênticas são respondidas pelo cache do serviço de busca
+    return await get_search_service().search(query)
 
-def execute_sql(
+async def execute_sql(
         reflection: Annotated[str, "Think about what to do"],
         sql: Annotated[str, "SQL query"]
 ) -> Annotated[Dict[str, Any], "Dicionário com os resultados ou o erro"]:
     """
-    Executa uma consulta SQL em um banco de dados MySQL e retorna resultados ou mensagens de erro.
+    Executa uma consulta SQL no banco de dados usando o pool compartilhado e retorna resultados ou mensagens de erro.
 
     Args:
         reflection: Reflexão para fins de compatibilidade de anotação.
@@ -36,232 +31,148 @@ def execute_sql(
     Returns:
         Um dicionário com 'result' (sucesso) ou 'error' (erro).
     """
-    # Configuração do banco MySQL — ajuste as credenciais
-    db_config = {
-        "host": "127.0.0.1",
-        "user": "root",
-        "password": "senha123",
-        "database": "VivoSimulacao"
-    }
-
     try:
-        # Conecta ao banco de dados
-        connection = mysql.connector.connect(**db_config)
-        cursor = connection.cursor()
-
-        # Executa a consulta SQL e obtém os resultados
-        cursor.execute(sql)
-
-        # Se a consulta for SELECT, obtém os resultados
-        if sql.strip().upper().startswith("SELECT"):
-            result = cursor.fetchall()  # Lista de tuplas com os resultados
-            columns = [desc[0] for desc in cursor.description]  # Nomes das colunas
-            result_with_columns = [
-                dict(zip(columns, row)) for row in result
-            ]  # Converte os resultados em lista de dicionários
-        else:
-            connection.commit()  # Confirma a transação para operações DML (INSERT, UPDATE, DELETE)
-            result_with_columns = {"message": "Query executed successfully."}
-
+        # A conexão vem do pool e a consulta roda fora do event loop
+        result = await get_pool().execute(sql)
+        if sql.strip().upper().startswith(DDL_PREFIXES):
+            invalidate_schema_cache()  # A estrutura do banco mudou
         return {
-            "result": result_with_columns,
+            "result": result,
             "error": None
         }
 
-    except Error as e:
+    except Exception as e:
         # Retorna o erro se houver falha no SQL ou na conexão
         return {
             "result": None,
             "error": f"Erro ao executar SQL: {str(e)}"
         }
 
-    finally:
-        # Fecha a conexão com o banco de dados
-        if 'connection' in locals() and connection.is_connected():
-            cursor.close()
-            connection.close()
 
-
-def get_database_structure() -> Annotated[Dict[str, Any], "Estrutura do banco de dados MySQL"]:
+async def get_database_structure() -> Annotated[Dict[str, Any], "Estrutura do banco de dados"]:
     """
-    Retorna a estrutura do banco de dados conectado (tabelas e colunas).
+    Retorna a estrutura do banco de dados conectado (tabelas e colunas) em formato compacto.
+    A estrutura é obtida com uma única consulta e mantida em cache (SCHEMA_CACHE_TTL).
 
     Returns:
-        Um dicionário detalhando tabelas e colunas no banco de dados.
+        Um dicionário com a descrição das colunas de cada tabela, ex.:
+        {"planos": "id_plano int PK auto_increment, nome_plano varchar(100) NOT NULL"}.
     """
-    db_config = {
-        "host": "127.0.0.1",
-        "user": "root",
-        "password": "senha123",  # Evitar armazenar senhas diretamente no código
-        "database": "VivoSimulacao"
-    }
-
-    connection = None  # Inicializar a conexão como None
     try:
-        # Abrindo conexão com banco de dados
-        connection = mysql.connector.connect(**db_config)
-        cursor = connection.cursor()
+        database_structure = await schema_cache.get(get_pool())
 
-        # Para armazenar os detalhes do banco
-        database_structure = {}
-
-        # Listando as tabelas do banco
-        cursor.execute("SHOW TABLES;")
-        tables = cursor.fetchall()
-
-        if not tables:  # Verificar se nenhuma tabela foi encontrada
+        if not database_structure:  # Verificar se nenhuma tabela foi encontrada
             return {
                 "result": None,
                 "error": "Nenhuma tabela encontrada no banco de dados."
             }
 
-        for (table_name,) in tables:  # Cada resultado é retornado como uma tupla
-            cursor.execute(f"DESCRIBE {table_name};")  # Obtêm colunas para cada tabela
-            columns = cursor.fetchall()
-            database_structure[table_name] = []
-
-            for column in columns:
-                column_details = {
-                    "Field": column[0],  # Nome da coluna
-                    "Type": column[1],  # Tipo de dado
-                    "Null": column[2],  # Pode ser nulo?
-                    "Key": column[3],  # Chave primária/secundária
-                    "Default": column[4],  # Valor padrão
-                    "Extra": column[5]  # Informação extra, como auto_increment
-                }
-                database_structure[table_name].append(column_details)
-
         return {
             "result": database_structure,
             "error": None
         }
 
-    except mysql.connector.Error as e:
+    except Exception as e:
         # Capturar erros específicos de conexão e operação
         return {
             "result": None,
             "error": f"Erro ao introspectar o banco de dados: {str(e)}"
         }
 
-    finally:
-        # Fechar conexão com o banco de dados, se aberta
-        if connection and connection.is_connected():
-            cursor.close()
-            connection.close()
 
-def buscar_assinaturas_ativas(cpf: str) -> Annotated[
+async def execute_statement(name: str, *params: Any) -> Dict[str, Any]:
+    """
+    Executa um statement registrado em `src.tools.statements` com parâmetros vinculados.
+
+    Returns:
+        Um dicionário com 'result' (sucesso) ou 'error' (erro).
+    """
+    try:
+        result = await get_pool().execute_named(name, params)
+        return {
+            "result": result,
+            "error": None
+        }
+    except Exception as e:
+        return {
+            "result": None,
+            "error": f"Erro ao executar SQL: {str(e)}"
+        }
+
+
+@tool_cache.cached(ttl=30, tags=("assinaturas",))
+async def buscar_assinaturas_ativas(cpf: str) -> Annotated[
     Dict[str, Any], "Busca partes das assinaturas ativas de um cliente baseado no CPF"]:
     """
     Busca assinaturas ativas no banco de dados para um cliente pelo CPF.
     """
-    sql = f"""SELECT a.id_assinatura, c.id_cliente, c.nome_cliente, a.data_inicio, a.status, p.id_plano, p.nome_plano
-                FROM assinaturas a
-                         INNER JOIN clientes c ON a.id_cliente = c.id_cliente
-                         INNER JOIN planos p ON a.id_plano = p.id_plano
-                WHERE a.status = 'Ativo' AND c.cpf = '{cpf}';
-            """
-    return execute_sql("Buscar assinaturas ativas", sql)
-
-def listar_planos() -> Annotated[Dict[str, Any], "Lista todas as opções de planos disponíveis"]:
+    return await execute_statement("buscar_assinaturas_ativas", cpf)
+
+@tool_cache.cached(ttl=600, tags=("planos",))
+async def listar_planos() -> Annotated[Dict[str, Any], "Lista todas as opções de planos disponíveis"]:
     """
     Obtém a lista completa dos planos disponíveis no sistema.
     """
-    sql = "SELECT id_plano, nome_plano FROM planos;"
-    return execute_sql("Listar planos disponíveis", sql)
-def cadastrar_cliente(nome: str, email: str, telefone: str, cpf: str, cidade: str, estado: str) -> Annotated[
+    return await execute_statement("listar_planos")
+async def cadastrar_cliente(nome: str, email: str, telefone: str, cpf: str, cidade: str, estado: str) -> Annotated[
     Dict[str, Any], "Cadastra um novo cliente no sistema"]:
     """
     Adiciona um novo cliente ao banco de dados.
     """
-    sql = f"""
-    INSERT INTO clientes (nome_cliente, email, telefone, cpf, cidade, estado)
-    VALUES ('{nome}', '{email}', '{telefone}', '{cpf}', '{cidade}', '{estado}');
-    """
-    return execute_sql("Cadastrar novo cliente", sql)
+    return await execute_statement("cadastrar_cliente", nome, email, telefone, cpf, cidade, estado)
 
-def cadastrar_assinatura(id_cliente: int, id_plano: int) -> Annotated[
+@tool_cache.invalidates("assinaturas")
+async def cadastrar_assinatura(id_cliente: int, id_plano: int) -> Annotated[
     Dict[str, Any], "Cria uma nova assinatura usando ID do cliente e ID do plano"]:
     """
     Registra uma nova assinatura para um cliente pelo ID.
     """
-    sql = f"""
-    INSERT INTO assinaturas (id_cliente, id_plano, data_inicio, status)
-    VALUES ({id_cliente}, {id_plano}, CURDATE(), 'Ativo');
-    """
-    return execute_sql("Cadastrar nova assinatura", sql)
+    return await execute_statement("cadastrar_assinatura", id_cliente, id_plano)
 
-def cancelar_assinatura(id_cliente: int, id_plano: int) -> Annotated[
+@tool_cache.invalidates("assinaturas")
+async def cancelar_assinatura(id_cliente: int, id_plano: int) -> Annotated[
     Dict[str, Any], "Cancela uma assinatura ativa de um determinado cliente"]:
     """
     Cancela uma assinatura ativa de um cliente específico.
     """
-    sql = f"""
-    UPDATE assinaturas SET status = 'Cancelado'
-    WHERE id_cliente = {id_cliente} AND id_plano = {id_plano};
-    """
-    return execute_sql("Cancelar assinatura", sql)
-def buscar_faturas_abertas(cpf: str) -> Annotated[Dict[str, Any], "Localiza todas as faturas em aberto por CPF"]:
+    return await execute_statement("cancelar_assinatura", id_cliente, id_plano)
+async def buscar_faturas_abertas(cpf: str) -> Annotated[Dict[str, Any], "Localiza todas as faturas em aberto por CPF"]:
     """
     Busca faturas pendentes ou atrasadas de um cliente com base no CPF.
     """
-    sql = f"""
-    SELECT
-        f.id_fatura, c.nome_cliente, f.mes_referencia, f.valor_total, f.data_vencimento, f.status_pagamento
-    FROM faturas f
-    INNER JOIN clientes c ON f.id_cliente = c.id_cliente
-    WHERE
-        f.status_pagamento = 'Pendente'
-        AND f.data_vencimento < CURDATE()
-        AND c.cpf = '{cpf}';
-    """
-    return execute_sql("Buscar faturas atrasadas", sql)
+    return await execute_statement("buscar_faturas_abertas", cpf)
 
 
-def send_email(receiver_email: str, subject: str, body: str, ) -> Annotated[
+async def send_email(receiver_email: str, subject: str, body: str, ) -> Annotated[
     Dict[str, Any], "Envia um email pra um destinatário"]:
     """
-    Função que envia um e-mail usando o serviço SMTP.
+    Enfileira um e-mail na fila de saída, que envia pelo serviço SMTP reutilizando conexões autenticadas.
 
     :param receiver_email: Endereço de e-mail do destinatário.
     :param subject: Assunto do e-mail.
     :param body: Corpo do e-mail em formato HTML.
+    :return: O identificador da mensagem e o status inicial do envio.
     """
-    import threading
-
-    def send_email_background():
-        # Recupera as credenciais do remetente a partir de variáveis de ambiente (boa prática)
-        sender_email = os.getenv("SENDER_EMAIL", "no-reply@eva.bot")  # E-mail padrão caso a variável não exista
-        sender_password = os.getenv("SENDER_PASSWORD",
-                                    "eva@2018")  # Senha padrão para teste (não recomendado em produção)
-
-        # Exibe informações principais
-        print(f"Receiver: {receiver_email}")
-        print(f"Subject: {subject}")
-
-        # Configurar o MIME Multipart
-        msg = MIMEMultipart()
-        msg['From'] = sender_email
-        msg['To'] = receiver_email
-        msg['Subject'] = subject
-        msg.attach(MIMEText(body, 'html'))  # Adiciona o texto ao e-mail como HTML
-
-        try:
-            # Configura a conexão SMTP (Zoho no exemplo)
-            with smtplib.SMTP('smtp.zoho.com', 587) as server:
-                server.ehlo()  # Inicia a conexão SMTP
-                server.starttls()  # Ativa TLS para segurança
-                server.ehlo()
-                server.login(sender_email, sender_password)  # Faz login na conta
-                server.sendmail(sender_email, receiver_email, msg.as_string())  # Envia o e-mail
-                print("Email sent successfully.")
-        except smtplib.SMTPAuthenticationError:
-            print("Failed to send email: Authentication error. Please verify your email and password.")
-        except smtplib.SMTPException as smtp_error:
-            print(f"Failed to send email: SMTP error: {smtp_error}")
-        except Exception as e:
-            print(f"Failed to send email: {e}")
-
-    threading.Thread(target=send_email_background).start()
+    # Exibe informações principais
+    print(f"Receiver: {receiver_email}")
+    print(f"Subject: {subject}")
+
+    try:
+        message_id = await get_outbox().send(receiver_email, subject, body)
+        return {"message_id": message_id, "status": "queued", "error": None}
+    except OutboxFull as e:
+        return {"message_id": None, "status": "rejected", "error": str(e)}
+
+
+def consultar_status_email(message_id: str) -> Annotated[Dict[str, Any], "Status de entrega do e-mail"]:
+    """
+    Consulta o status de entrega de um e-mail enviado por `send_email`
+    (queued, sending, retrying, sent ou failed).
+    """
+    status = get_outbox().status(message_id)
+    if status is None:
+        return {"message_id": message_id, "status": "unknown", "error": "Mensagem não encontrada."}
+    return status
 
 
 def criar_template_html_protocolo(nome_cliente: str, protocolo: str, reclamacao: str) -> str:
@@ -353,42 +264,44 @@ def gerar_numero_protocolo() -> str:
 
     return numero_protocolo
 
-import requests
+from src.tools.http_client import get_http_client
 
+SUBSCRIPTION_API_URL = os.getenv("SUBSCRIPTION_API_URL", "http://localhost:3000")
 
-def cancelar_assinatura_api(id_cliente: Annotated[int, "O id do cliente"], id_plano: Annotated[int, "O id do plano"]):
-    url = "http://localhost:3000/assinaturas/cancelar"
-    headers = {
-        "Content-Type": "application/json",
-        "Accept": "*/*",
-        "User-Agent": "Python Client"
-    }
+API_HEADERS = {
+    "Content-Type": "application/json",
+    "Accept": "*/*",
+    "User-Agent": "Python Client"
+}
+
+
+async def cancelar_assinatura_api(id_cliente: Annotated[int, "O id do cliente"], id_plano: Annotated[int, "O id do plano"]):
+    import httpx
+
+    url = f"{SUBSCRIPTION_API_URL}/assinaturas/cancelar"
     data = {
         "clientId": id_cliente,
         "planId": id_plano
     }
 
     try:
-        response = requests.post(url, headers=headers, json=data)
+        response = await get_http_client().post(url, headers=API_HEADERS, json=data)
         response.raise_for_status()  # Lança uma exceção para status de erro HTTP
         return response.json()  # Retorna a resposta em formato JSON
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         print(f"Erro ao consumir a API: {e}")
         return None
 
-def buscar_assinaturas_ativas_api(cpf: str):
-    url = f"http://localhost:3000/assinaturas?cpf={cpf}"
-    headers = {
-        "Content-Type": "application/json",
-        "Accept": "*/*",
-        "User-Agent": "Python Client"
-    }
+async def buscar_assinaturas_ativas_api(cpf: str):
+    import httpx
+
+    url = f"{SUBSCRIPTION_API_URL}/assinaturas"
 
     try:
-        response = requests.get(url, headers=headers)
+        response = await get_http_client().get(url, headers=API_HEADERS, params={"cpf": cpf})
         response.raise_for_status()  # Lança uma exceção para status de erro HTTP
         return response.json()  # Retorna a resposta em formato JSON
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         print(f"Erro ao consumir a API: {e}")
         return None
 
@@ -433,6 +346,11 @@ send_email_tool = FunctionTool(
     description="Enviar um email com o protocolo da reclamação"
 )
 
+status_email_tool = FunctionTool(
+    consultar_status_email,
+    description="Consulta o status de entrega de um email enviado, usando o message_id retornado no envio"
+)
+
 create_template = FunctionTool(
     criar_template_html_protocolo,
     description="Criar o body html com o protocolo da reclamação"
@@ -0,0 +1,370 @@
+import asyncio
+import functools
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from datetime import date
+from typing import Any, Dict, List, Optional, Sequence
+
+from dotenv import load_dotenv
+
+from src.tools.statements import get_statement
+
+# Carregar variáveis do arquivo `.env`
+load_dotenv()
+
+
+class MySQLBackend:
+    """
+    Backend MySQL baseado no `mysql.connector`. O conector é bloqueante, por isso o pool
+    executa todas as chamadas deste backend em threads dedicadas, fora do event loop.
+    """
+    paramstyle = "%s"
+
+    # Estrutura de todas as tabelas em uma única consulta
+    schema_sql = """
+        SELECT TABLE_NAME AS table_name, COLUMN_NAME AS column_name, COLUMN_TYPE AS column_type,
+               IS_NULLABLE AS is_nullable, COLUMN_KEY AS column_key, COLUMN_DEFAULT AS column_default,
+               EXTRA AS extra
+          FROM information_schema.columns
+         WHERE TABLE_SCHEMA = DATABASE()
+         ORDER BY TABLE_NAME, ORDINAL_POSITION
+    """
+
+    def __init__(self, host: str, user: str, password: str, database: str, port: int = 3306) -> None:
+        self._config = {
+            "host": host,
+            "port": port,
+            "user": user,
+            "password": password,
+            "database": database,
+            # Cada statement é sua própria transação: sem isso um SELECT abre uma transação
+            # REPEATABLE READ que nunca termina e a conexão do pool fica presa a esse snapshot
+            "autocommit": True,
+        }
+
+    def connect(self) -> Any:
+        import mysql.connector
+
+        return mysql.connector.connect(**self._config)
+
+    def prepare(self, connection: Any) -> Any:
+        # O cursor preparado faz o PREPARE no primeiro execute e reutiliza o statement
+        # do servidor enquanto o texto da consulta for o mesmo.
+        return connection.cursor(prepared=True)
+
+    def ping(self, connection: Any) -> bool:
+        try:
+            connection.ping(reconnect=False)
+            return True
+        except Exception:
+            return False
+
+    def close(self, connection: Any) -> None:
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+
+class SQLiteBackend:
+    """
+    Backend SQLite usado como substituto local do MySQL (testes e benchmarks).
+    Com `database=":memory:"` todas as conexões do pool compartilham o mesmo banco em memória.
+    """
+    paramstyle = "?"
+
+    # Mesmo formato da consulta ao information_schema do MySQL
+    schema_sql = """
+        SELECT m.name AS table_name, p.name AS column_name, p.type AS column_type,
+               CASE WHEN p."notnull" = 1 THEN 'NO' ELSE 'YES' END AS is_nullable,
+               CASE WHEN p.pk > 0 THEN 'PRI' ELSE '' END AS column_key,
+               p.dflt_value AS column_default, '' AS extra
+          FROM sqlite_master m JOIN pragma_table_info(m.name) p
+         WHERE m.type = 'table' AND m.name NOT LIKE 'sqlite_%'
+         ORDER BY m.name, p.cid
+    """
+
+    def __init__(self, database: str = ":memory:", init_script: Optional[str] = None) -> None:
+        if database == ":memory:":
+            self._uri = f"file:db-{uuid.uuid4().hex}?mode=memory&cache=shared"
+        else:
+            self._uri = f"file:{database}"
+        self._init_script = init_script
+        self._keeper: Optional[sqlite3.Connection] = None
+        self._keeper_lock = threading.Lock()
+
+    def connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self._uri, uri=True, check_same_thread=False)
+        # Funções do MySQL usadas pelas consultas das ferramentas
+        connection.create_function("CURDATE", 0, lambda: date.today().isoformat())
+        with self._keeper_lock:
+            if self._keeper is None:
+                # Mantém uma conexão aberta para o banco em memória não ser descartado
+                # quando o pool fechar todas as conexões.
+                self._keeper = sqlite3.connect(self._uri, uri=True, check_same_thread=False)
+                if self._init_script:
+                    self._keeper.executescript(self._init_script)
+                    self._keeper.commit()
+        return connection
+
+    def prepare(self, connection: sqlite3.Connection) -> sqlite3.Cursor:
+        # O sqlite3 mantém um cache de statements compilados por conexão, indexado pelo texto da consulta.
+        return connection.cursor()
+
+    def ping(self, connection: sqlite3.Connection) -> bool:
+        try:
+            connection.execute("SELECT 1")
+            return True
+        except Exception:
+            return False
+
+    def close(self, connection: sqlite3.Connection) -> None:
+        connection.close()
+
+
+class ConnectionPool:
+    """
+    Pool assíncrono de conexões com tamanho máximo, reuso de conexões e health check.
+
+    As chamadas bloqueantes do driver são executadas em um ThreadPoolExecutor do mesmo
+    tamanho do pool, então uma consulta lenta ocupa apenas a sua conexão e não o event loop.
+    """
+
+    def __init__(
+            self,
+            backend: Any,
+            max_size: int = 5,
+            acquire_timeout: float = 10.0,
+            health_check_interval: float = 30.0,
+    ) -> None:
+        self._backend = backend
+        self._max_size = max_size
+        self._acquire_timeout = acquire_timeout
+        self._health_check_interval = health_check_interval
+        self._idle: List[Any] = []
+        self._available = asyncio.Condition()
+        self._size = 0
+        self._last_used: Dict[int, float] = {}
+        self._prepared: Dict[int, Dict[str, Any]] = {}
+        self._executor = ThreadPoolExecutor(max_workers=max_size, thread_name_prefix="db-pool")
+
+    @property
+    def backend(self) -> Any:
+        return self._backend
+
+    async def run_in_thread(self, fn, *args) -> Any:
+        """Executa uma função bloqueante do driver nas threads do pool."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(fn, *args))
+
+    async def acquire(self) -> Any:
+        deadline = time.monotonic() + self._acquire_timeout
+        while True:
+            async with self._available:
+                while not self._idle and self._size >= self._max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise TimeoutError("Tempo esgotado aguardando uma conexão livre no pool.")
+                    try:
+                        await asyncio.wait_for(self._available.wait(), remaining)
+                    except asyncio.TimeoutError:
+                        pass
+                if self._idle:
+                    connection = self._idle.pop()
+                else:
+                    connection = None
+                    self._size += 1
+
+            if connection is None:
+                connecting = asyncio.ensure_future(self.run_in_thread(self._backend.connect))
+                try:
+                    return await asyncio.shield(connecting)
+                except BaseException:
+                    # Falha ou cancelamento (timeout, prazo do turno): a vaga reservada é liberada
+                    # e a conexão que ainda terminar de abrir na thread é fechada
+                    connecting.add_done_callback(self._close_orphan)
+                    await asyncio.shield(self._forget())
+                    raise
+
+            # Conexões ociosas há muito tempo passam por health check antes de serem reutilizadas
+            idle_for = time.monotonic() - self._last_used.get(id(connection), 0.0)
+            try:
+                healthy = idle_for < self._health_check_interval or await self.run_in_thread(
+                    self._backend.ping, connection
+                )
+            except BaseException:
+                await asyncio.shield(self.discard(connection))
+                raise
+            if healthy:
+                return connection
+            await asyncio.shield(self.discard(connection))
+
+    def _close_orphan(self, connecting: "asyncio.Future[Any]") -> None:
+        if not connecting.cancelled() and connecting.exception() is None:
+            self._executor.submit(self._backend.close, connecting.result())
+
+    async def release(self, connection: Any) -> None:
+        self._last_used[id(connection)] = time.monotonic()
+        async with self._available:
+            self._idle.append(connection)
+            self._available.notify()
+
+    async def discard(self, connection: Any) -> None:
+        """Fecha uma conexão quebrada e libera a vaga dela no pool."""
+        self._last_used.pop(id(connection), None)
+        self._prepared.pop(id(connection), None)
+        try:
+            await self.run_in_thread(self._backend.close, connection)
+        except Exception as e:
+            print(f"Erro ao fechar conexão descartada do pool: {e}")
+        finally:
+            await self._forget()
+
+    async def _forget(self) -> None:
+        async with self._available:
+            self._size -= 1
+            self._available.notify()
+
+    @asynccontextmanager
+    async def connection(self):
+        connection = await self.acquire()
+        try:
+            yield connection
+        except BaseException as e:
+            # `shield`: a conexão volta ao pool ou é descartada mesmo se a tarefa for cancelada de novo
+            await asyncio.shield(self._recover(connection, cancelled=isinstance(e, asyncio.CancelledError)))
+            raise
+        else:
+            await asyncio.shield(self.release(connection))
+
+    async def _recover(self, connection: Any, cancelled: bool) -> None:
+        """Devolve ao pool ou descarta a conexão de uma consulta que falhou ou foi cancelada."""
+        if cancelled:
+            # A consulta cancelada pode continuar rodando na thread do driver: a conexão não é reutilizada
+            await self.discard(connection)
+            return
+        # Em caso de erro, a conexão só volta ao pool se ainda estiver saudável
+        try:
+            healthy = await self.run_in_thread(self._backend.ping, connection)
+            if healthy:
+                await self.run_in_thread(connection.rollback)
+        except Exception:
+            healthy = False
+        if healthy:
+            await self.release(connection)
+        else:
+            await self.discard(connection)
+
+    async def execute(self, sql: str, params: Optional[Sequence[Any]] = None) -> Any:
+        """
+        Executa uma consulta em uma conexão do pool.
+
+        Returns:
+            Lista de dicionários para consultas que retornam linhas ou um dicionário
+            com a quantidade de linhas afetadas para comandos DML.
+        """
+        async with self.connection() as connection:
+            return await self.run_in_thread(_execute_blocking, connection, sql, params)
+
+    async def execute_named(self, name: str, params: Sequence[Any] = ()) -> Any:
+        """
+        Executa um statement registrado em `src.tools.statements` com parâmetros vinculados.
+        O statement é preparado uma vez por conexão do pool e o tempo de execução é registrado.
+        """
+        statement = get_statement(name)
+        sql = statement.sql_for(self._backend.paramstyle)
+        async with self.connection() as connection:
+            prepared = self._prepared.setdefault(id(connection), {})
+            cursor = prepared.get(name)
+            if cursor is None:
+                cursor = prepared[name] = self._backend.prepare(connection)
+            started = time.perf_counter()
+            try:
+                result = await self.run_in_thread(_execute_blocking, connection, sql, params, cursor)
+            except Exception:
+                statement.record((time.perf_counter() - started) * 1000, error=True)
+                raise
+            statement.record((time.perf_counter() - started) * 1000)
+            return result
+
+    async def close(self) -> None:
+        async with self._available:
+            idle, self._idle = self._idle, []
+        for connection in idle:
+            await self.discard(connection)
+        self._executor.shutdown(wait=False)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": self._size,
+            "idle": len(self._idle),
+            "in_use": self._size - len(self._idle),
+            "max_size": self._max_size,
+        }
+
+
+def _execute_blocking(connection: Any, sql: str, params: Optional[Sequence[Any]] = None,
+                      cursor: Optional[Any] = None) -> Any:
+    # Cursores preparados pertencem à conexão e são reutilizados; os demais são fechados ao final.
+    owns_cursor = cursor is None
+    if owns_cursor:
+        cursor = connection.cursor()
+    try:
+        if params:
+            cursor.execute(sql, tuple(params))
+        else:
+            cursor.execute(sql)
+        if cursor.description is not None:
+            columns = [desc[0] for desc in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+        connection.commit()  # Confirma a transação para operações DML (INSERT, UPDATE, DELETE)
+        return {"message": "Query executed successfully.", "rowcount": cursor.rowcount}
+    finally:
+        if owns_cursor:
+            cursor.close()
+
+
+_pool: Optional[ConnectionPool] = None
+
+
+def create_pool_from_env() -> ConnectionPool:
+    """
+    Cria o pool a partir das variáveis de ambiente. `DB_BACKEND=sqlite` usa um banco
+    SQLite local (`DB_PATH`, padrão em memória) inicializado com `DB_INIT_SCRIPT`.
+    """
+    pool_size = int(os.getenv("DB_POOL_SIZE", "5"))
+    if os.getenv("DB_BACKEND", "mysql").lower() == "sqlite":
+        init_script = None
+        if os.getenv("DB_INIT_SCRIPT"):
+            with open(os.getenv("DB_INIT_SCRIPT"), encoding="utf-8") as f:
+                init_script = f.read()
+        backend = SQLiteBackend(os.getenv("DB_PATH", ":memory:"), init_script=init_script)
+    else:
+        # Configuração do banco MySQL — ajuste as credenciais via variáveis de ambiente
+        backend = MySQLBackend(
+            host=os.getenv("DB_HOST", "127.0.0.1"),
+            port=int(os.getenv("DB_PORT", "3306")),
+            user=os.getenv("DB_USER", "root"),
+            password=os.getenv("DB_PASSWORD", "senha123"),
+            database=os.getenv("DB_NAME", "VivoSimulacao"),
+        )
+    return ConnectionPool(backend, max_size=pool_size)
+
+
+def get_pool() -> ConnectionPool:
+    """Retorna o pool compartilhado pelo processo, criando-o no primeiro uso."""
+    global _pool
+    if _pool is None:
+        _pool = create_pool_from_env()
+    return _pool
+
+
+def set_pool(pool: Optional[ConnectionPool]) -> None:
+    """Substitui o pool compartilhado (ex.: por um pool SQLite em testes e benchmarks)."""
+    global _pool
+    _pool = pool
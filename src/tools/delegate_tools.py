@@ -1,7 +1,7 @@
 from autogen_core.tools import FunctionTool
 
 from src.utils.topics import sales_agent_topic_type, issues_and_repairs_agent_topic_type, cancellation_agent_topic_type, \
-    triage_agent_topic_type
+    triage_agent_topic_type, human_agent_topic_type
 
 
 
@@ -0,0 +1,305 @@
+import asyncio
+import os
+import time
+import uuid
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+from dotenv import load_dotenv
+
+if TYPE_CHECKING:
+    import smtplib
+
+# Carregar variáveis do arquivo `.env`
+load_dotenv()
+
+
+def _permanent_errors() -> tuple:
+    """Erros que não adianta repetir: o mesmo envio falharia novamente."""
+    import smtplib
+
+    return smtplib.SMTPAuthenticationError, smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused
+
+
+class OutboxFull(Exception):
+    """A fila de envio está cheia (backpressure)."""
+
+
+class SmtpSettings:
+    def __init__(self, host: str, port: int, sender: str, password: Optional[str] = None,
+                 starttls: bool = True, login: bool = True, timeout: float = 30.0) -> None:
+        self.host = host
+        self.port = port
+        self.sender = sender
+        self.password = password
+        self.starttls = starttls
+        self.login = login
+        self.timeout = timeout
+
+    @classmethod
+    def from_env(cls) -> "SmtpSettings":
+        # Para testes locais com aiosmtpd: SMTP_HOST=127.0.0.1 SMTP_PORT=8025 SMTP_STARTTLS=0 SMTP_LOGIN=0
+        return cls(
+            host=os.getenv("SMTP_HOST", "smtp.zoho.com"),
+            port=int(os.getenv("SMTP_PORT", "587")),
+            sender=os.getenv("SENDER_EMAIL", "no-reply@eva.bot"),  # E-mail padrão caso a variável não exista
+            password=os.getenv("SENDER_PASSWORD", "eva@2018"),  # Senha padrão para teste (não recomendado em produção)
+            starttls=os.getenv("SMTP_STARTTLS", "1") == "1",
+            login=os.getenv("SMTP_LOGIN", "1") == "1",
+        )
+
+
+class OutboxMessage:
+    def __init__(self, receiver: str, subject: str, body: str) -> None:
+        self.id = uuid.uuid4().hex
+        self.receiver = receiver
+        self.subject = subject
+        self.body = body
+        self.status = "queued"
+        self.attempts = 0
+        self.error: Optional[str] = None
+        self.updated_at = time.time()
+
+    def set_status(self, status: str, error: Optional[str] = None) -> None:
+        self.status = status
+        self.error = error
+        self.updated_at = time.time()
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "message_id": self.id,
+            "receiver_email": self.receiver,
+            "status": self.status,
+            "attempts": self.attempts,
+            "error": self.error,
+        }
+
+
+class SmtpConnection:
+    """Conexão SMTP autenticada reutilizada por um worker entre vários envios."""
+
+    def __init__(self, settings: SmtpSettings, idle_timeout: float = 60.0) -> None:
+        self._settings = settings
+        self._idle_timeout = idle_timeout
+        self._server: Optional["smtplib.SMTP"] = None
+        self._last_used = 0.0
+
+    def _connect(self) -> "smtplib.SMTP":
+        # smtplib (e o ssl) só são importados no primeiro envio
+        import smtplib
+
+        server = smtplib.SMTP(self._settings.host, self._settings.port, timeout=self._settings.timeout)
+        server.ehlo()  # Inicia a conexão SMTP
+        if self._settings.starttls:
+            server.starttls()  # Ativa TLS para segurança
+            server.ehlo()
+        if self._settings.login:
+            server.login(self._settings.sender, self._settings.password)  # Faz login na conta
+        return server
+
+    def _ensure(self) -> "smtplib.SMTP":
+        import smtplib
+
+        if self._server is not None and time.monotonic() - self._last_used > self._idle_timeout:
+            # Conexão ociosa: confirma que o servidor ainda a mantém antes de reutilizar
+            try:
+                self._server.noop()
+            except smtplib.SMTPException:
+                self.close()
+        if self._server is None:
+            self._server = self._connect()
+        return self._server
+
+    def send(self, message: OutboxMessage) -> None:
+        """Envia uma mensagem (bloqueante). Reconecta uma vez se o servidor tiver encerrado a conexão."""
+        import smtplib
+        from email.mime.multipart import MIMEMultipart
+        from email.mime.text import MIMEText
+
+        mime = MIMEMultipart()
+        mime['From'] = self._settings.sender
+        mime['To'] = message.receiver
+        mime['Subject'] = message.subject
+        mime.attach(MIMEText(message.body, 'html'))  # Adiciona o texto ao e-mail como HTML
+        try:
+            self._ensure().sendmail(self._settings.sender, message.receiver, mime.as_string())
+        except smtplib.SMTPServerDisconnected:
+            self.close()
+            self._ensure().sendmail(self._settings.sender, message.receiver, mime.as_string())
+        self._last_used = time.monotonic()
+
+    def close(self) -> None:
+        server, self._server = self._server, None
+        if server is not None:
+            try:
+                server.quit()
+            except Exception:
+                server.close()
+
+
+class EmailOutbox:
+    """
+    Fila de saída de e-mails com tamanho limitado e workers assíncronos.
+
+    Cada worker mantém uma conexão SMTP autenticada, reutilizada até ficar ociosa por
+    `idle_timeout`, e envia lotes de até `batch_size` mensagens por vez. Com a fila cheia,
+    `send` aguarda até `enqueue_timeout` e então rejeita o envio (backpressure). Falhas temporárias são repetidas até `max_attempts`
+    com espera exponencial; o status de cada mensagem pode ser consultado por `status`.
+    """
+
+    def __init__(
+            self,
+            settings: SmtpSettings,
+            workers: int = 2,
+            max_queue: int = 100,
+            batch_size: int = 10,
+            max_attempts: int = 3,
+            retry_backoff: float = 2.0,
+            enqueue_timeout: float = 5.0,
+            idle_timeout: float = 60.0,
+            max_tracked: int = 1000,
+    ) -> None:
+        self._settings = settings
+        self._workers = workers
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self._batch_size = batch_size
+        self._max_attempts = max_attempts
+        self._retry_backoff = retry_backoff
+        self._enqueue_timeout = enqueue_timeout
+        self._idle_timeout = idle_timeout
+        self._max_tracked = max_tracked
+        self._messages: "OrderedDict[str, OutboxMessage]" = OrderedDict()
+        self._tasks: List[asyncio.Task] = []
+        # Mensagens aguardando a espera exponencial antes de voltar à fila
+        self._retries: Dict[asyncio.Task, OutboxMessage] = {}
+
+    def start(self) -> None:
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._worker()) for _ in range(self._workers)]
+
+    async def send(self, receiver: str, subject: str, body: str) -> str:
+        self.start()
+        message = OutboxMessage(receiver, subject, body)
+        self._track(message)
+        try:
+            await asyncio.wait_for(self._queue.put(message), self._enqueue_timeout)
+        except asyncio.TimeoutError:
+            message.set_status("rejected", "Fila de e-mails cheia.")
+            raise OutboxFull("Fila de e-mails cheia. Tente novamente em instantes.")
+        return message.id
+
+    def status(self, message_id: str) -> Optional[Dict[str, Any]]:
+        message = self._messages.get(message_id)
+        return message.as_dict() if message else None
+
+    def _track(self, message: OutboxMessage) -> None:
+        self._messages[message.id] = message
+        while len(self._messages) > self._max_tracked:
+            self._messages.popitem(last=False)
+
+    async def _worker(self) -> None:
+        connection = SmtpConnection(self._settings, idle_timeout=self._idle_timeout)
+        try:
+            while True:
+                try:
+                    batch = [await asyncio.wait_for(self._queue.get(), self._idle_timeout)]
+                except asyncio.TimeoutError:
+                    # Sem mensagens por um tempo: não segura a conexão do servidor SMTP
+                    await asyncio.to_thread(connection.close)
+                    continue
+                while len(batch) < self._batch_size and not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                for position, message in enumerate(batch):
+                    try:
+                        await self._deliver(connection, message)
+                    except Exception as e:
+                        # `_deliver` já trata as falhas de envio; um erro inesperado não derruba o lote
+                        message.set_status("failed", f"{type(e).__name__}: {e}")
+                    except BaseException:
+                        # Worker cancelado no meio do lote (stop sem drenar)
+                        self._abandon(batch[position:])
+                        for _ in batch[position + 1:]:
+                            self._queue.task_done()
+                        raise
+                    finally:
+                        self._queue.task_done()
+        finally:
+            # O QUIT pode esperar pelo servidor: fecha numa thread sem bloquear o event loop
+            asyncio.get_running_loop().run_in_executor(None, connection.close)
+
+    async def _deliver(self, connection: SmtpConnection, message: OutboxMessage) -> None:
+        message.attempts += 1
+        message.set_status("sending")
+        try:
+            await asyncio.to_thread(connection.send, message)
+            message.set_status("sent")
+            print(f"Email sent successfully: {message.id}")
+        except _permanent_errors() as e:
+            message.set_status("failed", f"{type(e).__name__}: {e}")
+            print(f"Failed to send email {message.id}: {e}")
+        except Exception as e:
+            await asyncio.to_thread(connection.close)
+            if message.attempts >= self._max_attempts:
+                message.set_status("failed", f"{type(e).__name__}: {e}")
+                print(f"Failed to send email {message.id} after {message.attempts} attempts: {e}")
+            else:
+                message.set_status("retrying", f"{type(e).__name__}: {e}")
+                task = asyncio.create_task(self._requeue(message))
+                self._retries[task] = message
+                task.add_done_callback(lambda done: self._retries.pop(done, None))
+
+    async def _requeue(self, message: OutboxMessage) -> None:
+        await asyncio.sleep(self._retry_backoff * (2 ** (message.attempts - 1)))
+        await self._queue.put(message)
+
+    @staticmethod
+    def _abandon(messages: List[OutboxMessage]) -> None:
+        for message in messages:
+            message.set_status("failed", "Envio interrompido: a fila de e-mails foi encerrada.")
+
+    async def stop(self, drain: bool = True) -> None:
+        """
+        Encerra os workers. Com `drain`, espera a fila esvaziar, inclusive as mensagens que
+        aguardam nova tentativa; sem `drain`, as mensagens pendentes são marcadas como falhas.
+        """
+        if drain:
+            while True:
+                await self._queue.join()
+                if not self._retries:
+                    break
+                # As novas tentativas ainda não estão na fila: espera voltarem e serem enviadas
+                await asyncio.gather(*list(self._retries), return_exceptions=True)
+        else:
+            retries = list(self._retries)
+            self._abandon(list(self._retries.values()))
+            for task in retries:
+                task.cancel()
+            await asyncio.gather(*retries, return_exceptions=True)
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        while not self._queue.empty():
+            self._abandon([self._queue.get_nowait()])
+            self._queue.task_done()
+
+
+_outbox: Optional[EmailOutbox] = None
+
+
+def get_outbox() -> EmailOutbox:
+    """Retorna a fila de e-mails compartilhada pelo processo, criando-a no primeiro uso."""
+    global _outbox
+    if _outbox is None:
+        _outbox = EmailOutbox(
+            SmtpSettings.from_env(),
+            workers=int(os.getenv("SMTP_WORKERS", "2")),
+            max_queue=int(os.getenv("SMTP_MAX_QUEUE", "100")),
+        )
+    return _outbox
+
+
+def set_outbox(outbox: Optional[EmailOutbox]) -> None:
+    """Substitui a fila de e-mails compartilhada (ex.: apontando para um servidor aiosmtpd local)."""
+    global _outbox
+    _outbox = outbox
@@ -0,0 +1,52 @@
+-- Esquema e dados mínimos do banco VivoSimulacao para o backend SQLite (DB_BACKEND=sqlite).
+
+CREATE TABLE IF NOT EXISTS clientes (
+    id_cliente INTEGER PRIMARY KEY AUTOINCREMENT,
+    nome_cliente VARCHAR(100) NOT NULL,
+    email VARCHAR(100),
+    telefone VARCHAR(20),
+    cpf VARCHAR(14) UNIQUE,
+    cidade VARCHAR(50),
+    estado VARCHAR(2)
+);
+
+CREATE TABLE IF NOT EXISTS planos (
+    id_plano INTEGER PRIMARY KEY AUTOINCREMENT,
+    nome_plano VARCHAR(100) NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS assinaturas (
+    id_assinatura INTEGER PRIMARY KEY AUTOINCREMENT,
+    id_cliente INTEGER NOT NULL REFERENCES clientes (id_cliente),
+    id_plano INTEGER NOT NULL REFERENCES planos (id_plano),
+    data_inicio DATE,
+    status VARCHAR(20) DEFAULT 'Ativo'
+);
+
+CREATE TABLE IF NOT EXISTS faturas (
+    id_fatura INTEGER PRIMARY KEY AUTOINCREMENT,
+    id_cliente INTEGER NOT NULL REFERENCES clientes (id_cliente),
+    mes_referencia VARCHAR(7),
+    valor_total DECIMAL(10, 2),
+    data_vencimento DATE,
+    status_pagamento VARCHAR(20) DEFAULT 'Pendente'
+);
+
+INSERT INTO planos (nome_plano) VALUES
+    ('Vivo Fibra 500 Mega'),
+    ('Vivo Controle 25GB'),
+    ('Vivo Pós 50GB'),
+    ('Vivo Total Fibra + Pós');
+
+INSERT INTO clientes (nome_cliente, email, telefone, cpf, cidade, estado) VALUES
+    ('Maria Souza', 'maria@example.com', '11999990001', '111.222.333-44', 'São Paulo', 'SP'),
+    ('João Lima', 'joao@example.com', '21999990002', '222.333.444-55', 'Rio de Janeiro', 'RJ');
+
+INSERT INTO assinaturas (id_cliente, id_plano, data_inicio, status) VALUES
+    (1, 1, '2024-01-10', 'Ativo'),
+    (1, 3, '2024-03-05', 'Ativo'),
+    (2, 2, '2023-11-20', 'Ativo');
+
+INSERT INTO faturas (id_cliente, mes_referencia, valor_total, data_vencimento, status_pagamento) VALUES
+    (1, '2024-05', 199.90, '2024-06-10', 'Pendente'),
+    (2, '2024-05', 59.90, '2024-06-15', 'Pago');
@@ -0,0 +1,127 @@
+import asyncio
+import os
+import random
+from typing import TYPE_CHECKING, Any, Dict, Optional
+from urllib.parse import urlsplit
+
+if TYPE_CHECKING:
+    import httpx
+
+# Métodos que podem ser repetidos com segurança mesmo após a requisição chegar ao servidor
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+RETRYABLE_STATUS = {502, 503, 504}
+
+
+class RetryBudget:
+    """
+    Orçamento de retries compartilhado: cada requisição deposita `ratio` fichas e cada retry
+    consome uma. Quando o serviço está fora do ar, os retries param em vez de multiplicar a carga.
+    """
+
+    def __init__(self, ratio: float = 0.2, min_tokens: float = 10.0, max_tokens: float = 100.0) -> None:
+        self._ratio = ratio
+        self._max_tokens = max_tokens
+        self._tokens = min_tokens
+
+    def deposit(self) -> None:
+        self._tokens = min(self._max_tokens, self._tokens + self._ratio)
+
+    def withdraw(self) -> bool:
+        if self._tokens >= 1.0:
+            self._tokens -= 1.0
+            return True
+        return False
+
+
+class AsyncHttpClient:
+    """
+    Cliente HTTP assíncrono compartilhado com keep-alive. Mantém um pool de conexões por host
+    (`max_connections_per_host`), timeouts e retries limitados por um `RetryBudget`.
+    """
+
+    def __init__(
+            self,
+            max_connections_per_host: int = 10,
+            timeout: float = 5.0,
+            connect_timeout: float = 2.0,
+            max_retries: int = 2,
+            backoff: float = 0.2,
+            retry_budget: Optional[RetryBudget] = None,
+    ) -> None:
+        # O httpx é importado na criação do cliente (primeira chamada à API), não no import das ferramentas
+        import httpx
+
+        self._limits = httpx.Limits(
+            max_connections=max_connections_per_host,
+            max_keepalive_connections=max_connections_per_host,
+            keepalive_expiry=30.0,
+        )
+        self._timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self._max_retries = max_retries
+        self._backoff = backoff
+        self._retry_budget = retry_budget or RetryBudget()
+        self._clients: Dict[str, "httpx.AsyncClient"] = {}
+
+    def _client_for(self, url: str) -> "httpx.AsyncClient":
+        import httpx
+
+        parts = urlsplit(url)
+        origin = f"{parts.scheme}://{parts.netloc}"
+        client = self._clients.get(origin)
+        if client is None:
+            client = httpx.AsyncClient(limits=self._limits, timeout=self._timeout)
+            self._clients[origin] = client
+        return client
+
+    async def request(self, method: str, url: str, **kwargs: Any) -> "httpx.Response":
+        import httpx
+
+        method = method.upper()
+        client = self._client_for(url)
+        self._retry_budget.deposit()
+        attempt = 0
+        while True:
+            try:
+                response = await client.request(method, url, **kwargs)
+                if (response.status_code not in RETRYABLE_STATUS or method not in IDEMPOTENT_METHODS
+                        or not self._can_retry(attempt)):
+                    return response
+                await response.aclose()
+            except (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout):
+                # A requisição não chegou ao servidor: pode ser repetida para qualquer método
+                if not self._can_retry(attempt):
+                    raise
+            except httpx.TransportError:
+                if method not in IDEMPOTENT_METHODS or not self._can_retry(attempt):
+                    raise
+            attempt += 1
+            await asyncio.sleep(self._backoff * (2 ** (attempt - 1)) * random.uniform(0.5, 1.5))
+
+    def _can_retry(self, attempt: int) -> bool:
+        return attempt < self._max_retries and self._retry_budget.withdraw()
+
+    async def get(self, url: str, **kwargs: Any) -> "httpx.Response":
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs: Any) -> "httpx.Response":
+        return await self.request("POST", url, **kwargs)
+
+    async def aclose(self) -> None:
+        clients, self._clients = self._clients, {}
+        for client in clients.values():
+            await client.aclose()
+
+
+_http_client: Optional[AsyncHttpClient] = None
+
+
+def get_http_client() -> AsyncHttpClient:
+    """Retorna o cliente HTTP compartilhado pelo processo, criando-o no primeiro uso."""
+    global _http_client
+    if _http_client is None:
+        _http_client = AsyncHttpClient(
+            max_connections_per_host=int(os.getenv("HTTP_MAX_CONNECTIONS_PER_HOST", "10")),
+            timeout=float(os.getenv("HTTP_TIMEOUT", "5")),
+            max_retries=int(os.getenv("HTTP_MAX_RETRIES", "2")),
+        )
+    return _http_client
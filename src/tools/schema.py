@@ -0,0 +1,72 @@
+import asyncio
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+from src.tools.database import ConnectionPool
+
+
+def _text(value: Any) -> Any:
+    # Algumas versões do mysql.connector retornam colunas do information_schema como bytes
+    return value.decode() if isinstance(value, (bytes, bytearray)) else value
+
+
+def compact_schema(rows: List[Dict[str, Any]]) -> Dict[str, str]:
+    """
+    Converte as linhas da consulta de schema em uma descrição compacta por tabela,
+    ex.: {"planos": "id_plano int PK auto_increment, nome_plano varchar(100) NOT NULL"}.
+    O formato usa bem menos tokens do que a lista de dicionários do DESCRIBE.
+    """
+    tables: Dict[str, List[str]] = {}
+    for row in rows:
+        column = f"{_text(row['column_name'])} {_text(row['column_type']).lower()}"
+        key = _text(row["column_key"])
+        if key == "PRI":
+            column += " PK"
+        elif key == "UNI":
+            column += " UNIQUE"
+        elif _text(row["is_nullable"]) == "NO":
+            column += " NOT NULL"
+        if row["column_default"] is not None:
+            column += f" DEFAULT {_text(row['column_default'])}"
+        if _text(row["extra"]):
+            column += f" {_text(row['extra']).lower()}"
+        tables.setdefault(_text(row["table_name"]), []).append(column)
+    return {table: ", ".join(columns) for table, columns in tables.items()}
+
+
+class SchemaCache:
+    """
+    Cache em processo da estrutura do banco, com TTL e invalidação explícita.
+    Chamadas concorrentes com o cache expirado fazem uma única consulta ao banco.
+    """
+
+    def __init__(self, ttl: float = 300.0) -> None:
+        self._ttl = ttl
+        self._schema: Optional[Dict[str, str]] = None
+        self._expires_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def get(self, pool: ConnectionPool) -> Dict[str, str]:
+        if self._schema is not None and time.monotonic() < self._expires_at:
+            return self._schema
+        async with self._lock:
+            if self._schema is None or time.monotonic() >= self._expires_at:
+                rows = await pool.execute(pool.backend.schema_sql)
+                self._schema = compact_schema(rows)
+                self._expires_at = time.monotonic() + self._ttl
+        return self._schema
+
+    def invalidate(self) -> None:
+        self._schema = None
+        self._expires_at = 0.0
+
+
+schema_cache = SchemaCache(ttl=float(os.getenv("SCHEMA_CACHE_TTL", "300")))
+
+# Comandos que alteram a estrutura do banco e invalidam o cache
+DDL_PREFIXES = ("CREATE", "ALTER", "DROP", "RENAME", "TRUNCATE")
+
+
+def invalidate_schema_cache() -> None:
+    schema_cache.invalidate()
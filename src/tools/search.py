@@ -0,0 +1,261 @@
+import asyncio
+import json
+import os
+import re
+import sqlite3
+import time
+import unicodedata
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+# Carregar variáveis do arquivo `.env`
+load_dotenv()
+
+# Palavras ignoradas na normalização: buscas quase idênticas caem na mesma chave de cache
+STOPWORDS = {
+    "a", "o", "as", "os", "de", "da", "do", "das", "dos", "e", "em", "no", "na", "nos", "nas",
+    "um", "uma", "para", "pra", "por", "com", "que", "como", "meu", "minha", "eu", "se", "ao", "aos",
+    "esta", "estou", "ta", "the", "of", "to", "and", "in", "for", "is", "how",
+}
+
+
+def normalize_query(query: str) -> str:
+    """Remove acentos, pontuação, caixa, stopwords e ordem das palavras."""
+    text = unicodedata.normalize("NFKD", query)
+    text = "".join(char for char in text if not unicodedata.combining(char)).lower()
+    tokens = {token for token in re.split(r"[^a-z0-9]+", text) if token and token not in STOPWORDS}
+    return " ".join(sorted(tokens))
+
+
+class SearchBackend(ABC):
+    """Interface dos backends de busca: recebe a consulta e retorna o contexto em texto."""
+
+    @abstractmethod
+    async def search(self, query: str) -> str:
+        ...
+
+
+class TavilySearchBackend(SearchBackend):
+    def __init__(self, api_key: str, search_depth: str = "advanced") -> None:
+        self._api_key = api_key
+        self._search_depth = search_depth
+        self._client: Any = None
+
+    async def search(self, query: str) -> str:
+        if self._client is None:
+            from tavily import TavilyClient
+
+            self._client = TavilyClient(api_key=self._api_key)
+        # O cliente do Tavily é síncrono: executa em thread para não bloquear o event loop
+        return await asyncio.to_thread(
+            self._client.get_search_context, query=query, search_depth=self._search_depth
+        )
+
+
+class FixtureSearchBackend(SearchBackend):
+    """
+    Backend local para testes e benchmarks: pontua os documentos de um corpus fixo
+    pela quantidade de termos em comum com a consulta. Cada documento é um dicionário
+    com `url`, `title` e `content`.
+    """
+
+    def __init__(self, corpus: List[Dict[str, str]], max_results: int = 3, latency: float = 0.0) -> None:
+        self._corpus = [
+            (set(normalize_query(f"{doc.get('title', '')} {doc['content']}").split()), doc) for doc in corpus
+        ]
+        self._max_results = max_results
+        self._latency = latency
+
+    @classmethod
+    def from_file(cls, path: str, **kwargs: Any) -> "FixtureSearchBackend":
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f), **kwargs)
+
+    async def search(self, query: str) -> str:
+        if self._latency:
+            await asyncio.sleep(self._latency)
+        terms = set(normalize_query(query).split())
+        scored = sorted(
+            ((len(terms & doc_terms), doc) for doc_terms, doc in self._corpus),
+            key=lambda item: item[0],
+            reverse=True,
+        )
+        results = [{"url": doc["url"], "content": doc["content"]} for score, doc in scored[:self._max_results] if score]
+        return json.dumps(results, ensure_ascii=False)
+
+
+class SearchCache:
+    """
+    Cache LRU com TTL para resultados de busca, indexado pela consulta normalizada.
+    Com `path`, os resultados também são persistidos em um arquivo SQLite e sobrevivem a reinícios.
+    O arquivo só é acessado numa thread dedicada: leituras (falta na memória) são aguardadas
+    fora do event loop e as gravações são feitas em segundo plano, sem atrasar a resposta.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl: float = 3600.0, path: Optional[str] = None) -> None:
+        self._max_entries = max_entries
+        self._ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._db: Optional[sqlite3.Connection] = None
+        # Uma única thread: as operações no arquivo são executadas em ordem e a conexão não é compartilhada
+        self._disk: Optional[ThreadPoolExecutor] = None
+        if path:
+            self._disk = ThreadPoolExecutor(max_workers=1, thread_name_prefix="search-cache")
+            self._disk.submit(self._open, path)
+
+    def _open(self, path: str) -> None:
+        self._db = sqlite3.connect(path)
+        self._db.execute("CREATE TABLE IF NOT EXISTS search_cache (key TEXT PRIMARY KEY, expires_at REAL, result TEXT)")
+        self._db.commit()
+
+    def _load(self, key: str) -> Optional[Tuple[float, str]]:
+        if self._db is None:
+            return None
+        try:
+            return self._db.execute("SELECT expires_at, result FROM search_cache WHERE key = ?", (key,)).fetchone()
+        except sqlite3.Error as e:
+            print(f"Erro ao ler o cache de buscas: {e}")
+            return None
+
+    def _write(self, sql: str, params: Tuple[Any, ...] = ()) -> None:
+        if self._db is None:
+            return
+        try:
+            self._db.execute(sql, params)
+            self._db.commit()
+        except sqlite3.Error as e:
+            print(f"Erro ao gravar o cache de buscas: {e}")
+
+    async def get(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None and self._disk is not None:
+            row = await asyncio.get_running_loop().run_in_executor(self._disk, self._load, key)
+            if row is not None:
+                # O arquivo guarda o horário absoluto; em memória usamos o relógio monotônico
+                entry = (time.monotonic() + row[0] - time.time(), row[1])
+                self._remember(key, entry)
+        if entry is None:
+            return None
+        if time.monotonic() >= entry[0]:
+            self._entries.pop(key, None)
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def put(self, key: str, result: str) -> None:
+        self._remember(key, (time.monotonic() + self._ttl, result))
+        if self._disk is not None:
+            self._disk.submit(
+                self._write,
+                "INSERT OR REPLACE INTO search_cache (key, expires_at, result) VALUES (?, ?, ?)",
+                (key, time.time() + self._ttl, result),
+            )
+
+    def _remember(self, key: str, entry: Tuple[float, str]) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        if self._disk is not None:
+            self._disk.submit(self._write, "DELETE FROM search_cache")
+
+    def close(self) -> None:
+        """Conclui as gravações pendentes e fecha o arquivo."""
+        if self._disk is not None:
+            self._disk.submit(lambda: self._db is not None and self._db.close())
+            self._disk.shutdown(wait=True)
+            self._disk = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SearchService:
+    """Busca assíncrona com cache; buscas idênticas simultâneas consultam o backend uma única vez."""
+
+    def __init__(self, backend: SearchBackend, cache: Optional[SearchCache] = None) -> None:
+        self.backend = backend
+        self.cache = cache if cache is not None else SearchCache()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+
+    async def search(self, query: str) -> str:
+        key = normalize_query(query) or query.strip().lower()
+        cached = await self.cache.get(key)
+        if cached is not None:
+            self.hits += 1
+            return cached
+
+        while True:
+            inflight = self._inflight.get(key)
+            if inflight is None:
+                break
+            self.hits += 1
+            try:
+                return await asyncio.shield(inflight)
+            except asyncio.CancelledError:
+                # Busca líder cancelada (prazo ou desconexão de outra sessão): tenta de novo,
+                # possivelmente como nova líder; o cancelamento desta própria busca é propagado
+                if not inflight.cancelled() or asyncio.current_task().cancelling():
+                    raise
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await self.backend.search(query)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # Evita o aviso de exceção não consumida quando não há espera
+            raise
+        else:
+            future.set_result(result)
+            self.cache.put(key, result)
+            return result
+        finally:
+            self._inflight.pop(key, None)
+
+
+_search_service: Optional[SearchService] = None
+
+
+def create_search_service_from_env() -> SearchService:
+    """
+    `SEARCH_BACKEND=fixture` usa o corpus local em `SEARCH_FIXTURE_PATH`; o padrão é o Tavily.
+    O cache é configurado por `SEARCH_CACHE_SIZE`, `SEARCH_CACHE_TTL` e `SEARCH_CACHE_PATH` (opcional).
+    """
+    if os.getenv("SEARCH_BACKEND", "tavily").lower() == "fixture":
+        backend: SearchBackend = FixtureSearchBackend.from_file(os.environ["SEARCH_FIXTURE_PATH"])
+    else:
+        backend = TavilySearchBackend(api_key=os.getenv("TAVILY_API_KEY", "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"))
+    cache = SearchCache(
+        max_entries=int(os.getenv("SEARCH_CACHE_SIZE", "256")),
+        ttl=float(os.getenv("SEARCH_CACHE_TTL", "3600")),
+        path=os.getenv("SEARCH_CACHE_PATH") or None,
+    )
+    return SearchService(backend, cache)
+
+
+def get_search_service() -> SearchService:
+    """Retorna o serviço de busca compartilhado pelo processo, criando-o no primeiro uso."""
+    global _search_service
+    if _search_service is None:
+        _search_service = create_search_service_from_env()
+    return _search_service
+
+
+def set_search_service(service: Optional[SearchService]) -> None:
+    """Substitui o serviço de busca compartilhado (ex.: por um backend de fixtures)."""
+    global _search_service
+    _search_service = service
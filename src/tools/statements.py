@@ -0,0 +1,107 @@
+import threading
+from typing import Dict, Optional
+
+
+class Statement:
+    """
+    Consulta de formato fixo declarada uma única vez e executada com parâmetros vinculados.
+    Os placeholders usam o estilo `%s` e são convertidos para o estilo do backend na preparação.
+    """
+
+    def __init__(self, name: str, sql: str) -> None:
+        self.name = name
+        self.sql = " ".join(sql.split())  # Texto normalizado: o mesmo plano para todas as chamadas
+        self.count = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self._lock = threading.Lock()
+
+    def sql_for(self, paramstyle: str) -> str:
+        return self.sql if paramstyle == "%s" else self.sql.replace("%s", paramstyle)
+
+    def record(self, elapsed_ms: float, error: bool = False) -> None:
+        with self._lock:
+            self.count += 1
+            self.total_ms += elapsed_ms
+            self.max_ms = max(self.max_ms, elapsed_ms)
+            if error:
+                self.errors += 1
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "count": self.count,
+                "errors": self.errors,
+                "total_ms": round(self.total_ms, 3),
+                "avg_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+                "max_ms": round(self.max_ms, 3),
+            }
+
+
+_statements: Dict[str, Statement] = {}
+
+
+def register_statement(name: str, sql: str) -> Statement:
+    if name in _statements:
+        raise ValueError(f"Statement já registrado: {name}")
+    statement = Statement(name, sql)
+    _statements[name] = statement
+    return statement
+
+
+def get_statement(name: str) -> Statement:
+    statement: Optional[Statement] = _statements.get(name)
+    if statement is None:
+        raise KeyError(f"Statement desconhecido: {name}")
+    return statement
+
+
+def statement_stats() -> Dict[str, Dict[str, float]]:
+    """Tempo de execução por statement, do mais custoso (tempo total) para o menos custoso."""
+    stats = {name: statement.stats() for name, statement in _statements.items()}
+    return dict(sorted(stats.items(), key=lambda item: item[1]["total_ms"], reverse=True))
+
+
+# Consultas de negócio usadas pelas ferramentas em `custom_tools`
+register_statement(
+    "buscar_assinaturas_ativas",
+    """SELECT a.id_assinatura, c.id_cliente, c.nome_cliente, a.data_inicio, a.status, p.id_plano, p.nome_plano
+         FROM assinaturas a
+                  INNER JOIN clientes c ON a.id_cliente = c.id_cliente
+                  INNER JOIN planos p ON a.id_plano = p.id_plano
+        WHERE a.status = 'Ativo' AND c.cpf = %s""",
+)
+
+register_statement(
+    "listar_planos",
+    "SELECT id_plano, nome_plano FROM planos",
+)
+
+register_statement(
+    "cadastrar_cliente",
+    """INSERT INTO clientes (nome_cliente, email, telefone, cpf, cidade, estado)
+       VALUES (%s, %s, %s, %s, %s, %s)""",
+)
+
+register_statement(
+    "cadastrar_assinatura",
+    """INSERT INTO assinaturas (id_cliente, id_plano, data_inicio, status)
+       VALUES (%s, %s, CURDATE(), 'Ativo')""",
+)
+
+register_statement(
+    "cancelar_assinatura",
+    """UPDATE assinaturas SET status = 'Cancelado'
+        WHERE id_cliente = %s AND id_plano = %s""",
+)
+
+register_statement(
+    "buscar_faturas_abertas",
+    """SELECT f.id_fatura, c.nome_cliente, f.mes_referencia, f.valor_total, f.data_vencimento, f.status_pagamento
+         FROM faturas f
+                  INNER JOIN clientes c ON f.id_cliente = c.id_cliente
+        WHERE f.status_pagamento = 'Pendente'
+          AND f.data_vencimento < CURDATE()
+          AND c.cpf = %s""",
+)
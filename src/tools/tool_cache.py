@@ -0,0 +1,153 @@
+import asyncio
+import functools
+import inspect
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+
+def _is_cacheable(result: Any) -> bool:
+    # Respostas com erro (formato {"result": ..., "error": ...}) nunca são cacheadas
+    return not (isinstance(result, dict) and result.get("error"))
+
+
+class ToolCache:
+    """
+    Cache de respostas para ferramentas somente leitura (`FunctionTool`).
+
+    - TTL por ferramenta e despejo LRU quando `max_entries` é atingido;
+    - chamadas concorrentes idênticas executam a ferramenta uma única vez;
+    - entradas são associadas a tags e invalidadas por ferramentas de escrita;
+    - contadores de hit/miss globais e por ferramenta em `stats()`.
+
+    Uso:
+        @tool_cache.cached(ttl=600, tags=("planos",))
+        async def listar_planos(): ...
+
+        @tool_cache.invalidates("assinaturas")
+        async def cancelar_assinatura(...): ...
+    """
+
+    def __init__(self, max_entries: int = 512) -> None:
+        self._max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, Any, Tuple[str, ...]]]" = OrderedDict()
+        self._inflight: Dict[Tuple[str, str], asyncio.Future] = {}
+        self._generation = 0
+        self._counters: Dict[str, Dict[str, int]] = {}
+
+    def _count(self, name: str, counter: str) -> None:
+        counters = self._counters.setdefault(name, {"hits": 0, "misses": 0, "coalesced": 0})
+        counters[counter] += 1
+
+    def _get(self, key: Tuple[str, str]) -> Tuple[bool, Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        expires_at, value, _ = entry
+        if time.monotonic() >= expires_at:
+            del self._entries[key]
+            return False, None
+        self._entries.move_to_end(key)
+        return True, value
+
+    def _put(self, key: Tuple[str, str], value: Any, ttl: float, tags: Tuple[str, ...]) -> None:
+        self._entries[key] = (time.monotonic() + ttl, value, tags)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    def cached(self, ttl: float, tags: Iterable[str] = (),
+               should_cache: Callable[[Any], bool] = _is_cacheable) -> Callable:
+        tags = tuple(tags)
+
+        def decorator(func: Callable) -> Callable:
+            signature = inspect.signature(func)
+            name = func.__name__
+
+            @functools.wraps(func)
+            async def wrapper(*args: Any, **kwargs: Any) -> Any:
+                bound = signature.bind(*args, **kwargs)
+                bound.apply_defaults()
+                key = (name, json.dumps(bound.arguments, sort_keys=True, default=str))
+
+                while True:
+                    found, value = self._get(key)
+                    if found:
+                        self._count(name, "hits")
+                        return value
+
+                    inflight = self._inflight.get(key)
+                    if inflight is None:
+                        break
+                    # Outra chamada idêntica já está em andamento: aguarda o mesmo resultado
+                    self._count(name, "coalesced")
+                    try:
+                        return await asyncio.shield(inflight)
+                    except asyncio.CancelledError:
+                        # Se quem foi cancelado é a chamada líder (ex.: prazo ou desconexão de outra
+                        # sessão), esta chamada tenta de novo, possivelmente como nova líder
+                        if not inflight.cancelled() or asyncio.current_task().cancelling():
+                            raise
+
+                self._count(name, "misses")
+                future = asyncio.get_running_loop().create_future()
+                self._inflight[key] = future
+                generation = self._generation
+                try:
+                    value = await func(*args, **kwargs)
+                except asyncio.CancelledError:
+                    future.cancel()
+                    raise
+                except Exception as e:
+                    future.set_exception(e)
+                    future.exception()  # Evita o aviso de exceção não consumida quando não há espera
+                    raise
+                else:
+                    future.set_result(value)
+                    # Não armazena se houve uma escrita (invalidação) durante a execução
+                    if generation == self._generation and should_cache(value):
+                        self._put(key, value, ttl, tags)
+                    return value
+                finally:
+                    self._inflight.pop(key, None)
+
+            return wrapper
+
+        return decorator
+
+    def invalidates(self, *tags: str) -> Callable:
+        """Marca uma ferramenta de escrita: após executá-la, as entradas com essas tags são descartadas."""
+
+        def decorator(func: Callable) -> Callable:
+            @functools.wraps(func)
+            async def wrapper(*args: Any, **kwargs: Any) -> Any:
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    self.invalidate(*tags)
+
+            return wrapper
+
+        return decorator
+
+    def invalidate(self, *tags: str) -> None:
+        """Descarta as entradas com qualquer uma das tags (ou todas, se nenhuma tag for informada)."""
+        self._generation += 1
+        if not tags:
+            self._entries.clear()
+            return
+        for key in [key for key, (_, _, entry_tags) in self._entries.items() if set(entry_tags) & set(tags)]:
+            del self._entries[key]
+
+    def stats(self, name: Optional[str] = None) -> Dict[str, Any]:
+        if name is not None:
+            return dict(self._counters.get(name, {"hits": 0, "misses": 0, "coalesced": 0}))
+        totals = {"hits": 0, "misses": 0, "coalesced": 0}
+        for counters in self._counters.values():
+            for counter, value in counters.items():
+                totals[counter] += value
+        return {**totals, "size": len(self._entries), "tools": {k: dict(v) for k, v in self._counters.items()}}
+
+
+tool_cache = ToolCache()
@@ -1,12 +1,198 @@
 import asyncio
+import email.utils
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
 
+# Status HTTP que indicam falha temporária
+RETRYABLE_STATUS = {408, 409, 425, 429, 500, 502, 503, 504}
+# Erros de rede/timeout dos SDKs usados (openai, httpx), reconhecidos pelo nome para não importar os pacotes
+RETRYABLE_ERROR_NAMES = {
+    "APIConnectionError", "APITimeoutError", "RateLimitError", "InternalServerError",
+    "TransportError", "TimeoutException", "ConnectError", "ReadError", "WriteError", "RemoteProtocolError",
+    "ServerDisconnectedError", "SMTPServerDisconnected",
+}
 
-async def retry_async(operation, max_retries=2, delay=2):
-    for attempt in range(max_retries):
+
+class DeadlineExceeded(Exception):
+    """O prazo do turno acabou antes de a operação terminar."""
+
+
+def retry_after_seconds(error: BaseException) -> Optional[float]:
+    """Tempo de espera pedido pela API num erro 429/503 (`retry-after-ms` ou `retry-after`), se houver."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    if headers.get("retry-after-ms"):
         try:
-            return await operation()
-        except Exception as e:
-            print(f"Tentativa {attempt + 1}/{max_retries}: falhou. {e}")
-            if attempt < max_retries - 1:
+            return float(headers["retry-after-ms"]) / 1000
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        parsed = email.utils.parsedate_to_datetime(value)
+        return max(0.0, parsed.timestamp() - time.time()) if parsed else None
+
+
+def _status_code(error: BaseException) -> Optional[int]:
+    return getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    return _status_code(error) == 429 or type(error).__name__ == "RateLimitError"
+
+
+def is_retryable(error: BaseException) -> bool:
+    """
+    Falhas temporárias: timeouts, erros de conexão e status 408/409/425/429/5xx.
+    Erros de validação, de argumentos e 4xx (exceto os acima) não adianta repetir.
+    """
+    if isinstance(error, DeadlineExceeded):
+        return False
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError, ConnectionError)):
+        return True
+    status = _status_code(error)
+    if isinstance(status, int):
+        return status in RETRYABLE_STATUS
+    return any(cls.__name__ in RETRYABLE_ERROR_NAMES for cls in type(error).__mro__)
+
+
+def is_retryable_except_rate_limit(error: BaseException) -> bool:
+    """
+    Como `is_retryable`, sem o 429: para chamadas feitas pelo `ModelScheduler`, que já repete
+    os 429 respeitando o `Retry-After` e suspendendo as demais chamadas.
+    """
+    return not is_rate_limit_error(error) and is_retryable(error)
+
+
+class Deadline:
+    """
+    Prazo de um turno. Com `cancellation_token`, o token é cancelado quando o prazo acaba,
+    interrompendo as chamadas ao modelo e às ferramentas em andamento que o receberam.
+    Use como context manager (ou chame `close`) para desarmar o prazo ao fim do turno.
+    """
+
+    def __init__(self, seconds: Optional[float], cancellation_token: Any = None) -> None:
+        self.expires_at = time.monotonic() + seconds if seconds is not None else None
+        self._timer: Optional[asyncio.TimerHandle] = None
+        if seconds is not None and cancellation_token is not None:
+            self._timer = asyncio.get_running_loop().call_later(seconds, cancellation_token.cancel)
+
+    def remaining(self) -> Optional[float]:
+        return None if self.expires_at is None else self.expires_at - time.monotonic()
+
+    def expired(self) -> bool:
+        remaining = self.remaining()
+        return remaining is not None and remaining <= 0
+
+    def close(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def __enter__(self) -> "Deadline":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+class RetryMetrics:
+    """Contadores por operação: chamadas, tentativas, falhas, prazos estourados e distribuição de retries."""
+
+    def __init__(self) -> None:
+        self._operations: Dict[str, Dict[str, Any]] = {}
+
+    def record(self, name: str, retries: int, outcome: str) -> None:
+        stats = self._operations.setdefault(
+            name, {"calls": 0, "attempts": 0, "ok": 0, "failed": 0, "deadline_exceeded": 0, "retries": {}}
+        )
+        stats["calls"] += 1
+        stats["attempts"] += retries + 1
+        stats[outcome] += 1
+        stats["retries"][retries] = stats["retries"].get(retries, 0) + 1
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {name: {**stats, "retries": dict(sorted(stats["retries"].items()))}
+                for name, stats in sorted(self._operations.items())}
+
+    def reset(self) -> None:
+        self._operations.clear()
+
+
+retry_metrics = RetryMetrics()
+
+
+class RetryPolicy:
+    """
+    Política de repetição assíncrona: até `max_attempts` tentativas, cada uma limitada por
+    `attempt_timeout`, com espera exponencial e jitter completo (aleatória entre 0 e
+    `base_delay * 2^(n-1)`, até `max_delay`) ou o `Retry-After` informado pela API.
+    Só repete erros aceitos por `retry_on` e nunca passa do `Deadline` recebido.
+    """
+
+    def __init__(
+            self,
+            max_attempts: int = 3,
+            base_delay: float = 0.5,
+            max_delay: float = 8.0,
+            attempt_timeout: Optional[float] = None,
+            retry_on: Callable[[BaseException], bool] = is_retryable,
+            metrics: Optional[RetryMetrics] = None,
+    ) -> None:
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.attempt_timeout = attempt_timeout
+        self.retry_on = retry_on
+        self.metrics = metrics if metrics is not None else retry_metrics
+
+    def backoff(self, attempt: int, error: Optional[BaseException] = None) -> float:
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+        retry_after = retry_after_seconds(error) if error is not None else None
+        return max(delay, retry_after) if retry_after is not None else delay
+
+    async def run(self, operation: Callable[[], Awaitable[Any]], name: str,
+                  deadline: Optional[Deadline] = None) -> Any:
+        for attempt in range(1, self.max_attempts + 1):
+            remaining = deadline.remaining() if deadline is not None else None
+            if remaining is not None and remaining <= 0:
+                self.metrics.record(name, attempt - 1, "deadline_exceeded")
+                raise DeadlineExceeded(f"{name}: prazo do turno esgotado")
+            timeout = min((t for t in (self.attempt_timeout, remaining) if t is not None), default=None)
+            try:
+                if timeout is None:
+                    result = await operation()
+                else:
+                    result = await asyncio.wait_for(operation(), timeout)
+                self.metrics.record(name, attempt - 1, "ok")
+                return result
+            except asyncio.CancelledError:
+                if deadline is not None and deadline.expired():
+                    # O token do turno foi cancelado pelo prazo: vira um erro comum para o chamador tratar
+                    self.metrics.record(name, attempt - 1, "deadline_exceeded")
+                    raise DeadlineExceeded(f"{name}: prazo do turno esgotado") from None
+                raise
+            except Exception as e:
+                if deadline is not None and deadline.expired():
+                    self.metrics.record(name, attempt - 1, "deadline_exceeded")
+                    raise DeadlineExceeded(f"{name}: prazo do turno esgotado") from e
+                if attempt == self.max_attempts or not self.retry_on(e):
+                    self.metrics.record(name, attempt - 1, "failed")
+                    raise
+                delay = self.backoff(attempt, e)
+                remaining = deadline.remaining() if deadline is not None else None
+                if remaining is not None and delay >= remaining:
+                    self.metrics.record(name, attempt - 1, "deadline_exceeded")
+                    raise DeadlineExceeded(f"{name}: sem tempo para nova tentativa") from e
+                print(f"{name}: tentativa {attempt}/{self.max_attempts} falhou ({type(e).__name__}: {e}); "
+                      f"nova tentativa em {delay:.2f}s")
                 await asyncio.sleep(delay)
-    raise Exception("Falha ao executar operação após várias tentativas.")
\ No newline at end of file
+
+
+async def retry_async(operation, max_retries=2, delay=2):
+    """Compatibilidade: repete `operation` com a política padrão (`delay` vira o atraso base)."""
+    return await RetryPolicy(max_attempts=max_retries, base_delay=delay).run(operation, name="retry_async")
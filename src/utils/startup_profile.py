@@ -0,0 +1,97 @@
+"""
+Perfil de inicialização do servidor: tempo de import por módulo e tempo até o runtime estar pronto.
+
+    python -m src.utils.startup_profile --top 25
+    python -m src.utils.startup_profile --module src.main --ready
+
+Roda um interpretador novo com `-X importtime` (os módulos já importados neste processo não
+distorcem a medição) e agrega o tempo próprio de cada módulo por pacote de primeiro nível.
+Com `--ready`, mede também o import de `--module` seguido de `get_runtime()` (use
+`MODEL_BACKEND=fake` para não depender das credenciais).
+"""
+import argparse
+import json
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+READY_SNIPPET = """
+import asyncio, json, time
+started = time.perf_counter()
+import {module} as server
+imported = time.perf_counter()
+asyncio.run(server.get_runtime())
+ready = time.perf_counter()
+print(json.dumps({{"import": imported - started, "runtime": ready - imported}}))
+"""
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int]]:
+    """Linhas `import time: self | cumulative | name` em (módulo, próprio µs, acumulado µs)."""
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        modules.append((name.strip(), int(self_us), int(cumulative_us)))
+    return modules
+
+
+def profile_imports(module: str) -> List[Tuple[str, int, int]]:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"], capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Falha ao importar {module}:\n{result.stderr[-2000:]}")
+    return parse_importtime(result.stderr)
+
+
+def profile_ready(module: str) -> Dict[str, float]:
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-c", READY_SNIPPET.format(module=module)], capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Falha ao iniciar o runtime de {module}:\n{result.stderr[-2000:]}")
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    timings["process"] = time.perf_counter() - started
+    return timings
+
+
+def report(modules: List[Tuple[str, int, int]], module: str, top: int) -> None:
+    total = next((cumulative for name, _, cumulative in modules if name == module), 0)
+    by_package: Dict[str, int] = defaultdict(int)
+    for name, self_us, _ in modules:
+        by_package[name.split(".")[0]] += self_us
+
+    print(f"import {module}: {total / 1000:.1f} ms ({len(modules)} módulos)")
+    print(f"\npacotes (tempo próprio somado), top {top}:")
+    for package, self_us in sorted(by_package.items(), key=lambda item: item[1], reverse=True)[:top]:
+        print(f"  {self_us / 1000:8.1f} ms  {100 * self_us / total if total else 0:5.1f}%  {package}")
+    print(f"\nmódulos (tempo próprio), top {top}:")
+    for name, self_us, cumulative_us in sorted(modules, key=lambda item: item[1], reverse=True)[:top]:
+        print(f"  {self_us / 1000:8.1f} ms  (acumulado {cumulative_us / 1000:8.1f} ms)  {name}")
+    own = [(name, cumulative_us) for name, _, cumulative_us in modules if name.split(".")[0] == module.split(".")[0]]
+    print(f"\nmódulos do projeto (acumulado), top {top}:")
+    for name, cumulative_us in sorted(own, key=lambda item: item[1], reverse=True)[:top]:
+        print(f"  {cumulative_us / 1000:8.1f} ms  {name}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="src.main")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--ready", action="store_true", help="mede também o tempo até o runtime iniciar")
+    args = parser.parse_args()
+
+    report(profile_imports(args.module), args.module, args.top)
+    if args.ready:
+        timings = profile_ready(args.module)
+        print(f"\npronto para aceitar conexões: import {timings['import'] * 1000:.0f} ms + "
+              f"runtime {timings['runtime'] * 1000:.0f} ms (processo completo {timings['process'] * 1000:.0f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+Modo multiprocesso: N workers, cada um com seu event loop, runtime e agentes, atendendo a
+mesma porta.
+
+    python -m src.workers --workers 4 --port 5000
+
+Com `--socket reuseport` (padrão no Linux) cada worker abre o próprio socket com
+`SO_REUSEPORT` e o kernel distribui as conexões entre eles; com `--socket shared` o
+supervisor abre um único socket e os workers (criados com fork) aceitam conexões nele.
+
+Afinidade de sessão: cada conexão WebSocket é uma sessão e vive inteira no worker que a
+aceitou (registro de sessões, histórico e instâncias dos agentes são locais ao processo).
+Os operadores de cada worker conectam em `--operator-port + índice`, as métricas ficam em
+`METRICS_PORT + índice` e os limites `MODEL_RPM`/`MODEL_TPM` (da conta inteira) são
+divididos igualmente entre os agendadores dos workers.
+
+O supervisor reinicia workers que caírem. Em SIGINT/SIGTERM repassa SIGTERM aos workers,
+que param de aceitar conexões e esperam as sessões abertas terminarem (até `--grace`
+segundos) antes de sair; quem passar do prazo é finalizado com SIGKILL.
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import signal
+import socket
+import sys
+import time
+from multiprocessing.connection import wait
+from typing import Dict, Optional
+
+# Espera mínima antes de reiniciar um worker que caiu (evita loop de reinício)
+RESTART_BACKOFF = 1.0
+
+
+def create_shared_socket(host: str, port: int) -> socket.socket:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(1024)
+    sock.setblocking(False)
+    return sock
+
+
+def run_worker(index: int, args: argparse.Namespace, sock: Optional[socket.socket]) -> None:
+    """Ponto de entrada de um worker: importa o servidor no próprio processo e serve até SIGTERM."""
+    os.environ["WORKER_INDEX"] = str(index)
+    metrics_port = int(os.getenv("METRICS_PORT", "9100"))
+    if metrics_port:
+        os.environ["METRICS_PORT"] = str(metrics_port + index)
+    # Cada worker tem o próprio agendador de chamadas ao modelo: a cota da API é dividida entre eles
+    for name, default in (("MODEL_RPM", "60"), ("MODEL_TPM", "60000")):
+        os.environ[name] = str(float(os.getenv(name, default)) / args.workers)
+    # Ctrl+C chega a todo o grupo de processos; quem coordena o desligamento é o supervisor
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    from src.main import serve
+
+    async def worker_main() -> None:
+        shutdown = asyncio.Event()
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, shutdown.set)
+        await serve(
+            host=args.host,
+            port=args.port,
+            operator_port=args.operator_port + index,
+            reuse_port=sock is None,
+            sock=sock,
+            shutdown=shutdown,
+            grace=args.grace,
+        )
+
+    asyncio.run(worker_main())
+
+
+class Supervisor:
+    """Cria, monitora e encerra os processos workers."""
+
+    def __init__(self, args: argparse.Namespace) -> None:
+        self._args = args
+        self._context = multiprocessing.get_context("fork")
+        self._sock = create_shared_socket(args.host, args.port) if args.socket == "shared" else None
+        self._workers: Dict[int, multiprocessing.Process] = {}
+        self._started_at: Dict[int, float] = {}
+        self._stopping = False
+
+    def _spawn(self, index: int) -> None:
+        process = self._context.Process(
+            target=run_worker, args=(index, self._args, self._sock), name=f"worker-{index}", daemon=False,
+        )
+        process.start()
+        self._workers[index] = process
+        self._started_at[index] = time.monotonic()
+        print(f"worker {index} iniciado (pid {process.pid})", flush=True)
+
+    def _request_stop(self, signum, frame) -> None:
+        self._stopping = True
+
+    def run(self) -> int:
+        signal.signal(signal.SIGINT, self._request_stop)
+        signal.signal(signal.SIGTERM, self._request_stop)
+        for index in range(self._args.workers):
+            self._spawn(index)
+
+        while not self._stopping:
+            wait([process.sentinel for process in self._workers.values()], timeout=0.5)
+            for index, process in list(self._workers.items()):
+                if process.is_alive() or self._stopping:
+                    continue
+                print(f"worker {index} saiu com código {process.exitcode}; reiniciando", flush=True)
+                # Um worker que cai logo após iniciar espera antes de ser recriado
+                time.sleep(max(0.0, RESTART_BACKOFF - (time.monotonic() - self._started_at[index])))
+                self._spawn(index)
+        return self.shutdown()
+
+    def shutdown(self) -> int:
+        print(f"encerrando {len(self._workers)} workers (prazo de {self._args.grace:.0f}s)", flush=True)
+        for process in self._workers.values():
+            if process.is_alive():
+                os.kill(process.pid, signal.SIGTERM)
+        deadline = time.monotonic() + self._args.grace + 5
+        for index, process in self._workers.items():
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                print(f"worker {index} não terminou no prazo; finalizando", flush=True)
+                process.kill()
+                process.join()
+        if self._sock is not None:
+            self._sock.close()
+        return 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WORKERS", os.cpu_count() or 1)))
+    parser.add_argument("--host", default=os.getenv("HOST", "localhost"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "5000")))
+    parser.add_argument("--operator-port", type=int, default=int(os.getenv("OPERATOR_PORT", "5001")))
+    parser.add_argument("--socket", choices=["reuseport", "shared"],
+                        default="reuseport" if hasattr(socket, "SO_REUSEPORT") else "shared")
+    parser.add_argument("--grace", type=float, default=float(os.getenv("SHUTDOWN_GRACE", "30")),
+                        help="segundos para as sessões abertas terminarem no desligamento")
+    args = parser.parse_args()
+    if sys.platform == "win32":
+        parser.error("o modo multiprocesso requer fork (Linux/macOS); use `python -m src.main`")
+    if args.socket == "reuseport" and not hasattr(socket, "SO_REUSEPORT"):
+        parser.error("SO_REUSEPORT não está disponível nesta plataforma; use --socket shared")
+    if args.operator_port <= args.port < args.operator_port + args.workers:
+        parser.error("as portas dos operadores (--operator-port + índice) não podem incluir --port")
+    sys.exit(Supervisor(args).run())
+
+
+if __name__ == "__main__":
+    main()
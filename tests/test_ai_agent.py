@@ -0,0 +1,163 @@
+import asyncio
+from typing import List
+
+import pytest
+from autogen_core import (
+    FunctionCall,
+    MessageContext,
+    RoutedAgent,
+    SingleThreadedAgentRuntime,
+    TopicId,
+    TypeSubscription,
+    message_handler,
+)
+from autogen_core.models import FunctionExecutionResultMessage, SystemMessage, UserMessage
+from autogen_core.tools import FunctionTool
+
+from src.agents.ai_agent import FALLBACK_REPLY, AIAgent, is_error_result
+from src.agents.conversation_store import ConversationStore
+from src.agents.responses import AgentResponse, UserTask
+from src.common.fake_model_client import FakeChatCompletionClient
+from src.common.metrics import tool_results, turn_fallbacks
+
+AGENT_TYPE = "TestAgent"
+USER_TYPE = "TestUser"
+TARGET_TYPE = "TargetAgent"
+
+
+class ResponseCollector(RoutedAgent):
+    """Agente do usuário de teste: guarda as AgentResponse recebidas."""
+
+    responses: List[AgentResponse] = []
+
+    def __init__(self) -> None:
+        super().__init__("Coleta as respostas")
+
+    @message_handler
+    async def handle_response(self, message: AgentResponse, ctx: MessageContext) -> None:
+        self.responses.append(message)
+
+
+class TaskCollector(RoutedAgent):
+    """Agente de destino das transferências: guarda as tarefas recebidas."""
+
+    tasks: List[UserTask] = []
+
+    def __init__(self) -> None:
+        super().__init__("Coleta as tarefas delegadas")
+
+    @message_handler
+    async def handle_task(self, message: UserTask, ctx: MessageContext) -> None:
+        self.tasks.append(message)
+
+
+def transfer_to_target() -> str:
+    return TARGET_TYPE
+
+
+async def run_turn(reply, tools=(), delegate_tools=(), text="oi", latency=0.01, **agent_options):
+    """Roda um turno do AIAgent com o modelo falso e retorna as respostas publicadas e o store."""
+    store = ConversationStore()
+    ResponseCollector.responses = []
+    TaskCollector.tasks = []
+    runtime = SingleThreadedAgentRuntime()
+    model_client = FakeChatCompletionClient(reply=reply, latency=latency)
+    await AIAgent.register(runtime, AGENT_TYPE, lambda: AIAgent(
+        description="Agente de teste", system_message=SystemMessage(content="Você é um agente de teste."),
+        model_client=model_client, tools=list(tools), delegate_tools=list(delegate_tools), agent_topic_type=AGENT_TYPE,
+        user_topic_type=USER_TYPE, sessions=None, nome="Teste", avatar="", store=store, **agent_options,
+    ))
+    await ResponseCollector.register(runtime, USER_TYPE, ResponseCollector)
+    await TaskCollector.register(runtime, TARGET_TYPE, TaskCollector)
+    for topic_type in (AGENT_TYPE, USER_TYPE, TARGET_TYPE):
+        await runtime.add_subscription(TypeSubscription(topic_type=topic_type, agent_type=topic_type))
+    runtime.start()
+    offset = store.append("s1", [UserMessage(content=text, source="User")])
+    await runtime.publish_message(
+        UserTask(session_id="s1", offset=offset, entries=store.snapshot("s1")[offset:]),
+        topic_id=TopicId(AGENT_TYPE, source="s1"),
+    )
+    await runtime.stop_when_idle()
+    return ResponseCollector.responses, store, model_client
+
+
+def call_tool_then_answer(tool_name: str):
+    def reply(messages, tools):
+        if isinstance(messages[-1], FunctionExecutionResultMessage):
+            return "pronto"
+        return [FunctionCall(id="call_1", name=tool_name, arguments="{}")]
+
+    return reply
+
+
+@pytest.mark.parametrize("result, failed", [
+    ({"result": [], "error": None}, False),
+    ({"result": None, "error": "Erro ao executar SQL"}, True),
+    ({"message_id": None, "status": "rejected", "error": "destinatário inválido"}, True),
+    (None, True),
+    ("PROT-20250101-000000-1234", False),
+])
+def test_is_error_result(result, failed):
+    assert is_error_result(result) is failed
+
+
+def test_tool_errors_returned_in_the_result_are_counted():
+    async def consultar_banco() -> dict:
+        return {"result": None, "error": "Erro ao executar SQL: conexão recusada"}
+
+    before = tool_results.value("consultar_banco", "error")
+    tool = FunctionTool(consultar_banco, description="Consulta o banco")
+    responses, _, _ = asyncio.run(run_turn(call_tool_then_answer("consultar_banco"), tools=[tool]))
+    assert responses[-1].entries[-1].content == "pronto"
+    assert tool_results.value("consultar_banco", "error") == before + 1
+    assert tool_results.value("consultar_banco", "ok") == 0
+
+
+def test_turn_mixing_tools_and_a_transfer_stops_after_delegating():
+    async def listar_planos() -> dict:
+        return {"result": ["Fibra 500"], "error": None}
+
+    def reply(messages, tools):
+        return [FunctionCall(id="call_tool", name="listar_planos", arguments="{}"),
+                FunctionCall(id="call_transfer", name="transfer_to_target", arguments="{}")]
+
+    responses, store, model_client = asyncio.run(run_turn(
+        reply,
+        tools=[FunctionTool(listar_planos, description="Lista os planos")],
+        delegate_tools=[FunctionTool(transfer_to_target, description="Transfere")],
+    ))
+    # O agente não volta ao modelo nem responde: a sessão passou para o agente de destino
+    assert model_client.calls == 1
+    assert responses == []
+    assert len(TaskCollector.tasks) == 1
+
+    log = list(store.snapshot("s1"))
+    assert [type(entry).__name__ for entry in log] == [
+        "UserMessage", "AssistantMessage", "FunctionExecutionResultMessage",
+        "AssistantMessage", "FunctionExecutionResultMessage",
+    ]
+    # Cada chamada fica junto do seu resultado; a transferência vem depois das ferramentas
+    assert [call.id for call in log[1].content] == ["call_tool"]
+    assert [result.call_id for result in log[2].content] == ["call_tool"]
+    assert [call.id for call in log[3].content] == ["call_transfer"]
+    task = TaskCollector.tasks[0]
+    assert task.offset == 1 and len(task.entries) == 4
+
+
+def model_failure(messages, tools):
+    raise ValueError("resposta inválida do modelo")
+
+
+@pytest.mark.parametrize("reply, latency, options, reason", [
+    (model_failure, 0.01, {}, "gave_up"),
+    ("tarde demais", 5.0, {"turn_timeout": 0.05}, "deadline"),
+])
+def test_failed_turn_ends_with_the_fallback_reply(reply, latency, options, reason):
+    before = turn_fallbacks.value(AGENT_TYPE, reason)
+    responses, store, _ = asyncio.run(run_turn(reply, latency=latency, **options))
+
+    # O cliente recebe o pedido de desculpas em vez de ficar sem resposta
+    assert len(responses) == 1
+    assert responses[0].entries[-1].content == FALLBACK_REPLY
+    assert store.snapshot("s1")[-1].content == FALLBACK_REPLY
+    assert turn_fallbacks.value(AGENT_TYPE, reason) == before + 1
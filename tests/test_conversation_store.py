@@ -0,0 +1,111 @@
+import asyncio
+from typing import List
+
+import pytest
+from autogen_core import (
+    MessageContext,
+    RoutedAgent,
+    SingleThreadedAgentRuntime,
+    TopicId,
+    TypeSubscription,
+    message_handler,
+)
+from autogen_core.models import AssistantMessage, UserMessage
+
+from src.agents.conversation_store import ConversationGap, ConversationStore, history_entries, merge_delta
+from src.agents.responses import HistoryEntries, HistoryRequest, UserLogin, UserTask
+
+
+def messages(*texts: str) -> List[UserMessage]:
+    return [UserMessage(content=text, source="User") for text in texts]
+
+
+def contents(store: ConversationStore, session_id: str = "s1") -> List[str]:
+    return [entry.content for entry in store.snapshot(session_id)]
+
+
+def test_merge_skips_entries_already_in_the_log():
+    store = ConversationStore()
+    store.append("s1", messages("a", "b"))
+    store.merge("s1", 1, messages("b", "c", "d"))
+    assert contents(store) == ["a", "b", "c", "d"]
+
+    # Com o store compartilhado o delta já está no log: nada é copiado
+    offset, entries = store.delta("s1", 2)
+    store.merge("s1", offset, entries)
+    assert contents(store) == ["a", "b", "c", "d"]
+
+
+def test_merge_raises_on_a_gap_without_changing_the_log():
+    store = ConversationStore()
+    store.append("s1", messages("a"))
+    with pytest.raises(ConversationGap):
+        store.merge("s1", 3, messages("d"))
+    assert contents(store) == ["a"]
+
+
+def test_snapshot_is_not_affected_by_later_appends():
+    store = ConversationStore()
+    store.append("s1", messages("a", "b"))
+    snapshot = store.snapshot("s1")
+    store.append("s1", messages("c"))
+    assert len(snapshot) == 2
+    assert [entry.content for entry in snapshot[0:]] == ["a", "b"]
+    with pytest.raises(IndexError):
+        snapshot[2]
+
+
+# Agentes em "processos" diferentes: cada um com o seu store
+sender_store = ConversationStore()
+receiver_store = ConversationStore()
+
+
+class SenderAgent(RoutedAgent):
+    def __init__(self) -> None:
+        super().__init__("Envia deltas do próprio store")
+
+    @message_handler
+    async def handle_login(self, message: UserLogin, ctx: MessageContext) -> None:
+        offset, entries = sender_store.delta(self.id.key, len(sender_store.snapshot(self.id.key)) - 1)
+        await self.publish_message(
+            UserTask(session_id=self.id.key, offset=offset, entries=entries),
+            topic_id=TopicId("Receiver", source=self.id.key),
+        )
+
+    @message_handler
+    async def handle_history_request(self, message: HistoryRequest, ctx: MessageContext) -> HistoryEntries:
+        return history_entries(sender_store, message)
+
+
+class ReceiverAgent(RoutedAgent):
+    def __init__(self) -> None:
+        super().__init__("Aplica os deltas recebidos")
+
+    @message_handler
+    async def handle_task(self, message: UserTask, ctx: MessageContext) -> None:
+        await merge_delta(self, receiver_store, self.id.key, message.offset, message.entries, ctx.sender)
+
+
+def test_merge_delta_fetches_the_missing_entries_from_the_sender():
+    async def scenario():
+        sender_store.append("s1", messages("a", "b") + [AssistantMessage(content="c", source="Sender")])
+        sender_store.append("s1", messages("d"))
+        receiver_store.append("s1", messages("a"))
+
+        runtime = SingleThreadedAgentRuntime()
+        await SenderAgent.register(runtime, "Sender", SenderAgent)
+        await ReceiverAgent.register(runtime, "Receiver", ReceiverAgent)
+        for topic_type in ("Sender", "Receiver"):
+            await runtime.add_subscription(TypeSubscription(topic_type=topic_type, agent_type=topic_type))
+        runtime.start()
+        await runtime.publish_message(UserLogin(), topic_id=TopicId("Sender", source="s1"))
+        await runtime.stop_when_idle()
+
+    asyncio.run(scenario())
+    assert contents(receiver_store) == ["a", "b", "c", "d"]
+
+
+def test_merge_delta_without_a_sender_propagates_the_gap():
+    store = ConversationStore()
+    with pytest.raises(ConversationGap):
+        asyncio.run(merge_delta(None, store, "s1", 2, messages("c"), sender=None))
@@ -0,0 +1,124 @@
+import asyncio
+import time
+
+import pytest
+
+from src.tools.database import ConnectionPool, SQLiteBackend
+
+
+class FlakyBackend(SQLiteBackend):
+    """SQLite com health check controlado pelo teste e registro das conexões fechadas."""
+
+    def __init__(self) -> None:
+        super().__init__(":memory:", init_script="CREATE TABLE t (x INTEGER);")
+        self.healthy = True
+        self.closed = []
+
+    def ping(self, connection):
+        return self.healthy and super().ping(connection)
+
+    def close(self, connection):
+        self.closed.append(connection)
+        super().close(connection)
+
+
+def test_failed_query_rolls_back_and_reuses_a_healthy_connection():
+    async def scenario():
+        backend = FlakyBackend()
+        pool = ConnectionPool(backend, max_size=1)
+        with pytest.raises(RuntimeError):
+            async with pool.connection() as connection:
+                await pool.run_in_thread(connection.execute, "INSERT INTO t VALUES (1)")
+                raise RuntimeError("falha depois da escrita")
+
+        assert pool.stats() == {"size": 1, "idle": 1, "in_use": 0, "max_size": 1}
+        assert backend.closed == []
+        async with pool.connection() as reused:
+            assert reused is connection
+        assert await pool.execute("SELECT COUNT(*) AS n FROM t") == [{"n": 0}]
+        await pool.close()
+
+    asyncio.run(scenario())
+
+
+def test_failed_query_discards_a_broken_connection():
+    async def scenario():
+        backend = FlakyBackend()
+        pool = ConnectionPool(backend, max_size=1)
+        with pytest.raises(RuntimeError):
+            async with pool.connection() as connection:
+                backend.healthy = False
+                raise RuntimeError("conexão perdida")
+
+        assert backend.closed == [connection]
+        assert pool.stats()["size"] == 0
+        backend.healthy = True
+        assert await pool.execute("SELECT 1 AS x") == [{"x": 1}]
+        await pool.close()
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_query_discards_the_connection():
+    async def scenario():
+        backend = FlakyBackend()
+        pool = ConnectionPool(backend, max_size=1)
+
+        async def slow():
+            async with pool.connection():
+                await pool.run_in_thread(time.sleep, 0.2)
+
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(slow(), 0.02)
+
+        # A thread do driver ainda pode estar usando a conexão: ela não volta ao pool
+        assert len(backend.closed) == 1
+        assert pool.stats()["size"] == 0
+        assert await pool.execute("SELECT 1 AS x") == [{"x": 1}]
+        await pool.close()
+
+    asyncio.run(scenario())
+
+
+def test_idle_connection_failing_health_check_is_replaced():
+    async def scenario():
+        backend = FlakyBackend()
+        pool = ConnectionPool(backend, max_size=1, health_check_interval=0.0)
+        async with pool.connection() as stale:
+            pass
+        backend.healthy = False
+        async with pool.connection() as fresh:
+            assert fresh is not stale
+        assert backend.closed == [stale]
+        assert pool.stats()["size"] == 1
+        await pool.close()
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_connect_releases_the_slot():
+    async def scenario():
+        pool = ConnectionPool(SQLiteBackend(":memory:"), max_size=1, acquire_timeout=1.0)
+        acquiring = asyncio.ensure_future(pool.acquire())
+        await asyncio.sleep(0)
+        acquiring.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await acquiring
+
+        assert pool.stats()["size"] == 0
+        assert await pool.execute("SELECT 2 AS y") == [{"y": 2}]
+        await pool.close()
+
+    asyncio.run(scenario())
+
+
+def test_acquire_times_out_when_the_pool_is_full():
+    async def scenario():
+        pool = ConnectionPool(SQLiteBackend(":memory:"), max_size=1, acquire_timeout=0.05)
+        async with pool.connection():
+            with pytest.raises(TimeoutError):
+                await pool.acquire()
+        assert pool.stats() == {"size": 1, "idle": 1, "in_use": 0, "max_size": 1}
+        await pool.close()
+
+    asyncio.run(scenario())
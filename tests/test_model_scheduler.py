@@ -0,0 +1,50 @@
+import asyncio
+
+import pytest
+from autogen_core.models import UserMessage
+
+from src.common.fake_model_client import FakeChatCompletionClient
+from src.common.model_scheduler import ModelScheduler, ScheduledChatCompletionClient, model_call_scope
+
+MESSAGES = [UserMessage(content="oi", source="User")]
+
+
+def scheduled_client(latency: float, **kwargs) -> ScheduledChatCompletionClient:
+    scheduler = ModelScheduler([FakeChatCompletionClient(latency=latency)], requests_per_minute=6000,
+                               tokens_per_minute=10_000_000, **kwargs)
+    return ScheduledChatCompletionClient(scheduler)
+
+
+def test_attempt_timeout_starts_at_dispatch():
+    async def call(client, session_id):
+        with model_call_scope(session_id, attempt_timeout=0.3):
+            return await client.create(MESSAGES)
+
+    async def scenario():
+        # Uma vaga só: cada chamada espera ~0.2s na fila por chamada à frente; com o limite
+        # contado desde o enfileiramento, a terceira estouraria os 0.3s
+        client = scheduled_client(0.2, max_concurrency=1)
+        return await asyncio.gather(*(call(client, f"s{i}") for i in range(3)))
+
+    results = asyncio.run(scenario())
+    assert [result.content for result in results] == ["ok", "ok", "ok"]
+
+
+def test_attempt_timeout_limits_the_call_itself():
+    async def scenario():
+        client = scheduled_client(0.5)
+        with model_call_scope("s1", attempt_timeout=0.1):
+            await client.create(MESSAGES)
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(scenario())
+
+
+def test_attempt_timeout_limits_streams():
+    async def scenario():
+        client = scheduled_client(0.5)
+        with model_call_scope("s1", attempt_timeout=0.1):
+            return [chunk async for chunk in client.create_stream(MESSAGES)]
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(scenario())
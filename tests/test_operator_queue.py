@@ -0,0 +1,69 @@
+import asyncio
+import json
+
+from autogen_core import SingleThreadedAgentRuntime, TopicId, TypeSubscription
+from autogen_core.models import UserMessage
+
+from src.agents.conversation_store import ConversationStore
+from src.agents.human_agent import HumanAgent
+from src.agents.operator_queue import OperatorQueue
+from src.agents.responses import UserTask
+from src.agents.user_agent_socket import UserAgent
+from src.common.session_registry import SessionRegistry
+from src.utils.topics import human_agent_topic_type, triage_agent_topic_type, user_topic_type
+
+
+class FakeWebSocket:
+    def __init__(self, inputs):
+        self.inputs = list(inputs)
+        self.sent = []
+
+    async def recv(self):
+        return self.inputs.pop(0)
+
+    async def send(self, data):
+        self.sent.append(json.loads(data))
+
+
+async def start_runtime(store, sessions, queue):
+    runtime = SingleThreadedAgentRuntime()
+    await HumanAgent.register(runtime, human_agent_topic_type, lambda: HumanAgent(
+        "A human agent.", human_agent_topic_type, user_topic_type, operator_queue=queue, store=store,
+    ))
+    await UserAgent.register(runtime, user_topic_type, lambda: UserAgent(
+        "A user agent.", user_topic_type, triage_agent_topic_type, sessions=sessions, store=store,
+    ))
+    for topic_type in (human_agent_topic_type, user_topic_type):
+        await runtime.add_subscription(TypeSubscription(topic_type=topic_type, agent_type=topic_type))
+    queue.bind(runtime)
+    runtime.start()
+    return runtime
+
+
+def test_operator_answer_reaches_the_client():
+    async def scenario():
+        store, sessions, queue = ConversationStore(), SessionRegistry(), OperatorQueue()
+        websocket = FakeWebSocket(["exit"])
+        sessions.register("s1", websocket)
+        runtime = await start_runtime(store, sessions, queue)
+
+        offset = store.append("s1", [UserMessage(content="quero falar com um humano", source="User")])
+        await runtime.publish_message(
+            UserTask(session_id="s1", offset=offset, entries=store.snapshot("s1")[offset:]),
+            topic_id=TopicId(human_agent_topic_type, source="s1"),
+        )
+        await runtime.stop_when_idle()
+        assert [escalation["session_id"] for escalation in queue.pending()] == ["s1"]
+
+        runtime.start()
+        queue.claim("s1", "Ana")
+        await queue.answer("s1", "Ana", "Olá, sou a Ana. Como posso ajudar?")
+        await runtime.stop_when_idle()
+        return websocket.sent, store, queue
+
+    sent, store, queue = asyncio.run(scenario())
+    assert queue.pending() == []
+    assert len(sent) == 1
+    assert sent[0]["content"] == "Olá, sou a Ana. Como posso ajudar?"
+    assert sent[0]["sender"]["name"] == "Ana"
+    assert store.snapshot("s1")[-1].content == "Olá, sou a Ana. Como posso ajudar?"
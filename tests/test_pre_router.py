@@ -0,0 +1,35 @@
+import pytest
+
+from src.agents.pre_router import KeywordRouter, TRIAGE_RULES
+
+
+@pytest.fixture
+def router():
+    return KeywordRouter(TRIAGE_RULES)
+
+
+@pytest.mark.parametrize("text", [
+    "não tenho problema nenhum, só queria saber o horário de atendimento",
+    "quero saber se vale a pena cancelar ou trocar de plano",
+    "o atendente anterior me prometeu um desconto",
+    "não estou sem internet, só quero a segunda via",
+    "cancelar",
+])
+def test_negated_or_single_weak_hits_go_to_the_llm(router, text):
+    assert router.decide(text) is None
+
+
+@pytest.mark.parametrize("text, tool_name", [
+    ("quero cancelar meu plano", "transfer_cancellation_agent"),
+    ("estou sem internet desde ontem", "transfer_to_issues_and_repairs"),
+    ("a internet está muito lenta", "transfer_to_issues_and_repairs"),
+    ("quais são os planos de fibra?", "transfer_to_sales_agent"),
+    ("quero falar com um atendente sobre um problema", "escalate_to_human"),
+])
+def test_strong_phrases_route_without_the_llm(router, text, tool_name):
+    assert router.decide(text).tool_name == tool_name
+
+
+def test_weak_hit_inside_a_strong_phrase_counts_once(router):
+    # "caiu" já está em "internet caiu": a intenção de cancelar empata e a fala vai para o LLM
+    assert router.decide("minha internet caiu e quero cancelar") is None
@@ -0,0 +1,53 @@
+import pytest
+from autogen_core import FunctionCall
+from autogen_core.models import CreateResult, RequestUsage, UserMessage
+
+from src.agents.response_cache import ResponseCache
+
+DELEGATE_TOOLS = ["transfer_to_cancellation_agent", "transfer_to_issues_and_repairs_agent"]
+
+
+def transfer(tool_name: str) -> CreateResult:
+    return CreateResult(
+        finish_reason="function_calls",
+        content=[FunctionCall(id="call_1", name=tool_name, arguments="{}")],
+        usage=RequestUsage(prompt_tokens=10, completion_tokens=5),
+        cached=False,
+    )
+
+
+def ask(cache: ResponseCache, text: str):
+    return cache.lookup("TriageAgent", [UserMessage(content=text, source="User")])
+
+
+@pytest.mark.parametrize("cached, asked, tool_name", [
+    ("quero cancelar meu plano", "não quero cancelar meu plano", "transfer_to_cancellation_agent"),
+    ("não quero cancelar meu plano", "quero cancelar meu plano", "transfer_to_cancellation_agent"),
+    ("minha internet caiu", "minha internet não caiu", "transfer_to_issues_and_repairs_agent"),
+    ("minha internet não caiu", "minha internet caiu", "transfer_to_issues_and_repairs_agent"),
+])
+def test_negated_question_does_not_reuse_transfer(cached, asked, tool_name):
+    cache = ResponseCache()
+    cache.store("TriageAgent", [UserMessage(content=cached, source="User")], transfer(tool_name), DELEGATE_TOOLS)
+    assert ask(cache, asked) is None
+    assert cache.stats()["similar_hits"] == 0
+
+
+def test_similar_question_reuses_transfer_with_new_call_id():
+    cache = ResponseCache()
+    cache.store("TriageAgent", [UserMessage(content="quero cancelar meu plano", source="User")],
+                transfer("transfer_to_cancellation_agent"), DELEGATE_TOOLS)
+    result = ask(cache, "queria cancelar meu plano")
+    assert result is not None and result.cached
+    assert [call.name for call in result.content] == ["transfer_to_cancellation_agent"]
+    assert result.content[0].id != "call_1"
+    assert cache.stats()["similar_hits"] == 1
+
+
+def test_text_answers_need_an_identical_key():
+    cache = ResponseCache()
+    answer = CreateResult(finish_reason="stop", content="Olá!", usage=RequestUsage(prompt_tokens=1, completion_tokens=1),
+                          cached=False)
+    cache.store("TriageAgent", [UserMessage(content="Oi, tudo bem?", source="User")], answer, DELEGATE_TOOLS)
+    assert ask(cache, "oi tudo bem").content == "Olá!"
+    assert ask(cache, "oi tudo bom") is None
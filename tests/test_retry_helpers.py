@@ -0,0 +1,131 @@
+import asyncio
+
+import pytest
+
+from autogen_core import CancellationToken
+
+from src.utils.retry_helpers import (
+    Deadline,
+    DeadlineExceeded,
+    RetryMetrics,
+    RetryPolicy,
+    is_retryable,
+    is_retryable_except_rate_limit,
+)
+
+
+class StatusError(Exception):
+    def __init__(self, status_code: int) -> None:
+        super().__init__(f"status {status_code}")
+        self.status_code = status_code
+
+
+class RateLimitError(Exception):
+    pass
+
+
+def failing(errors: list, result: str = "ok"):
+    """Operação que levanta os erros da lista, um por tentativa, e depois retorna `result`."""
+    calls = []
+
+    async def operation():
+        calls.append(len(calls) + 1)
+        if errors:
+            raise errors.pop(0)
+        return result
+
+    return operation, calls
+
+
+def policy(**kwargs) -> RetryPolicy:
+    return RetryPolicy(base_delay=0.001, max_delay=0.002, metrics=RetryMetrics(), **kwargs)
+
+
+@pytest.mark.parametrize("error", [StatusError(429), RateLimitError("limite")])
+def test_rate_limits_are_left_to_the_scheduler(error):
+    assert is_retryable(error)
+    assert not is_retryable_except_rate_limit(error)
+
+    operation, calls = failing([error])
+    with pytest.raises(type(error)):
+        asyncio.run(policy(max_attempts=3, retry_on=is_retryable_except_rate_limit).run(operation, name="model"))
+    assert calls == [1]
+
+
+def test_other_transient_errors_are_still_retried_without_rate_limits():
+    operation, calls = failing([StatusError(503), asyncio.TimeoutError()])
+    result = asyncio.run(policy(max_attempts=3, retry_on=is_retryable_except_rate_limit).run(operation, name="model"))
+    assert result == "ok"
+    assert calls == [1, 2, 3]
+
+
+def test_non_retryable_errors_pass_through_on_the_first_attempt():
+    retry = policy(max_attempts=3)
+    operation, calls = failing([ValueError("argumento inválido")])
+    with pytest.raises(ValueError):
+        asyncio.run(retry.run(operation, name="tool"))
+    assert calls == [1]
+    assert retry.metrics.stats()["tool"]["failed"] == 1
+
+
+def test_last_error_is_raised_when_attempts_run_out():
+    retry = policy(max_attempts=2)
+    operation, calls = failing([StatusError(503), StatusError(502)])
+    with pytest.raises(StatusError) as raised:
+        asyncio.run(retry.run(operation, name="tool"))
+    assert raised.value.status_code == 502
+    assert calls == [1, 2]
+
+
+def test_attempt_timeout_retries_a_stuck_attempt():
+    calls = []
+
+    async def operation():
+        calls.append(len(calls) + 1)
+        if len(calls) == 1:
+            await asyncio.sleep(10)
+        return "ok"
+
+    retry = policy(max_attempts=2, attempt_timeout=0.05)
+    assert asyncio.run(retry.run(operation, name="model")) == "ok"
+    assert calls == [1, 2]
+    assert retry.metrics.stats()["model"]["retries"] == {1: 1}
+
+
+def test_deadline_bounds_the_attempt():
+    async def scenario():
+        retry = policy(max_attempts=3, attempt_timeout=10.0)
+        started = asyncio.get_running_loop().time()
+        with pytest.raises(DeadlineExceeded):
+            await retry.run(lambda: asyncio.sleep(10), name="model", deadline=Deadline(0.05))
+        assert asyncio.get_running_loop().time() - started < 1.0
+        assert retry.metrics.stats()["model"]["deadline_exceeded"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_expired_deadline_skips_the_operation():
+    async def scenario():
+        operation, calls = failing([])
+        with pytest.raises(DeadlineExceeded):
+            await policy().run(operation, name="tool", deadline=Deadline(0.0))
+        assert calls == []
+
+    asyncio.run(scenario())
+
+
+def test_cancellation_by_the_deadline_becomes_deadline_exceeded():
+    async def scenario():
+        token = CancellationToken()
+
+        async def operation():
+            future = asyncio.ensure_future(asyncio.sleep(10))
+            token.link_future(future)
+            return await future
+
+        with Deadline(0.05, token) as deadline:
+            with pytest.raises(DeadlineExceeded):
+                await policy(max_attempts=3).run(operation, name="tool", deadline=deadline)
+        assert token.is_cancelled()
+
+    asyncio.run(scenario())
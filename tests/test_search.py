@@ -0,0 +1,49 @@
+import asyncio
+import json
+
+import pytest
+
+from src.tools.search import FixtureSearchBackend, SearchCache, SearchService
+
+CORPUS = [{"url": "https://exemplo/fibra", "title": "Planos de fibra", "content": "Fibra de 500 mega com wi-fi"}]
+
+
+class CountingBackend(FixtureSearchBackend):
+    def __init__(self):
+        super().__init__(CORPUS, latency=0.05)
+        self.queries = []
+
+    async def search(self, query):
+        self.queries.append(query)
+        return await super().search(query)
+
+
+def test_identical_searches_hit_the_backend_once():
+    async def scenario():
+        backend = CountingBackend()
+        service = SearchService(backend, SearchCache())
+        results = await asyncio.gather(*(service.search("planos de fibra") for _ in range(3)))
+        return backend, results, await service.search("Planos  de FIBRA")
+
+    backend, results, cached = asyncio.run(scenario())
+    assert len(backend.queries) == 1
+    assert json.loads(results[0])[0]["url"] == "https://exemplo/fibra"
+    assert cached == results[0]
+
+
+def test_waiter_completes_when_the_leader_is_cancelled():
+    async def scenario():
+        backend = CountingBackend()
+        service = SearchService(backend, SearchCache())
+        leader = asyncio.create_task(service.search("planos de fibra"))
+        await asyncio.sleep(0.01)
+        waiter = asyncio.create_task(service.search("planos de fibra"))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return backend, await asyncio.wait_for(waiter, 1)
+
+    backend, result = asyncio.run(scenario())
+    assert json.loads(result)[0]["url"] == "https://exemplo/fibra"
+    assert len(backend.queries) == 2
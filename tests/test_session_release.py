@@ -0,0 +1,47 @@
+import asyncio
+
+import pytest
+from autogen_core import AgentId, SingleThreadedAgentRuntime
+from autogen_core.models import UserMessage
+
+from src.agents.conversation_store import conversation_store
+from src.agents.human_agent import HumanAgent
+from src.common.session_registry import session_agents
+from src.main import release_session
+from src.utils.topics import human_agent_topic_type, user_topic_type
+
+
+async def instantiate(runtime, *session_ids):
+    for session_id in session_ids:
+        await runtime.try_get_underlying_agent_instance(AgentId(human_agent_topic_type, session_id))
+
+
+def test_release_session_drops_only_the_session_agents():
+    async def scenario():
+        runtime = SingleThreadedAgentRuntime()
+        await HumanAgent.register(runtime, human_agent_topic_type, lambda: HumanAgent(
+            "A human agent.", human_agent_topic_type, user_topic_type,
+        ))
+        await instantiate(runtime, "release-1", "release-2")
+        conversation_store.append("release-1", [UserMessage(content="oi", source="User")])
+
+        release_session(runtime, "release-1")
+
+        assert AgentId(human_agent_topic_type, "release-1") not in runtime._instantiated_agents
+        assert AgentId(human_agent_topic_type, "release-2") in runtime._instantiated_agents
+        assert "release-1" not in session_agents.sessions()
+        assert "release-2" in session_agents.sessions()
+        assert len(conversation_store.snapshot("release-1")) == 0
+
+        # Uma mensagem nova recria o agente, que volta ao registro
+        await instantiate(runtime, "release-1")
+        assert "release-1" in session_agents.sessions()
+        for session_id in ("release-1", "release-2"):
+            release_session(runtime, session_id)
+
+    asyncio.run(scenario())
+
+
+def test_release_session_fails_loudly_without_agent_instances():
+    with pytest.raises(RuntimeError):
+        release_session(object(), "release-3")
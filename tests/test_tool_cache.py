@@ -0,0 +1,65 @@
+import asyncio
+
+import pytest
+
+from src.tools.tool_cache import ToolCache
+
+
+def make_tool(cache: ToolCache, calls: list, delay: float = 0.05):
+    @cache.cached(ttl=60)
+    async def listar_planos(cpf: str):
+        calls.append(cpf)
+        await asyncio.sleep(delay)
+        return {"result": [f"plano de {cpf}"]}
+
+    return listar_planos
+
+
+def test_identical_concurrent_calls_run_once():
+    async def scenario():
+        cache, calls = ToolCache(), []
+        tool = make_tool(cache, calls)
+        results = await asyncio.gather(*(tool("111") for _ in range(5)))
+        return cache, calls, results
+
+    cache, calls, results = asyncio.run(scenario())
+    assert calls == ["111"]
+    assert all(result == {"result": ["plano de 111"]} for result in results)
+    assert cache.stats("listar_planos") == {"hits": 0, "misses": 1, "coalesced": 4}
+
+
+def test_waiter_completes_when_the_leader_is_cancelled():
+    async def scenario():
+        cache, calls = ToolCache(), []
+        tool = make_tool(cache, calls)
+        leader = asyncio.create_task(tool("111"))
+        await asyncio.sleep(0.01)
+        waiter = asyncio.create_task(tool("111"))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return calls, await asyncio.wait_for(waiter, 1)
+
+    calls, result = asyncio.run(scenario())
+    assert result == {"result": ["plano de 111"]}
+    # O waiter assumiu a chamada depois do cancelamento da líder
+    assert calls == ["111", "111"]
+
+
+def test_cancelled_waiter_does_not_cancel_the_leader():
+    async def scenario():
+        cache, calls = ToolCache(), []
+        tool = make_tool(cache, calls)
+        leader = asyncio.create_task(tool("111"))
+        await asyncio.sleep(0.01)
+        waiter = asyncio.create_task(tool("111"))
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        return calls, await leader
+
+    calls, result = asyncio.run(scenario())
+    assert calls == ["111"]
+    assert result == {"result": ["plano de 111"]}